@@ -38,6 +38,21 @@ if [[ -n "${WORKLOAD_DIST:-}" && -f "$CONFIG_JSON" ]]; then
             else
                 bash "$SCRIPT_BASE_PATH/model-handler.sh"
             fi
+
+            # Download the optional small VLM tier (tried first, large model on escalation)
+            VLM_SMALL_MODEL=$(jq -r '.vlm_small_model // empty' <<< "$entry")
+            if [[ -n "$VLM_SMALL_MODEL" ]]; then
+                export MODEL_NAME="$VLM_SMALL_MODEL"
+                export PRECISION=$(jq -r '.vlm_small_precision // .vlm_precision // "int8"' <<< "$entry")
+
+                echo "[INFO] Small VLM | $MODEL_NAME | $PRECISION"
+
+                if find "$MODELS_PATH" -type f -path "*/$MODEL_NAME/*.xml" | grep -q "$MODEL_NAME.xml"; then
+                    echo "[INFO] Small VLM Model $MODEL_NAME already exists, skipping"
+                else
+                    bash "$SCRIPT_BASE_PATH/model-handler.sh"
+                fi
+            fi
             
             # Download detection model if it exists and is not null/empty
             if [[ "$MODEL" != "null" && -n "$MODEL" ]]; then
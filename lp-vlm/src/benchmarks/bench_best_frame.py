@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Benchmark best-frame candidate selection against exhaustive scoring.
+
+Renders synthetic tracks (a textured item that slides in, slows down, pauses
+and leaves, with motion blur proportional to speed), JPEG-encodes every frame
+into an in-memory object store and runs get_best_frame with each strategy:
+
+    all      score every frame against its predecessor (exhaustive)
+    uniform  score K evenly spaced frames
+    signals  score the top-K frames ranked by confidence, bbox area and sharpness
+
+Quality is the exhaustive stability score of the chosen frame divided by the
+best exhaustive score of the track (1.0 = same pick as exhaustive).
+
+Usage:
+    python benchmarks/bench_best_frame.py [--frames 120] [--tracks 5] [--k 8]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from utils import frames_processor  # noqa: E402
+
+
+def render_track(rng, frames, width, height):
+    """Return (jpeg_bytes_list, frame_signals) for one synthetic track."""
+    background = cv2.resize(rng.integers(0, 255, (height // 20, width // 20, 3), dtype=np.uint8),
+                            (width, height), interpolation=cv2.INTER_CUBIC)
+    item_w, item_h = width // 5, height // 3
+    item = cv2.resize(rng.integers(0, 255, (12, 12, 3), dtype=np.uint8), (item_w, item_h),
+                      interpolation=cv2.INTER_NEAREST)
+
+    # Speed profile: fast entry, slow approach, pause, fast exit
+    pause, pause_len = rng.uniform(0.3, 0.6), rng.uniform(0.01, 0.04)
+    t = np.linspace(0, 1, frames)
+    speed = np.where(np.abs(t - pause) < pause_len, 0.0, 1.0) * (4 + 40 * np.abs(t - pause))
+    positions = np.cumsum(speed)
+    positions = positions / positions[-1] * (width - item_w)
+
+    # Detector confidence drifts independently of the motion, so the "signals"
+    # strategy only learns about motion from what it measures on the pixels
+    base_confidence = rng.uniform(0.6, 0.9)
+    confidence = base_confidence + rng.normal(0, 0.05, frames)
+    for i in range(1, frames):
+        confidence[i] = 0.8 * confidence[i - 1] + 0.2 * confidence[i]
+
+    jpegs, signals = [], []
+    for i in range(frames):
+        frame = background.copy()
+        x, y = int(positions[i]), height // 3
+        frame[y:y + item_h, x:x + item_w] = item
+        blur = int(speed[i] / 4) * 2 + 1
+        if blur > 1:
+            frame = cv2.blur(frame, (blur, 1))
+        jpegs.append(cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, 85])[1].tobytes())
+
+        crop = cv2.cvtColor(frame[y:y + item_h, x:x + item_w], cv2.COLOR_BGR2GRAY)[::4, ::4]
+        signals.append({
+            "confidence": float(np.clip(confidence[i], 0, 1)),
+            "area": item_w * item_h / (width * height),
+            "sharpness": float(cv2.Laplacian(crop, cv2.CV_32F).var()),
+        })
+    return jpegs, signals
+
+
+def exhaustive_scores(names, store, resize_factor=0.2, alpha=0.5):
+    """Stability score of every frame against its predecessor (index 0 has none)."""
+    grays = []
+    for name in names:
+        img = cv2.imdecode(np.frombuffer(store[name], np.uint8), cv2.IMREAD_COLOR)
+        small = cv2.resize(img, None, fx=resize_factor, fy=resize_factor, interpolation=cv2.INTER_AREA)
+        grays.append(cv2.cvtColor(small, cv2.COLOR_BGR2GRAY))
+    grays = np.stack(grays)
+    scores = (alpha * frames_processor.ssim_batch(grays[:-1], grays[1:])
+              + (1 - alpha) * frames_processor.motion_scores(grays[:-1], grays[1:], "farneback"))
+    return {name: float(score) for name, score in zip(names[1:], scores)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--frames", type=int, default=120, help="frames per track")
+    parser.add_argument("--tracks", type=int, default=5)
+    parser.add_argument("--k", type=int, default=8, help="candidates for uniform/signals")
+    parser.add_argument("--width", type=int, default=1280)
+    parser.add_argument("--height", type=int, default=720)
+    args = parser.parse_args()
+
+    store = {}
+
+    def fetch(path, bucket_name=None):
+        return store[path]
+
+    def fetch_many(paths, bucket_name=None, **kwargs):
+        return [store[path] for path in paths]
+
+    frames_processor.get_frames_from_minio = fetch
+    frames_processor.get_objects_from_minio = fetch_many
+
+    rng = np.random.default_rng(0)
+    results = {name: {"ms": [], "quality": []} for name in ("all", "uniform", "signals")}
+    for track in range(args.tracks):
+        jpegs, signals = render_track(rng, args.frames, args.width, args.height)
+        names = [f"track{track}/frame_{i:04d}.jpg" for i in range(args.frames)]
+        store.update(zip(names, jpegs))
+        reference = exhaustive_scores(names, store)
+        best_reference = max(reference.values())
+
+        for strategy in results:
+            start = time.perf_counter()
+            best_frame, _ = frames_processor.get_best_frame(
+                names, frame_signals=signals, candidates=args.k, strategy=strategy)
+            results[strategy]["ms"].append((time.perf_counter() - start) * 1000)
+            results[strategy]["quality"].append(reference[best_frame] / best_reference)
+
+    print(f"{args.tracks} tracks x {args.frames} frames at {args.width}x{args.height}, K={args.k}, "
+          f"{frames_processor.BEST_FRAME_FETCH_WORKERS} fetch workers")
+    print(f"{'strategy':<10} {'mean ms':>9} {'quality mean':>13} {'quality min':>12}")
+    for strategy, r in results.items():
+        print(f"{strategy:<10} {np.mean(r['ms']):>9.1f} {np.mean(r['quality']):>13.3f} {np.min(r['quality']):>12.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,376 @@
+#!/usr/bin/env python3
+"""
+End-to-end benchmark of the lp-vlm orchestration: publish.py -> RabbitMQ -> main.py -> VLM.
+
+Replays a recorded metadata JSONL and its frames through the real Publisher
+(frame encode, object store upload, tracking, ConfirmedPublisher), ODConsumer,
+best-frame selection, VLM service and agent stages. The external services are
+in-process stand-ins (see benchmarks/standins.py): a local AMQP broker, a
+filesystem object store and a mock VLMPipeline that sleeps for a configurable
+time. Without --metadata a synthetic recording of --tracks items is written
+first and replayed.
+
+Reports items/s, per-stage latency (publisher per frame, broker queue wait,
+the pipeline's metrics spans, OD receipt to VLM verdict) and memory (RSS
+before and after the run, peak RSS). --json writes the same numbers for CI;
+--max-p95-ms makes the run fail when OD receipt to verdict p95 exceeds it.
+
+Frames are replayed at --fps so gvatrack-style time thresholds fire as in a
+live stream; --fps 0 replays as fast as possible and drops tracking IDs so the
+publisher's frame-count threshold (DETECTION_THRESHOLD) triggers instead.
+
+Usage:
+    python benchmarks/bench_e2e.py [--tracks 12] [--fps 20] [--vlm-ms 200]
+    python benchmarks/bench_e2e.py --fps 0 --tracks 40 --vlm-ms 50
+    python benchmarks/bench_e2e.py --metadata rec/rs-1.jsonl --frames rec/frames --fps 15
+    python benchmarks/bench_e2e.py --transport shm --json e2e.json --max-p95-ms 3000
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import logging
+import os
+import resource
+import runpy
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+import cv2
+import numpy as np
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+PIPELINE_DIR = os.path.join(SRC_DIR, "pipeline")
+
+# Detector labels of the synthetic recording; "soda" has no inventory candidates,
+# so it takes the generic prompt and then agent validation
+SYNTHETIC_LABELS = ("bottle", "apple", "banana", "pomegranate", "soda")
+
+
+# ============================================================================
+# RECORDING
+# ============================================================================
+
+def write_synthetic_recording(directory, tracks, track_frames, width, height, seed=0):
+    """
+    Write a recording in the publisher's format: metadata JSONL plus one JPEG per frame.
+
+    Each track is one item sliding across the frame with a gvatrack-style
+    tracking ID, followed by a few empty frames.
+
+    Returns:
+        (metadata_path, frames_dir)
+    """
+    rng = np.random.default_rng(seed)
+    frames_dir = os.path.join(directory, "frames")
+    os.makedirs(frames_dir, exist_ok=True)
+    metadata_path = os.path.join(directory, "metadata.jsonl")
+    background = cv2.resize(rng.integers(0, 255, (height // 40, width // 40, 3), dtype=np.uint8),
+                            (width, height), interpolation=cv2.INTER_CUBIC)
+    item_w, item_h = width // 6, height // 3
+    index = 0
+    with open(metadata_path, "w") as f:
+        for track in range(tracks):
+            label = SYNTHETIC_LABELS[track % len(SYNTHETIC_LABELS)]
+            item = cv2.resize(rng.integers(0, 255, (8, 8, 3), dtype=np.uint8), (item_w, item_h),
+                              interpolation=cv2.INTER_NEAREST)
+            for step in range(track_frames + 3):
+                frame = background.copy()
+                objects = []
+                if step < track_frames:
+                    x = int((width - item_w) * step / max(1, track_frames - 1))
+                    y = height // 3
+                    frame[y:y + item_h, x:x + item_w] = item
+                    objects.append({
+                        "id": track + 1,
+                        "x": x, "y": y, "w": item_w, "h": item_h,
+                        "detection": {
+                            "label": label,
+                            "label_id": track % len(SYNTHETIC_LABELS),
+                            "confidence": round(float(rng.uniform(0.6, 0.95)), 3),
+                            "bounding_box": {"x_min": x / width, "y_min": y / height,
+                                             "x_max": (x + item_w) / width, "y_max": (y + item_h) / height},
+                        },
+                    })
+                frame_id = f"frame__{index:06d}.jpg"
+                cv2.imwrite(os.path.join(frames_dir, frame_id), frame)
+                f.write(json.dumps({"frame_id": frame_id, "objects": objects,
+                                    "resolution": {"width": width, "height": height}}) + "\n")
+                index += 1
+    return metadata_path, frames_dir
+
+
+def load_recording(metadata_path):
+    """Return the records of a metadata JSONL (one dict per frame)."""
+    with open(metadata_path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+class _Caps:
+    def __init__(self, image_format):
+        self._format = image_format
+
+    def get_structure(self, index):
+        return self
+
+    def get_value(self, key):
+        return self._format
+
+    def to_caps(self):
+        return self
+
+
+class ReplayFrame:
+    """gvapython VideoFrame stand-in: pixels, caps format and the JSON message of one recorded frame."""
+
+    def __init__(self, image, message, image_format="BGR"):
+        self._image = image
+        self._message = message
+        self._caps = _Caps(image_format)
+
+    @contextlib.contextmanager
+    def data(self):
+        yield self._image
+
+    def video_info(self):
+        return self._caps
+
+    def messages(self):
+        return [self._message]
+
+
+def replay_message(record, keep_tracking_ids):
+    """GVA JSON message of a recorded frame (without the fields the publisher adds itself)."""
+    message = {k: v for k, v in record.items() if k not in ("frame_id", "img_format")}
+    if not keep_tracking_ids:
+        message["objects"] = [{k: v for k, v in obj.items() if k != "id"} for obj in message.get("objects", [])]
+    return json.dumps(message)
+
+
+# ============================================================================
+# MEMORY
+# ============================================================================
+
+def rss_mb():
+    """Current resident set size in MB."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1e6
+    except (OSError, ValueError):
+        return 0.0
+
+
+def peak_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1e3
+
+
+# ============================================================================
+# BENCHMARK
+# ============================================================================
+
+def configure_environment(args, work_dir):
+    """Environment read at import time by the pipeline and consumer modules."""
+    os.environ.setdefault("RABBITMQ_USER", "bench")
+    os.environ.setdefault("RABBITMQ_PASSWORD", "bench")
+    os.environ["METRICS_PORT"] = "0"
+    os.environ["VLM_READY_FILE"] = os.path.join(work_dir, "results", ".vlm_ready")
+    os.environ["VLM_MODEL_PATH"] = "mock/large"
+    os.environ["VLM_CACHE_DIR"] = ""
+    os.environ["FRAME_TRANSPORT"] = args.transport
+    os.environ["FRAME_RING_DIR"] = os.path.join(work_dir, "frame-ring")
+    # Publisher and consumer share this process, so a plain directory is shared too
+    os.environ["FRAME_RING_REQUIRE_MOUNT"] = "0"
+    os.environ["TRACKING_THRESHOLD_MS"] = str(args.track_threshold_ms)
+    os.environ.setdefault("DETECTION_THRESHOLD", "12")
+    if args.small_vlm_ms > 0:
+        os.environ["VLM_SMALL_MODEL_PATH"] = "mock/small"
+    else:
+        os.environ.pop("VLM_SMALL_MODEL_PATH", None)
+
+
+def quiet_logging():
+    """Keep the pipeline's INFO logs off the console (the consumer log file still gets them)."""
+    for handler in logging.getLogger().handlers:
+        handler.setLevel(logging.WARNING)
+
+
+def run(args):
+    work_dir = tempfile.mkdtemp(prefix="bench_e2e_")
+    configure_environment(args, work_dir)
+    sys.path.insert(0, SRC_DIR)
+    sys.path.insert(1, PIPELINE_DIR)
+
+    import standins
+    broker = standins.LocalBroker()
+    store = standins.FilesystemObjectStore(os.path.join(work_dir, "objects"), latency_s=args.store_ms / 1000)
+    standins.install_pika(broker)
+    standins.install_minio(store)
+    standins.install_openvino()
+    standins.install_metrics_logger_if_missing()
+    standins.MockVLMPipeline.latencies = {
+        "mock/large": (args.vlm_ms / 1000, args.vlm_image_ms / 1000, args.vlm_token_ms / 1000),
+        "mock/small": (args.small_vlm_ms / 1000, args.vlm_image_ms / 1000, args.vlm_token_ms / 1000),
+    }
+
+    if args.metadata:
+        metadata_path, frames_dir = args.metadata, args.frames
+    else:
+        metadata_path, frames_dir = write_synthetic_recording(
+            os.path.join(work_dir, "recording"), args.tracks, args.track_frames, args.width, args.height)
+    records = load_recording(metadata_path)
+
+    import publish
+    import main
+    from utils.latency import LatencyStats
+    from utils.metrics import metrics
+    if not args.verbose:
+        quiet_logging()
+
+    publish.METADATA_DIR_FULL_PATH = os.path.join(work_dir, "results")
+    publish.FRAMES_DIR_FULL_PATH = os.path.join(work_dir, "results", "frames")
+    main.INVENTORY_FILE = os.path.join(SRC_DIR, "config", "inventory.json")
+    main.DEFAULT_LANE.results_path = os.path.join(work_dir, "results", "results.jsonl")
+    os.makedirs(os.path.dirname(os.environ["VLM_READY_FILE"]), exist_ok=True)
+
+    console = contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(io.StringIO())
+    with console:
+        startup = time.perf_counter()
+        main.start_pipeline()
+        startup_s = time.perf_counter() - startup
+        rss_start = rss_mb()
+
+        done = threading.Event()
+        final = {}
+
+        def consume():
+            for step in main.execute_loss_prevention_pipeline("bench.mp4", main.DEFAULT_LANE):
+                final["step"] = step
+            done.set()
+
+        consumer_thread = threading.Thread(target=consume, name="bench-consumer", daemon=True)
+        consumer_thread.start()
+
+        publisher = publish.Publisher()
+        publish_frame = LatencyStats("publish_frame", window=len(records) or 1)
+        keep_ids = args.fps > 0
+        started = time.perf_counter()
+        for index, record in enumerate(records):
+            if args.fps > 0:
+                delay = started + index / args.fps - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            image = cv2.imread(os.path.join(frames_dir, record["frame_id"]), cv2.IMREAD_COLOR)
+            if image is None:
+                continue
+            frame = ReplayFrame(image, replay_message(record, keep_ids))
+            frame_start = time.perf_counter()
+            publisher.process(frame)
+            publish_frame.record(time.perf_counter() - frame_start)
+        publisher.close()
+        replay_s = time.perf_counter() - started
+
+        runpy.run_path(os.path.join(PIPELINE_DIR, "send_end_message.py"), run_name="__main__")
+        drain_start = time.perf_counter()
+        finished = done.wait(args.timeout)
+        total_s = time.perf_counter() - started
+        drain_s = time.perf_counter() - drain_start
+
+    items = broker.published["object_detection"] - 1  # minus STREAM_END
+    vlm_stats = main.get_vlm_service().stats()
+    od_results, vlm_results, agent_results = (final.get("step") or ({}, {}, None, [], None, []))[1::2]
+    spans = metrics.span_totals()
+
+    stages = [("publish_frame", publish_frame), ("amqp_queue_wait", broker.queue_wait),
+              ("od_receipt_to_verdict", main.DEFAULT_LANE.item_latency)]
+    result = {
+        "config": {k: v for k, v in vars(args).items() if k not in ("json",)},
+        "completed": finished,
+        "frames": len(records),
+        "items": items,
+        "vlm_items": len(vlm_results),
+        "agent_items": len(agent_results),
+        "vlm_generations": standins.MockVLMPipeline.generations,
+        "object_store": {"puts": store.puts, "gets": store.gets},
+        "startup_s": round(startup_s, 3),
+        "replay_s": round(replay_s, 3),
+        "drain_s": round(drain_s, 3),
+        "items_per_s": round(items / total_s, 3) if total_s > 0 else 0.0,
+        "stages": {name: stats.summary() for name, stats in stages},
+        "spans": {name: {"count": count, "mean_ms": round(total / count * 1000, 2) if count else 0.0}
+                  for name, (count, total) in sorted(spans.items())},
+        "vlm_service": vlm_stats,
+        "memory_mb": {"rss_start": round(rss_start, 1), "rss_end": round(rss_mb(), 1),
+                      "peak_rss": round(peak_rss_mb(), 1)},
+    }
+    shutil.rmtree(work_dir, ignore_errors=True)
+    return result
+
+
+def print_report(result):
+    cfg = result["config"]
+    print(f"{result['frames']} frames at {cfg['fps'] or 'max'} fps, {result['items']} items, "
+          f"transport {cfg['transport']}, mock VLM {cfg['vlm_ms']:.0f} ms"
+          + (f" (small tier {cfg['small_vlm_ms']:.0f} ms)" if cfg["small_vlm_ms"] > 0 else ""))
+    if not result["completed"]:
+        print(f"!! pipeline did not finish within {cfg['timeout']:.0f} s")
+    print(f"items/s {result['items_per_s']:.2f}  replay {result['replay_s']:.2f} s  "
+          f"drain after STREAM_END {result['drain_s']:.2f} s  startup {result['startup_s']:.2f} s")
+    print(f"distinct items: VLM {result['vlm_items']}, agent {result['agent_items']}; "
+          f"generations {result['vlm_generations']}, object store puts/gets "
+          f"{result['object_store']['puts']}/{result['object_store']['gets']}")
+    print()
+    print(f"{'stage':<24} {'count':>7} {'mean ms':>9} {'p50 ms':>9} {'p95 ms':>9}")
+    for name, s in result["stages"].items():
+        print(f"{name:<24} {s['count']:>7} {s['mean_ms']:>9.1f} {s['p50_ms']:>9.1f} {s['p95_ms']:>9.1f}")
+    for name, s in result["spans"].items():
+        print(f"{'span:' + name:<24} {s['count']:>7} {s['mean_ms']:>9.1f} {'-':>9} {'-':>9}")
+    print()
+    memory = result["memory_mb"]
+    print(f"memory: RSS {memory['rss_start']:.0f} -> {memory['rss_end']:.0f} MB, peak {memory['peak_rss']:.0f} MB")
+    print(f"VLM service: {result['vlm_service']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--metadata", help="recorded metadata JSONL (synthetic recording if omitted)")
+    parser.add_argument("--frames", help="directory holding the recorded frames, named by frame_id")
+    parser.add_argument("--tracks", type=int, default=12, help="items in the synthetic recording")
+    parser.add_argument("--track-frames", type=int, default=30, help="frames each synthetic item is visible")
+    parser.add_argument("--width", type=int, default=1280)
+    parser.add_argument("--height", type=int, default=720)
+    parser.add_argument("--fps", type=float, default=20, help="replay rate; 0 = as fast as possible")
+    parser.add_argument("--track-threshold-ms", type=int, default=1000,
+                        help="TRACKING_THRESHOLD_MS for the publisher")
+    parser.add_argument("--transport", choices=("minio", "shm"), default="minio", help="FRAME_TRANSPORT")
+    parser.add_argument("--store-ms", type=float, default=0, help="object store latency per request")
+    parser.add_argument("--vlm-ms", type=float, default=200, help="mock VLM prefill time per generation")
+    parser.add_argument("--vlm-image-ms", type=float, default=0, help="mock VLM time per input image")
+    parser.add_argument("--vlm-token-ms", type=float, default=0, help="mock VLM time per generated token")
+    parser.add_argument("--small-vlm-ms", type=float, default=0,
+                        help="prefill time of a mock small tier (0 = no small tier)")
+    parser.add_argument("--timeout", type=float, default=300, help="seconds to wait for the pipeline to drain")
+    parser.add_argument("--json", help="write the results to this file")
+    parser.add_argument("--max-p95-ms", type=float, default=0,
+                        help="exit 1 if OD receipt to verdict p95 exceeds this (0 = no check)")
+    parser.add_argument("--verbose", action="store_true", help="keep pipeline logs and prints on the console")
+    args = parser.parse_args()
+    if args.metadata and not args.frames:
+        parser.error("--frames is required with --metadata")
+
+    result = run(args)
+    print_report(result)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(result, f, indent=2)
+
+    p95 = result["stages"]["od_receipt_to_verdict"]["p95_ms"]
+    if not result["completed"] or (args.max_p95_ms and p95 > args.max_p95_ms):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Benchmark per-frame JPEG encode time and peak RSS for the Publisher frame path.
+
+Compares the legacy path (BGR->RGB slice + PIL) against the zero-copy
+FrameEncoder backends at 1080p and 4K. Frames are laid out like a gvapython
+mapping: a read-only strided view over a padded buffer, in BGR or BGRx.
+Each case runs in its own subprocess so peak RSS is measured per case; RSS
+growth is the peak during the encode loop (Linux VmHWM, reset just before
+it) over the resident size after the frame was built.
+
+Usage:
+    python benchmarks/bench_frame_encode.py [--frames 50] [--formats BGR BGRx]
+"""
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "pipeline"))
+
+RESOLUTIONS = {"1080p": (1080, 1920), "4k": (2160, 3840)}
+BACKENDS = ["legacy", "pil", "opencv", "turbojpeg"]
+
+
+def make_mapped_frame(height, width, img_format, row_align=64):
+    """Build a read-only strided view that mimics gstgva VideoFrame.data()."""
+    channels = 4 if img_format.endswith(("x", "A")) else 3
+    stride = -(-width * channels // row_align) * row_align
+    buffer = np.zeros(height * stride, dtype=np.uint8)
+    view = np.ndarray((height, width, channels), dtype=np.uint8, buffer=buffer,
+                      strides=(stride, channels, 1))
+    # Smooth gradients plus a little noise compress like real camera frames. Built from
+    # uint8 ramps and row blocks so no full-frame temporaries outweigh the encoder's memory
+    xs = (np.arange(width) * 255 // width).astype(np.uint8)
+    ys = (np.arange(height) * 255 // height).astype(np.uint8)
+    view[..., 0] = xs
+    view[..., 1] = ys[:, None]
+    np.add((np.arange(height) % 256).astype(np.uint8)[:, None], (np.arange(width) % 256).astype(np.uint8),
+           out=view[..., 2])  # uint8 addition wraps, i.e. (x + y) % 256
+    rng = np.random.default_rng(0)
+    for row in range(0, height, 64):
+        block = view[row:row + 64, :, :3]
+        block ^= rng.integers(0, 8, block.shape, dtype=np.uint8)
+    view.flags.writeable = False
+    return view
+
+
+def _proc_status_kb(field):
+    """Read a VmRSS/VmHWM-style field of /proc/self/status in kB, or None where unavailable."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith(field + ":"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+def _reset_peak_rss():
+    """Reset the kernel's peak-RSS mark (VmHWM) to the current RSS; False if unsupported."""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def legacy_encode(image, img_format):
+    """Publisher.save_image/_save_to_minio before the zero-copy fast path."""
+    from io import BytesIO
+    from PIL import Image
+
+    if img_format in ["BGR", "BGRx", "BGRA"]:
+        image = image[:, :, 2::-1]
+    pil_image = Image.fromarray(image)
+    image_buffer = BytesIO()
+    pil_image.save(image_buffer, format="JPEG", quality=85)
+    image_buffer.seek(0)
+    return image_buffer.getvalue()
+
+
+def run_case(backend, resolution, img_format, frames):
+    """Run one case in the current process and return its measurements."""
+    height, width = RESOLUTIONS[resolution]
+    image = make_mapped_frame(height, width, img_format)
+
+    if backend in ("legacy", "pil"):
+        import PIL.Image  # noqa: F401 — keep library load out of the RSS growth figure
+    if backend == "legacy":
+        encode = legacy_encode
+    else:
+        from frame_encoder import FrameEncoder
+        encoder = FrameEncoder(backend=backend)
+        if encoder.backend != backend:
+            return {"skipped": f"{backend} unavailable"}
+        encode = encoder.encode
+
+    # Growth is what encoding adds on top of the resident frame: current RSS now against
+    # the peak over the loop, with the peak mark reset so building the frame does not count
+    track_peak = _reset_peak_rss()
+    baseline_kb = _proc_status_kb("VmRSS") if track_peak else resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    encode(image, img_format)  # warm-up
+    timings = []
+    size = 0
+    for _ in range(frames):
+        start = time.perf_counter()
+        size = len(encode(image, img_format))
+        timings.append((time.perf_counter() - start) * 1000)
+    encode_peak_kb = _proc_status_kb("VmHWM") if track_peak else None
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if encode_peak_kb is None:
+        encode_peak_kb = peak_kb
+
+    timings.sort()
+    return {
+        "mean_ms": sum(timings) / len(timings),
+        "p95_ms": timings[int(0.95 * (len(timings) - 1))],
+        "jpeg_kb": size / 1024,
+        "peak_rss_mb": peak_kb / 1024,
+        "encode_rss_growth_mb": max(0, encode_peak_kb - baseline_kb) / 1024,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--frames", type=int, default=50)
+    parser.add_argument("--formats", nargs="+", default=["BGR", "BGRx"])
+    parser.add_argument("--backends", nargs="+", default=BACKENDS)
+    parser.add_argument("--resolutions", nargs="+", default=list(RESOLUTIONS))
+    parser.add_argument("--case", nargs=3, metavar=("BACKEND", "RESOLUTION", "FORMAT"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.case:
+        print(json.dumps(run_case(*args.case, frames=args.frames)))
+        return
+
+    print(f"{'resolution':<10} {'format':<6} {'backend':<10} {'mean ms':>8} {'p95 ms':>8} "
+          f"{'jpeg KB':>8} {'peak RSS MB':>12} {'RSS growth MB':>14}")
+    for resolution in args.resolutions:
+        for img_format in args.formats:
+            for backend in args.backends:
+                out = subprocess.run(
+                    [sys.executable, __file__, "--frames", str(args.frames), "--case", backend, resolution, img_format],
+                    capture_output=True, text=True,
+                )
+                if out.returncode != 0:
+                    print(f"{resolution:<10} {img_format:<6} {backend:<10} failed: {out.stderr.strip().splitlines()[-1:]}")
+                    continue
+                result = json.loads(out.stdout.strip().splitlines()[-1])
+                if "skipped" in result:
+                    print(f"{resolution:<10} {img_format:<6} {backend:<10} {result['skipped']}")
+                    continue
+                print(f"{resolution:<10} {img_format:<6} {backend:<10} {result['mean_ms']:>8.2f} {result['p95_ms']:>8.2f} "
+                      f"{result['jpeg_kb']:>8.1f} {result['peak_rss_mb']:>12.1f} {result['encode_rss_growth_mb']:>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Benchmark serial vs bulk MinIO frame fetches against a local stand-in server.
+
+Starts a threaded HTTP server that answers S3 GetObject requests (with Range
+support and a fixed per-request latency) from memory, points the save_results
+MinIO client at it and compares:
+
+    serial   get_frames_from_minio in a loop (what get_best_frame used to do)
+    bulk     get_objects_from_minio (concurrent, pooled connections)
+    buffers  get_objects_from_minio streaming into preallocated buffers
+    ranged   get_objects_from_minio reading only the first --range-kb of each object
+
+Usage:
+    python benchmarks/bench_minio_fetch.py [--objects 50] [--size-kb 200] [--latency-ms 5]
+"""
+
+import argparse
+import os
+import re
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+BUCKET = "bench-frames"
+
+
+class ObjectStoreHandler(BaseHTTPRequestHandler):
+    """Minimal GetObject: /<bucket>/<key>, optional 'Range: bytes=a-b'."""
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out in separate writes; without TCP_NODELAY small
+    # responses stall on delayed ACKs, which real MinIO does not do
+    disable_nagle_algorithm = True
+    objects = {}
+    latency_s = 0.0
+
+    def do_GET(self):
+        time.sleep(self.latency_s)
+        key = self.path.split("?", 1)[0].lstrip("/")
+        body = self.objects.get(key)
+        if body is None:
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        status = 200
+        match = re.match(r"bytes=(\d+)-(\d*)", self.headers.get("Range", ""))
+        if match:
+            start = int(match.group(1))
+            end = int(match.group(2)) if match.group(2) else len(body) - 1
+            body = body[start:end + 1]
+            status = 206
+        self.send_response(status)
+        self.send_header("Content-Type", "application/octet-stream")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--objects", type=int, default=50)
+    parser.add_argument("--size-kb", type=int, default=200, help="object size (a 1080p JPEG is ~150-300 KB)")
+    parser.add_argument("--latency-ms", type=float, default=5, help="server latency per request")
+    parser.add_argument("--range-kb", type=int, default=16, help="bytes read per object in ranged mode")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    ObjectStoreHandler.latency_s = args.latency_ms / 1000
+    keys = [f"run/frame_{i:06d}.jpg" for i in range(args.objects)]
+    for key in keys:
+        ObjectStoreHandler.objects[f"{BUCKET}/{key}"] = os.urandom(args.size_kb * 1024)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), ObjectStoreHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    os.environ["MINIO_ENDPOINT"] = f"127.0.0.1:{server.server_address[1]}"
+    os.environ.setdefault("MINIO_REGION", "us-east-1")
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+    from utils import save_results
+
+    buffers = [bytearray(args.size_kb * 1024) for _ in keys]
+    cases = {
+        "serial": lambda: [save_results.get_frames_from_minio(k, bucket_name=BUCKET) for k in keys],
+        "bulk": lambda: save_results.get_objects_from_minio(keys, bucket_name=BUCKET),
+        "buffers": lambda: save_results.get_objects_from_minio(keys, bucket_name=BUCKET, buffers=buffers),
+        "ranged": lambda: save_results.get_objects_from_minio(keys, bucket_name=BUCKET,
+                                                              length=args.range_kb * 1024),
+    }
+
+    cases["bulk"]()  # warm up connections
+    print(f"{args.objects} objects x {args.size_kb} KB, {args.latency_ms:.0f} ms server latency, "
+          f"{save_results.MINIO_FETCH_WORKERS} workers, pool {save_results.MINIO_MAX_POOL_SIZE}")
+    print(f"{'mode':<8} {'ms':>8} {'MB/s':>8}")
+    for name, run in cases.items():
+        best = float("inf")
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            results = run()
+            best = min(best, time.perf_counter() - start)
+        assert all(isinstance(r, (bytes, memoryview)) for r in results), f"{name}: fetch failed"
+        total_mb = sum(len(r) for r in results) / 1e6
+        print(f"{name:<8} {best * 1000:>8.1f} {total_mb / best:>8.1f}")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Benchmark per-image VLM input preprocessing.
+
+Encodes a synthetic camera frame as JPEG and times each way of turning it
+into a 640x360 RGB uint8 VLM input:
+
+    pil          PIL decode, convert("RGB"), resize, np.array (old presigned-URL path)
+    cv2          full-size cv2 decode, resize, cvtColor (fresh arrays per call)
+    fast_jpeg    reduced-size libjpeg decode into a pooled buffer (new presigned-URL path)
+    bgr          resize + cvtColor of an already decoded frame (old in-process path)
+    bgr_pooled   the same into a pooled buffer (new in-process path)
+
+Mean abs diff is against the cv2 output (0-255 scale).
+
+Usage:
+    python benchmarks/bench_preprocess.py [--width 1920] [--height 1080] [--iterations 200]
+"""
+
+import argparse
+import os
+import sys
+import time
+from io import BytesIO
+
+import cv2
+import numpy as np
+from PIL import Image
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from utils.image_preprocess import get_input_buffer_pool  # noqa: E402
+
+VLM_IMAGE_SIZE = (640, 360)
+
+
+def synthetic_frame(width, height):
+    """Smooth background with sharp-edged blocks, roughly like a checkout camera frame."""
+    rng = np.random.default_rng(0)
+    frame = cv2.resize(rng.integers(0, 255, (height // 40, width // 40, 3), dtype=np.uint8),
+                       (width, height), interpolation=cv2.INTER_CUBIC)
+    for _ in range(12):
+        x, y = rng.integers(0, width - 200), rng.integers(0, height - 200)
+        frame[y:y + 150, x:x + 180] = rng.integers(0, 255, 3, dtype=np.uint8)
+    return frame
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--width", type=int, default=1920)
+    parser.add_argument("--height", type=int, default=1080)
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+
+    frame = synthetic_frame(args.width, args.height)
+    jpeg = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, 85])[1].tobytes()
+    decoded = cv2.imdecode(np.frombuffer(jpeg, np.uint8), cv2.IMREAD_COLOR)
+    pool = get_input_buffer_pool(VLM_IMAGE_SIZE)
+
+    def pil():
+        return np.array(Image.open(BytesIO(jpeg)).convert("RGB").resize(VLM_IMAGE_SIZE))
+
+    def full_cv2():
+        img = cv2.imdecode(np.frombuffer(jpeg, np.uint8), cv2.IMREAD_COLOR)
+        return cv2.cvtColor(cv2.resize(img, VLM_IMAGE_SIZE, interpolation=cv2.INTER_AREA), cv2.COLOR_BGR2RGB)
+
+    def bgr():
+        return cv2.cvtColor(cv2.resize(decoded, VLM_IMAGE_SIZE, interpolation=cv2.INTER_AREA), cv2.COLOR_BGR2RGB)
+
+    def pooled(convert):
+        def run():
+            out = convert()
+            result = out.copy()  # snapshot for the diff; the timed loop releases without copying
+            pool.release(out)
+            return result
+        return run
+
+    cases = {
+        "pil": (pil, pil),
+        "cv2": (full_cv2, full_cv2),
+        "fast_jpeg": (pooled(lambda: pool.from_jpeg(jpeg)), lambda: pool.release(pool.from_jpeg(jpeg))),
+        "bgr": (bgr, bgr),
+        "bgr_pooled": (pooled(lambda: pool.from_bgr(decoded)), lambda: pool.release(pool.from_bgr(decoded))),
+    }
+
+    reference = full_cv2().astype(np.int16)
+    print(f"{args.width}x{args.height} JPEG ({len(jpeg) // 1024} KB) -> {VLM_IMAGE_SIZE[0]}x{VLM_IMAGE_SIZE[1]} RGB, "
+          f"{args.iterations} iterations")
+    print(f"{'path':<11} {'ms/image':>9} {'mean abs diff':>14}")
+    for name, (check, timed) in cases.items():
+        diff = np.abs(check().astype(np.int16) - reference).mean()
+        for _ in range(5):
+            timed()
+        start = time.perf_counter()
+        for _ in range(args.iterations):
+            timed()
+        elapsed = (time.perf_counter() - start) / args.iterations
+        print(f"{name:<11} {elapsed * 1000:>9.2f} {diff:>14.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Benchmark item-to-verdict latency across the two lp-vlm queue hops.
+
+Replays the main.py topology (OD queue -> VLM worker -> result queue -> reader)
+with a fixed mock VLM time, once with the old sleep-polling readers and once with
+the blocking, sentinel-terminated readers. Reports per-item latency beyond the
+mock VLM time and the CPU burned by the readers while idle.
+
+Usage:
+    python benchmarks/bench_queue_hops.py [--items 50] [--gap-ms 200] [--vlm-ms 50]
+"""
+
+import argparse
+import queue
+import random
+import threading
+import time
+
+STREAM_END = {"msg_type": "STREAM_END"}
+
+
+def polling_reader(source_queue):
+    """Reader as it was in main.py: spin on empty() and sleep 100 ms."""
+    while True:
+        while not source_queue.empty():
+            item = source_queue.get()
+            yield item
+            if item is STREAM_END:
+                return
+        time.sleep(0.1)
+
+
+def blocking_reader(source_queue):
+    """Reader as it is now in main.py: block on get() until the sentinel."""
+    while True:
+        item = source_queue.get()
+        yield item
+        if item is STREAM_END:
+            return
+
+
+def run(reader, items, gap_s, vlm_s):
+    od_queue, vlm_queue, result_queue = queue.Queue(), queue.Queue(), queue.Queue()
+    latencies = []
+    cpu = {}
+
+    def od_stage():
+        start = time.thread_time()
+        for payload in reader(od_queue):
+            vlm_queue.put(payload)
+        cpu["od_reader"] = time.thread_time() - start
+
+    def vlm_worker():
+        while True:
+            payload = vlm_queue.get()
+            if payload is not STREAM_END:
+                time.sleep(vlm_s)
+            result_queue.put(payload)
+            if payload is STREAM_END:
+                return
+
+    def result_stage():
+        start = time.thread_time()
+        for payload in reader(result_queue):
+            if payload is not STREAM_END:
+                latencies.append(time.perf_counter() - payload["received_at"])
+        cpu["result_reader"] = time.thread_time() - start
+
+    threads = [threading.Thread(target=t) for t in (od_stage, vlm_worker, result_stage)]
+    for t in threads:
+        t.start()
+    rng = random.Random(0)
+    for i in range(items):
+        time.sleep(rng.uniform(0.5, 1.5) * gap_s)
+        od_queue.put({"item": i, "received_at": time.perf_counter()})
+    od_queue.put(STREAM_END)
+    for t in threads:
+        t.join()
+
+    overhead = sorted((lat - vlm_s) * 1000 for lat in latencies)
+    return {
+        "mean_ms": sum(overhead) / len(overhead),
+        "p95_ms": overhead[int(0.95 * (len(overhead) - 1))],
+        "max_ms": overhead[-1],
+        "reader_cpu_ms": (cpu["od_reader"] + cpu["result_reader"]) * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, default=50)
+    parser.add_argument("--gap-ms", type=float, default=200, help="mean gap between detected items")
+    parser.add_argument("--vlm-ms", type=float, default=50, help="mock VLM time per item")
+    args = parser.parse_args()
+
+    print(f"{args.items} items, ~{args.gap_ms:.0f} ms apart, mock VLM {args.vlm_ms:.0f} ms; "
+          f"latency excludes VLM time")
+    print(f"{'reader':<10} {'mean ms':>8} {'p95 ms':>8} {'max ms':>8} {'reader CPU ms':>14}")
+    for name, reader in (("polling", polling_reader), ("blocking", blocking_reader)):
+        r = run(reader, args.items, args.gap_ms / 1000, args.vlm_ms / 1000)
+        print(f"{name:<10} {r['mean_ms']:>8.2f} {r['p95_ms']:>8.2f} {r['max_ms']:>8.2f} {r['reader_cpu_ms']:>14.2f}")
+
+
+if __name__ == "__main__":
+    main()
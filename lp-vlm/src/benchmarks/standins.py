@@ -0,0 +1,485 @@
+"""
+In-process stand-ins for the services around the lp-vlm pipeline, for benchmarks.
+
+    LocalBroker            AMQP broker: durable queues, per-consumer prefetch,
+                           manual acks and publisher confirms
+    install_pika           a `pika` module (SelectConnection, BlockingConnection)
+                           talking to a LocalBroker, enough for ConfirmedPublisher,
+                           ODConsumer and send_end_message.py
+    FilesystemObjectStore  the subset of the minio.Minio client the pipeline uses,
+                           one directory per bucket
+    install_minio          a `minio` module whose Minio() returns that store
+    MockVLMPipeline        openvino_genai.VLMPipeline that sleeps instead of
+                           running a model and answers each prompt type plausibly
+    install_openvino       `openvino` / `openvino_genai` modules serving the mock
+
+Install the modules before importing pipeline or consumer code.
+"""
+
+import io
+import json
+import os
+import queue
+import sys
+import threading
+import time
+import types
+from collections import defaultdict, deque
+
+from utils.prompts import (AGENT_BATCH_PROMPT, AGENT_PROMPT, INVENTORY_CANDIDATES_LABEL,
+                           INVENTORY_PROMPT_PREFIX)
+from utils.latency import LatencyStats
+
+
+# ============================================================================
+# AMQP
+# ============================================================================
+
+class LocalBroker:
+    """
+    Minimal in-process AMQP broker behind the default exchange.
+
+    One condition variable guards every queue; consumers and I/O loops wait on
+    it for new messages or thread-safe callbacks.
+    """
+
+    def __init__(self):
+        self.cond = threading.Condition()
+        self._queues = defaultdict(deque)  # queue name -> deque of (body, published_at)
+        self.published = defaultdict(int)
+        # Publish -> delivery time of every message
+        self.queue_wait = LatencyStats("amqp_queue_wait", window=100000)
+
+    def declare(self, name):
+        with self.cond:
+            self._queues[name]
+
+    def publish(self, name, body):
+        if isinstance(body, str):
+            body = body.encode("utf-8")
+        with self.cond:
+            self._queues[name].append((body, time.perf_counter()))
+            self.published[name] += 1
+            self.cond.notify_all()
+
+    def requeue(self, name, body):
+        with self.cond:
+            self._queues[name].appendleft((body, time.perf_counter()))
+            self.cond.notify_all()
+
+    def pop(self, name):
+        """Next message body of a queue, or None; caller holds cond."""
+        messages = self._queues[name]
+        if not messages:
+            return None
+        body, published_at = messages.popleft()
+        self.queue_wait.record(time.perf_counter() - published_at)
+        return body
+
+    def depth(self, name):
+        with self.cond:
+            return len(self._queues[name])
+
+
+class _Method:
+    def __init__(self, delivery_tag, multiple=False):
+        self.delivery_tag = delivery_tag
+        self.multiple = multiple
+
+
+class _Ack(_Method):
+    pass
+
+
+class _Nack(_Method):
+    pass
+
+
+class _Frame:
+    def __init__(self, method=None):
+        self.method = method
+
+
+class _Parameters:
+    def __init__(self, *args, **kwargs):
+        self.args = args
+        self.kwargs = kwargs
+
+
+class _IOLoop:
+    """Callback loop of a SelectConnection; runs on the thread that calls start()."""
+
+    def __init__(self):
+        self._callbacks = queue.Queue()
+        self._stopped = False
+
+    def add_callback_threadsafe(self, callback):
+        self._callbacks.put(callback)
+
+    add_callback = add_callback_threadsafe
+
+    def start(self):
+        while not self._stopped:
+            self._callbacks.get()()
+
+    def stop(self):
+        self._stopped = True
+        self._callbacks.put(lambda: None)
+
+
+class _SelectChannel:
+    def __init__(self, connection):
+        self._connection = connection
+        self._confirm_callback = None
+        self._tag = 0
+
+    def add_on_close_callback(self, callback):
+        pass
+
+    def queue_declare(self, queue, durable=False, callback=None, **kwargs):
+        self._connection.broker.declare(queue)
+        if callback is not None:
+            self._connection.ioloop.add_callback(lambda: callback(_Frame()))
+
+    def confirm_delivery(self, ack_nack_callback):
+        self._confirm_callback = ack_nack_callback
+
+    def basic_publish(self, exchange, routing_key, body, properties=None, **kwargs):
+        self._connection.broker.publish(routing_key, body)
+        if self._confirm_callback is not None:
+            self._tag += 1
+            method = _Ack(self._tag)
+            self._connection.ioloop.add_callback(lambda: self._confirm_callback(_Frame(method)))
+
+
+class SelectConnection:
+    """Asynchronous connection; callbacks run on the ioloop like pika's."""
+    broker = None
+
+    def __init__(self, parameters=None, on_open_callback=None, on_open_error_callback=None,
+                 on_close_callback=None, **kwargs):
+        self.ioloop = _IOLoop()
+        self._on_close_callback = on_close_callback
+        self.is_open, self.is_closing, self.is_closed = True, False, False
+        if on_open_callback is not None:
+            self.ioloop.add_callback(lambda: on_open_callback(self))
+
+    def channel(self, on_open_callback=None, **kwargs):
+        channel = _SelectChannel(self)
+        if on_open_callback is not None:
+            self.ioloop.add_callback(lambda: on_open_callback(channel))
+        return channel
+
+    def close(self, *args):
+        if self.is_closed:
+            return
+        self.is_open, self.is_closed = False, True
+        if self._on_close_callback is not None:
+            self.ioloop.add_callback(lambda: self._on_close_callback(self, "closed by client"))
+        else:
+            self.ioloop.stop()
+
+
+class _BlockingChannel:
+    def __init__(self, connection):
+        self._connection = connection
+        self._broker = connection.broker
+        self._prefetch = 0
+        self._consumer = None  # (queue name, callback, auto_ack)
+        self._unacked = {}  # delivery tag -> body
+        self._tag = 0
+
+    def queue_declare(self, queue, durable=False, **kwargs):
+        self._broker.declare(queue)
+
+    def basic_qos(self, prefetch_count=0, **kwargs):
+        self._prefetch = prefetch_count
+
+    def basic_publish(self, exchange, routing_key, body, properties=None, **kwargs):
+        self._broker.publish(routing_key, body)
+
+    def basic_consume(self, queue, on_message_callback, auto_ack=False, **kwargs):
+        self._consumer = (queue, on_message_callback, auto_ack)
+
+    def basic_ack(self, delivery_tag, multiple=False):
+        self._unacked.pop(delivery_tag, None)
+
+    def basic_reject(self, delivery_tag, requeue=True):
+        body = self._unacked.pop(delivery_tag, None)
+        if requeue and body is not None:
+            self._broker.requeue(self._consumer[0], body)
+
+    def start_consuming(self):
+        """Deliver messages within the prefetch window and run thread-safe callbacks until closed."""
+        queue_name, on_message, auto_ack = self._consumer
+        while not self._connection.is_closed:
+            with self._broker.cond:
+                callbacks = self._connection.take_callbacks()
+                body = None
+                if not callbacks and (not self._prefetch or len(self._unacked) < self._prefetch):
+                    body = self._broker.pop(queue_name)
+                if not callbacks and body is None:
+                    self._broker.cond.wait(timeout=0.1)
+                    continue
+            for callback in callbacks:
+                callback()
+            if body is not None:
+                self._tag += 1
+                if not auto_ack:
+                    self._unacked[self._tag] = body
+                on_message(self, _Method(self._tag), _Parameters(), body)
+
+
+class BlockingConnection:
+    """Synchronous connection; add_callback_threadsafe callbacks run inside start_consuming."""
+    broker = None
+
+    def __init__(self, parameters=None, **kwargs):
+        self._callbacks = []
+        self.is_open, self.is_closed = True, False
+
+    def channel(self):
+        return _BlockingChannel(self)
+
+    def add_callback_threadsafe(self, callback):
+        with self.broker.cond:
+            self._callbacks.append(callback)
+            self.broker.cond.notify_all()
+
+    def take_callbacks(self):
+        """Pending thread-safe callbacks; caller holds the broker condition."""
+        callbacks, self._callbacks = self._callbacks, []
+        return callbacks
+
+    def close(self):
+        with self.broker.cond:
+            self.is_open, self.is_closed = False, True
+            self.broker.cond.notify_all()
+
+
+def install_pika(broker):
+    """Register a `pika` module backed by broker in sys.modules and return it."""
+    pika = types.ModuleType("pika")
+    spec = types.ModuleType("pika.spec")
+    spec.Basic = types.SimpleNamespace(Ack=_Ack, Nack=_Nack)
+    exceptions = types.ModuleType("pika.exceptions")
+    exceptions.AMQPConnectionError = type("AMQPConnectionError", (Exception,), {})
+
+    select_connection = type("SelectConnection", (SelectConnection,), {"broker": broker})
+    blocking_connection = type("BlockingConnection", (BlockingConnection,), {"broker": broker})
+    pika.SelectConnection = select_connection
+    pika.BlockingConnection = blocking_connection
+    pika.ConnectionParameters = _Parameters
+    pika.PlainCredentials = _Parameters
+    pika.BasicProperties = _Parameters
+    pika.spec = spec
+    pika.exceptions = exceptions
+    sys.modules.update({"pika": pika, "pika.spec": spec, "pika.exceptions": exceptions})
+    return pika
+
+
+# ============================================================================
+# OBJECT STORE
+# ============================================================================
+
+class S3Error(Exception):
+    pass
+
+
+class _ObjectResponse:
+    """The parts of urllib3's HTTPResponse that save_results.fetch_object reads."""
+
+    def __init__(self, data):
+        self._body = io.BytesIO(data)
+        self.headers = {"Content-Length": str(len(data))}
+
+    def read(self, *args):
+        return self._body.read(*args)
+
+    def readinto(self, buffer):
+        return self._body.readinto(buffer)
+
+    def close(self):
+        pass
+
+    def release_conn(self):
+        pass
+
+
+class FilesystemObjectStore:
+    """
+    minio.Minio stand-in storing objects as files under root/<bucket>/<key>.
+
+    latency_s is added to every put and get to model the network round trip.
+    """
+
+    def __init__(self, root, latency_s=0.0):
+        self.root = root
+        self.latency_s = latency_s
+        self.puts = 0
+        self.gets = 0
+        self._lock = threading.Lock()
+
+    def _path(self, bucket, name):
+        return os.path.join(self.root, bucket, name)
+
+    def bucket_exists(self, bucket):
+        return os.path.isdir(os.path.join(self.root, bucket))
+
+    def make_bucket(self, bucket):
+        os.makedirs(os.path.join(self.root, bucket), exist_ok=True)
+
+    def put_object(self, bucket, name, data, length=-1, content_type=None, **kwargs):
+        if self.latency_s:
+            time.sleep(self.latency_s)
+        path = self._path(bucket, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data.read(length) if length >= 0 else data.read())
+        os.replace(tmp_path, path)
+        with self._lock:
+            self.puts += 1
+
+    def get_object(self, bucket, name, offset=0, length=0, **kwargs):
+        if self.latency_s:
+            time.sleep(self.latency_s)
+        try:
+            with open(self._path(bucket, name), "rb") as f:
+                f.seek(offset)
+                data = f.read(length) if length else f.read()
+        except FileNotFoundError:
+            raise S3Error(f"NoSuchKey: {bucket}/{name}")
+        with self._lock:
+            self.gets += 1
+        return _ObjectResponse(data)
+
+    def presigned_get_object(self, bucket, name, expires=None, **kwargs):
+        return f"file://{self._path(bucket, name)}"
+
+
+def install_minio(store):
+    """Register a `minio` module whose Minio() returns store, and return it."""
+    minio = types.ModuleType("minio")
+    error = types.ModuleType("minio.error")
+    error.S3Error = S3Error
+    minio.Minio = lambda *args, **kwargs: store
+    minio.error = error
+    sys.modules.update({"minio": minio, "minio.error": error})
+    return minio
+
+
+# ============================================================================
+# VLM
+# ============================================================================
+
+class _Duration:
+    def __init__(self, ms):
+        self.mean = ms
+
+
+class _PerfMetrics:
+    def __init__(self, input_tokens, generated_tokens, ttft_ms, generate_ms):
+        self._values = (input_tokens, generated_tokens, ttft_ms, generate_ms)
+
+    def get_num_input_tokens(self):
+        return self._values[0]
+
+    def get_num_generated_tokens(self):
+        return self._values[1]
+
+    def get_ttft(self):
+        return _Duration(self._values[2])
+
+    def get_generate_duration(self):
+        return _Duration(self._values[3])
+
+
+class _DecodedResults:
+    def __init__(self, text, perf_metrics):
+        self.texts = [text]
+        self.perf_metrics = perf_metrics
+
+
+class GenerationConfig:
+    def __init__(self, **kwargs):
+        self.max_new_tokens = 512
+        self.__dict__.update(kwargs)
+
+
+class MockVLMPipeline:
+    """
+    VLMPipeline that sleeps prefill_s per generation (plus image_s per image)
+    and token_s per generated token, streaming ~4-character tokens through the
+    streamer so early stopping behaves as with a real model.
+
+    Latencies are class attributes, set per model path in `latencies`
+    (path -> (prefill_s, image_s, token_s)) with `default_latency` for the rest.
+    """
+    default_latency = (0.2, 0.0, 0.0)
+    latencies = {}
+    generations = 0
+    _count_lock = threading.Lock()
+
+    def __init__(self, models_path=None, device=None, *args, **kwargs):
+        self.models_path = models_path if models_path is not None else (args[0] if args else "")
+        self.device = device
+
+    @staticmethod
+    def answer(prompt):
+        """JSON answer matching the prompt type."""
+        if prompt.startswith(AGENT_PROMPT):
+            _, _, payload = prompt.rpartition("\nInput ")
+            names = json.loads(payload) if payload else ""
+            if isinstance(names, list):
+                return json.dumps([{"input": n, "item_name": n.title(), "match": True} for n in names])
+            return json.dumps([{"item_name": str(names).title(), "match": True}])
+        if prompt.startswith(INVENTORY_PROMPT_PREFIX):
+            _, _, candidates = prompt.partition(INVENTORY_CANDIDATES_LABEL)
+            first = candidates.split(",")[0].strip()
+            return json.dumps([{"item_name": first or "None"}])
+        return json.dumps([{"item_name": "Unknown Item"}])
+
+    def generate(self, prompt, images=None, generation_config=None, streamer=None, **kwargs):
+        prefill_s, image_s, token_s = self.latencies.get(self.models_path, self.default_latency)
+        start = time.perf_counter()
+        time.sleep(prefill_s + image_s * len(images or ()))
+        ttft_ms = (time.perf_counter() - start) * 1000
+
+        text = self.answer(prompt)
+        max_tokens = getattr(generation_config, "max_new_tokens", 512) or 512
+        tokens = [text[i:i + 4] for i in range(0, len(text), 4)][:max_tokens]
+        generated = []
+        for token in tokens:
+            if token_s:
+                time.sleep(token_s)
+            generated.append(token)
+            if streamer is not None and streamer(token) is True:
+                break
+        with MockVLMPipeline._count_lock:
+            MockVLMPipeline.generations += 1
+        generate_ms = (time.perf_counter() - start) * 1000
+        return _DecodedResults("".join(generated),
+                               _PerfMetrics(len(prompt) // 4, len(generated), ttft_ms, generate_ms))
+
+
+def install_openvino():
+    """Register `openvino` and `openvino_genai` modules serving MockVLMPipeline."""
+    openvino = types.ModuleType("openvino")
+    openvino.Tensor = lambda array, shared_memory=False: array
+    genai = types.ModuleType("openvino_genai")
+    genai.VLMPipeline = MockVLMPipeline
+    genai.GenerationConfig = GenerationConfig
+    sys.modules.update({"openvino": openvino, "openvino_genai": genai})
+    return genai
+
+
+def install_metrics_logger_if_missing():
+    """Register a no-op vlm_metrics_logger when performance-tools is not installed."""
+    try:
+        import vlm_metrics_logger  # noqa: F401
+    except ImportError:
+        module = types.ModuleType("vlm_metrics_logger")
+        for name in ("log_start_time", "log_end_time", "log_custom_event", "log_performance_metric"):
+            setattr(module, name, lambda *args, **kwargs: None)
+        sys.modules["vlm_metrics_logger"] = module
@@ -1,4 +1,5 @@
 import sys,os
+import atexit
 import json
 import subprocess
 import os
@@ -7,6 +8,9 @@ import queue
 from collections import defaultdict
 import threading
 import time
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
 
 from utils.config import (SAMPLE_MEDIA_DIR,
                           RESULTS_DIR,
@@ -14,17 +18,24 @@ from utils.config import (SAMPLE_MEDIA_DIR,
                           
                           LP_IP,MINIO_API_HOST_PORT, 
                           COMMON_RESULTS_DIR_FULL_PATH,
+                          lane_results_path,
                           )
-from utils.vlm import call_vlm
-from utils.frames_processor import get_best_frame
+from utils.vlm import call_vlm, call_agent_batch, preload_vlm
+from utils.vlm_service import get_vlm_service
+from utils.frames_processor import best_frame_box, get_best_frame
 from agent.agent import ConfigAgent
 import re
-from utils.save_results import get_presigned_url
-from utils.config import logger,INVENTORY_FILE
+from datetime import datetime
+from utils.save_results import get_presigned_url, get_minio_client
+from utils.config import logger,INVENTORY_FILE,VLM_READY_FILE,ITEM_LATENCY_BUDGET_MS
 from utils.prompts import generate_inventory_prompt
+from utils.inventory_index import build_inventory_index
 from utils.rabbitmq_consumer import ODConsumer
+from utils.latency import LatencyStats
+from utils.metrics import (metrics, start_metrics_exporters,
+                           SPAN_BEST_FRAME, SPAN_PRESIGN, SPAN_AGENT)
 import traceback
-from workload_utils import get_video_name_only
+from workload_utils import get_video_name_only, list_vlm_lanes
 from vlm_metrics_logger import (
     log_start_time, 
     log_end_time, 
@@ -39,13 +50,66 @@ UNDERLINE = "\033[4m"
 RESET = "\033[0m"
 CYAN = "\033[34m"
 RABBITMQ_USER = os.environ.get("RABBITMQ_USER")
+# Agent validation of items not found in inventory: "batched" (one prompt for all
+# items), "parallel" (one request per item through the VLM service) or "serial".
+# Each tier generates one request at a time, so "parallel" only overlaps work
+# when VLM_CONTINUOUS_BATCHING is on
+AGENT_MODE = os.environ.get("AGENT_MODE", "batched").lower()
+# Items validated by the agent at the same time while the pipeline streams
+AGENT_WORKERS = int(os.environ.get("AGENT_WORKERS", "4"))
 RABBITMQ_PASSWORD = os.environ.get("RABBITMQ_PASSWORD")
+# Seconds to wait at startup for the RabbitMQ consumer before signalling readiness anyway
+STARTUP_CONNECT_TIMEOUT_S = float(os.environ.get("STARTUP_CONNECT_TIMEOUT_S", "120"))
 
 vlm_queue = queue.Queue()
 result_queue = queue.Queue()
 od_message_queue = queue.Queue()
 inventory_list = None
-inventory_set = None
+inventory_index = None
+# Set by init_pipeline_components; messages are acked through it once processed
+od_consumer = None
+
+# End-of-stream sentinel: every stage forwards it downstream after its last item
+STREAM_END = "STREAM_END"
+
+# OD receipt → VLM verdict latency (two queue hops plus VLM time)
+item_latency = LatencyStats("item_to_verdict")
+
+
+@dataclass
+class Lane:
+    """
+    Queues and results file of one checkout lane (camera).
+
+    The default lane ("") uses the module-level queues, so a single-lane run
+    behaves exactly as before; with several lp_vlm cameras each lane gets its
+    own queues and results file and the router splits od_message_queue by the
+    lane_id the pipeline puts in every message.
+    """
+    lane_id: str = ""
+    od_queue: queue.Queue = field(default_factory=queue.Queue)
+    vlm_queue: queue.Queue = field(default_factory=queue.Queue)
+    result_queue: queue.Queue = field(default_factory=queue.Queue)
+    results_path: str = COMMON_RESULTS_DIR_FULL_PATH
+    item_latency: LatencyStats = field(default_factory=lambda: LatencyStats("item_to_verdict"))
+    # STREAM_END message of the current run, acked once the whole run is done
+    end_message: dict = None
+
+    @property
+    def label(self):
+        return self.lane_id or "default"
+
+
+DEFAULT_LANE = Lane(od_queue=od_message_queue, vlm_queue=vlm_queue, result_queue=result_queue,
+                    item_latency=item_latency)
+# lane_id -> Lane, filled by init_pipeline_components
+lanes = {"": DEFAULT_LANE}
+
+
+def make_lane(lane_id):
+    """Create a lane with its own queues and results file."""
+    return Lane(lane_id=lane_id, results_path=lane_results_path(lane_id),
+                item_latency=LatencyStats(f"item_to_verdict[{lane_id}]"))
 
 # ============================================================================
 # Helper Function
@@ -78,75 +142,177 @@ def load_json_from_file(file_path):
     except Exception as e:
         logger.error(f"Pipeline Script - Error loading {file_path} file: %s", str(e)+"\n"+traceback.format_exc())
         return f"🤖 Agent: ❌ Failed - Could not load {file_path}"
+
+
+def load_inventory_index():
+    """Load the inventory file once and build its lookup index."""
+    global inventory_index
+    if inventory_index is None:
+        inventory_index = build_inventory_index(load_json_from_file(INVENTORY_FILE))
+    return inventory_index
+
+
+def is_stream_end(payload):
+    """Return True if payload is the end-of-stream sentinel."""
+    return isinstance(payload, dict) and payload.get("msg_type") == STREAM_END
+
+
+def item_deadline(payload):
+    """
+    Wall-clock deadline (epoch seconds) of an object detection message.
+
+    Uses the deadline set by the publisher; messages from a publisher that
+    predates deadlines get their timestamp plus ITEM_LATENCY_BUDGET_MS, or the
+    receipt time plus the budget if the timestamp is missing or unreadable.
+    """
+    deadline = payload.get("deadline")
+    if isinstance(deadline, (int, float)):
+        return float(deadline)
+    try:
+        sent_at = datetime.fromisoformat(payload["timestamp"]).timestamp()
+    except (KeyError, TypeError, ValueError):
+        sent_at = time.time()
+    return sent_at + ITEM_LATENCY_BUDGET_MS / 1000.0
+
+
+def ack_message(payload):
+    """Acknowledge an object detection message to RabbitMQ once it is fully processed."""
+    if od_consumer is not None and payload is not None:
+        od_consumer.ack(payload)
+
+
+def reject_message(payload):
+    """Reject an object detection message whose processing failed, without requeueing it."""
+    if od_consumer is not None and payload is not None:
+        od_consumer.reject(payload)
     
         
 # ============================================================================
 # WORKER THREADS
 # ============================================================================
 
-def vlm_enhancer_consumer():
-    """Consumer thread that processes VLM enhancement requests"""
-    logger.info("Pipeline Script - [vlm_enhancer_consumer] Started")
+def vlm_enhancer_consumer(lane=DEFAULT_LANE):
+    """Consumer thread that dispatches one lane's VLM enhancement requests to the VLM service"""
+    logger.info("Pipeline Script - [vlm_enhancer_consumer] Started for lane %s", lane.label)
+    service = get_vlm_service()
+    in_flight = set()
+    # Notified after a result is on result_queue, so STREAM_END is never put ahead of it
+    in_flight_done = threading.Condition()
+
+    def on_vlm_done(payload, future):
+        valid, result, err_msg = future.result()
+        logger.info("Pipeline Script - VLM Result: %s", result)
+        payload["data"] = {"result": result, "valid": valid, "error": err_msg}
+        lane.result_queue.put(payload)
+        with in_flight_done:
+            in_flight.discard(future)
+            in_flight_done.notify_all()
+
     try:
         while True:
-            payload = vlm_queue.get()
+            payload = lane.vlm_queue.get()
             if isinstance(payload, str):
                 payload = json.loads(payload)
             
-            if payload and "msg_type" in payload and payload["msg_type"] == "STREAM_END":
+            if is_stream_end(payload):
                 logger.info("Pipeline Script - VLM Consumer received end of stream signal")
-                result_queue.put(payload)
+                with in_flight_done:
+                    in_flight_done.wait_for(lambda: not in_flight)
+                logger.info("Pipeline Script - VLM service stats: %s", service.stats())
+                lane.result_queue.put(payload)
                 break
             
             if payload and "data" in payload and len(payload["data"]) > 0:
                 data = payload["data"]
-                logger.info("Pipeline Script - Calling VLM with payload: %s", data)
-                start_time = time.time()
-                logger.info("⏳ [%s] Waiting for VLM call to finish ===", 
-                            time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(start_time)))
-                valid,result,err_msg = call_vlm(data, use_case=data.get("use_case", ""))
-                logger.info("Pipeline Script - VLM Result: %s", result)
-                payload["data"] = {"result": result, "valid": valid, "error": err_msg}
-                result_queue.put(payload)
-            vlm_queue.task_done()
-            
-            #print("⏳ Waiting for VLM call to finish")
+                logger.info("Pipeline Script - Submitting VLM request: %s",
+                            {k: v for k, v in data.items() if k != "image"})
+                future = service.submit(data, use_case=data.get("use_case", ""), lane_id=lane.lane_id,
+                                        deadline=payload.get("deadline"))
+                with in_flight_done:
+                    in_flight.add(future)
+                future.add_done_callback(functools.partial(on_vlm_done, payload))
+            lane.vlm_queue.task_done()
     except Exception as e:
         logger.error("Pipeline Script - VLM Enhancer Consumer Error: %s", str(e))
 
 
+def lane_router():
+    """
+    Route object detection messages from od_message_queue to their lane by lane_id.
+
+    A STREAM_END without a lane_id (sent by a pipeline that predates lanes) ends
+    every lane. Other messages without a lane_id go to the only lane when there
+    is just one. Messages that match no lane are rejected without requeue (so
+    they dead-letter rather than loop) and counted in od_messages_unrouted.
+    Returns once every lane has received its STREAM_END.
+    """
+    logger.info("Pipeline Script - [lane_router] Started for lanes: %s", [lane.label for lane in lanes.values()])
+    open_lanes = set(lanes)
+    while open_lanes:
+        payload = od_message_queue.get()
+        try:
+            if isinstance(payload, str):
+                payload = json.loads(payload)
+            data = payload.get("data") or {}
+            lane_id = str(data.get("lane_id") or "")
+            if is_stream_end(payload) and not lane_id:
+                targets = list(open_lanes)
+            elif lane_id in lanes:
+                targets = [lane_id]
+            elif not lane_id and len(lanes) == 1:
+                targets = list(lanes)
+            else:
+                logger.error("Pipeline Script - [lane_router] Rejecting message for unknown lane '%s' (lanes: %s)",
+                             lane_id, list(lanes))
+                metrics.inc("od_messages_unrouted", lane=lane_id or "none")
+                reject_message(payload)
+                continue
+            for target in targets:
+                lanes[target].od_queue.put(payload)
+                if is_stream_end(payload):
+                    open_lanes.discard(target)
+        except Exception as e:
+            logger.error("Pipeline Script - [lane_router] Error routing message: %s", str(e))
+    logger.info("Pipeline Script - [lane_router] All lanes ended")
+
+
 # ============================================================================
 # DATA STREAM READERS
 # ============================================================================
 
-def read_object_detection_stream():
-    """Generator to read object detection messages from queue"""
+def read_stream(source_queue):
+    """
+    Generator yielding parsed messages from a queue until the end-of-stream sentinel.
+
+    Blocks on queue.get() so each message is handed over as soon as it is put,
+    without polling. The sentinel itself is yielded last.
+    """
     while True:
-        while not od_message_queue.empty():
-            item = od_message_queue.get(timeout=15)
-            yield item
-        time.sleep(0.1)
+        item = source_queue.get()
+        if isinstance(item, str):
+            item = json.loads(item)
+        yield item
+        if is_stream_end(item):
+            return
 
 
-def read_vlm_results_stream():
-    """Generator to read VLM results from queue"""
-    while True:
-        while not result_queue.empty():
-            item = result_queue.get()
-            yield item
-        time.sleep(0.1)
+def read_object_detection_stream(lane=DEFAULT_LANE):
+    """Generator to read a lane's object detection messages from queue"""
+    return read_stream(lane.od_queue)
+
+
+def read_vlm_results_stream(lane=DEFAULT_LANE):
+    """Generator to read a lane's VLM results from queue"""
+    return read_stream(lane.result_queue)
 
 
 # ============================================================================
 # OBJECT DETECTION PIPELINE
 # ============================================================================
 
-def process_object_detection_results(video_file, use_case):
-    """Process object detection results and prepare for VLM enhancement"""
-    global result_queue, vlm_queue, inventory_list,inventory_set
-    if not inventory_list:
-        inventory_list = load_json_from_file(INVENTORY_FILE)
-        inventory_set = set(item.strip().lower() for item in inventory_list)
+def process_object_detection_results(video_file, use_case, lane=DEFAULT_LANE):
+    """Process a lane's object detection results and prepare for VLM enhancement"""
+    inventory = load_inventory_index()
     if video_file is None:
         logger.error("Pipeline Script - No video file provided for processing")
         yield "📹 Object Detection: ❌ Failed - No video uploaded", {}
@@ -156,42 +322,58 @@ def process_object_detection_results(video_file, use_case):
         # Process streaming results
         best_frames = defaultdict(dict)
         ui_items = []
-        for payload in read_object_detection_stream():
+        for payload in read_object_detection_stream(lane):
+            # Acked here unless handed on to the VLM stage, which acks it after agent validation
+            handed_off = False
             try:
-                if isinstance(payload, str):
-                    payload = json.loads(payload)
-                
-                if payload and "msg_type" in payload and payload["msg_type"] == "STREAM_END":
+                if is_stream_end(payload):
                     logger.info("Pipeline Script - Object Detection stream ended")
+                    lane.end_message = payload
+                    handed_off = True
                     break
                 
                 if not payload or not "data" in payload or not len(payload["data"]) > 0:
                     continue
+                payload["received_at"] = time.monotonic()
+                payload["deadline"] = item_deadline(payload)
                 data = payload["data"]
                 item = data.get("item_name")
                 frame_names = data.get("frames", [])
                 #print("\n\nDATA:",data)
                 
-                if item in  inventory_set:
+                if inventory is not None and inventory.contains(item):
                     print(f"✅ Item found {BOLD}{CYAN}{item}{RESET} in inventory, ❌ skipping VLM call and best frame selection call")
                     logger.info("Pipeline Script - Item '%s' found in inventory, skipping VLM", item)
                     ui_items.append({"item_name":item,"match":True})
-                    result_queue.put({"item_name": item})
+                    lane.result_queue.put({"item_name": item})
+                    yield "📹 Object Detection: ⚡ Running", {"od_results": list(ui_items)}
                     continue
-                import time
 
                 log_start_time("USECASE_1")
 
-                # compute time to get best frame
-                best_frame, score = get_best_frame(frame_names, bucket_name=data.get("bucket", ""))
+                # compute time to get best frame; keep the decoded frame for the VLM stage
+                with metrics.span(SPAN_BEST_FRAME, lane=lane.label):
+                    best_frame, score, best_image = get_best_frame(frame_names, bucket_name=data.get("bucket", ""),
+                                                                   return_image=True,
+                                                                   frame_signals=data.get("frame_signals"),
+                                                                   frame_slots=data.get("frame_slots"),
+                                                                   frame_ring=data.get("frame_ring"))
+                if best_image is None:
+                    # Neither the ring nor MinIO had the frames; reject so the loss is visible in the broker
+                    logger.error("Pipeline Script - No usable frame for item %s, rejecting its message", item)
+                    metrics.inc("items_without_frame", lane=lane.label)
+                    reject_message(payload)
+                    handed_off = True
+                    continue
                 
                 print(f"🏆 Best frame for {BOLD}{CYAN}{item}{RESET}: {os.path.basename(best_frame)} | Stability score: {score:.4f}")
 
-                presigned_url = get_presigned_url(best_frame, bucket_name=data.get("bucket", ""))
+                # Presigned URL is only for UI/reporting; the VLM gets the decoded frame directly
+                with metrics.span(SPAN_PRESIGN, lane=lane.label):
+                    presigned_url = get_presigned_url(best_frame, bucket_name=data.get("bucket", ""))
                 
                 if not presigned_url:
                     logger.warning("Pipeline Script - Could not generate presigned URL for frame: %s", best_frame)
-                    continue
                 
                 best_frames[item] = {
                     "best_frame": presigned_url,
@@ -199,18 +381,26 @@ def process_object_detection_results(video_file, use_case):
                 }
                 item_rec = {"item_name":item,"match":False}
                 ui_items.append(item_rec)
-                dynamic_prompt = generate_inventory_prompt(item, inventory_list)
-                enhancer_payload = {"presigned_url": presigned_url, "use_case": use_case, "dynamic_prompt": dynamic_prompt}
+                dynamic_prompt = generate_inventory_prompt(item, inventory)
+                enhancer_payload = {"image": best_image, "presigned_url": presigned_url, "use_case": use_case,
+                                    "dynamic_prompt": dynamic_prompt, "detected_label": item,
+                                    "object_box": best_frame_box(frame_names, data.get("frame_signals"), best_frame)}
                 payload["data"] = enhancer_payload
 
-                vlm_queue.put(payload)
-                logger.info("Pipeline Script - Sent to VLM queue: %s", enhancer_payload)
+                lane.vlm_queue.put(payload)
+                handed_off = True
+                logger.info("Pipeline Script - Sent to VLM queue: best_frame=%s, presigned_url=%s",
+                            best_frame, presigned_url)
+                yield "📹 Object Detection: ⚡ Running", {"od_results": list(ui_items)}
 
         
             except Exception as e:
                 logger.error("Pipeline Script - Error processing OD payload: %s", str(e))
                 continue
-        write_json_to_file({"od_results": ui_items}, COMMON_RESULTS_DIR_FULL_PATH)
+            finally:
+                if not handed_off:
+                    ack_message(payload)
+        write_json_to_file({"od_results": ui_items}, lane.results_path)
         yield "📹 Object Detection: ✅ Completed", {"od_results": ui_items}
 
     except Exception as e:
@@ -222,43 +412,47 @@ def process_object_detection_results(video_file, use_case):
 # VLM ENHANCEMENT PIPELINE
 # ============================================================================
 
-def process_vlm_enhancement():
-    """Process VLM enhancement results from the result queue"""
-    global inventory_list, inventory_set
-    if not inventory_list:
-        inventory_list = load_json_from_file(INVENTORY_FILE)
-        inventory_set = set(item.strip().lower() for item in inventory_list)
+def process_vlm_enhancement(lane=DEFAULT_LANE):
+    """
+    Process a lane's VLM enhancement results from its result queue.
+
+    Yields (status, results, payload) where payload is the object detection
+    message the results belong to (None for status-only updates), so the
+    caller can ack it once the results are fully processed, or reject it when
+    the status reports a failure.
+    """
+    inventory = load_inventory_index()
     try:
-        for payload in read_vlm_results_stream():
-            if isinstance(payload, str):
-                    payload = json.loads(payload)
-            if payload and "msg_type" in payload and payload["msg_type"] == "STREAM_END":
+        for payload in read_vlm_results_stream(lane):
+            if is_stream_end(payload):
                 logger.info("Pipeline Script - VLM enhancement stream ended")
                 break
             
             if payload and "data" in payload and len(payload["data"]) > 0:
                 data = payload["data"]
+                if "received_at" in payload:
+                    lane.item_latency.record(time.monotonic() - payload["received_at"])
 
                 if "error" in data and data["error"]:
                     logger.error("Pipeline Script - VLM enhancement error: %s", data["error"])
-                    yield "🤖 VLM Enhancement: ❌ Failed - " + data["error"], []
+                    yield "🤖 VLM Enhancement: ❌ Failed - " + data["error"], [], payload
                     return
                 final_result = data.get("result", [])
                 if final_result and len(final_result)>0:
                     for result in final_result:
-                        item_name = result.get("item_name","").strip().lower()
-                        if item_name in inventory_set:
+                        item_name = result.get("item_name","")
+                        if inventory is not None and inventory.contains(item_name):
                             result["match"] = True
                         else:
                             result["match"] = False
                 logger.info("Pipeline Script - VLM enhancement result: %s", final_result)
-                yield "🤖 VLM Enhancement: ⚡ Running", final_result
-        time.sleep(0.5)  # Ensure all processing is done
-        yield "🤖 VLM Enhancement: ✅ Completed", []
+                yield "🤖 VLM Enhancement: ⚡ Running", final_result, payload
+        logger.info("Pipeline Script - Item-to-verdict latency (lane %s): %s", lane.label, lane.item_latency.summary())
+        yield "🤖 VLM Enhancement: ✅ Completed", [], None
     
     except Exception as e:
         logger.error("Pipeline Script - Error in VLM enhancement processing: %s", str(e))
-        yield f"🤖 VLM Enhancement: ❌ Failed - {str(e)}", []
+        yield f"🤖 VLM Enhancement: ❌ Failed - {str(e)}", [], None
         return 
 
 
@@ -266,57 +460,184 @@ def process_vlm_enhancement():
 # MAIN PIPELINE ORCHESTRATION
 # ============================================================================
 
-def execute_loss_prevention_pipeline(video_file):
-    """Main orchestration function for the entire pipeline"""
+def _run_od_stage(video_file, use_case, events, lane=DEFAULT_LANE):
+    """Stream object detection updates into events, then close the lane's VLM stream."""
+    try:
+        for od_status, od_results in process_object_detection_results(video_file, use_case, lane):
+            events.put(("od", od_status, od_results))
+            if "❌ Failed" in od_status:
+                break
+    except Exception as e:
+        logger.error("Pipeline Script - Object detection stage error: %s", str(e))
+        events.put(("od", f"📹 Object Detection: ❌ Failed - {str(e)}", {}))
+    finally:
+        # No more VLM work will be queued; lets the VLM stage drain and finish
+        lane.vlm_queue.put({"msg_type": STREAM_END, "data": {}})
+        events.put(("od_end",))
+
+
+def _run_vlm_stage(events, agent_pool, lane=DEFAULT_LANE):
+    """
+    Stream VLM results into events and start agent validation for each new item.
+
+    New items wait in a backlog; whenever an agent worker is free, everything
+    in the backlog goes to it as one agent_validate_all call, so AGENT_MODE
+    "batched" can put several items into one prompt under load. The object
+    detection message behind each result is acked once agent validation of
+    all its new items has finished.
+    """
+    seen_items = set()
+    agents = {"lock": threading.Lock(), "backlog": [], "busy": 0}
+    max_busy = max(1, AGENT_WORKERS)
+
+    def take_batch_locked():
+        # Everything queued goes to the next free worker; None if none is free
+        if not agents["backlog"] or agents["busy"] >= max_busy:
+            return None
+        batch, agents["backlog"] = agents["backlog"], []
+        agents["busy"] += 1
+        return batch
+
+    def start_batch(batch):
+        if batch is None:
+            return
+        deadlines = [pending["deadline"] for _, pending in batch if pending["deadline"] is not None]
+        try:
+            future = agent_pool.submit(agent_validate_all, [record for record, _ in batch],
+                                       lane_id=lane.lane_id, deadline=min(deadlines) if deadlines else None)
+        except Exception as e:
+            logger.error("Pipeline Script - [agent_call] Could not start agent validation: %s", str(e))
+            finish_batch(batch, [])
+            return
+        future.add_done_callback(functools.partial(on_agent_done, batch))
+
+    def on_agent_done(batch, future):
+        try:
+            agent_result = future.result()
+        except Exception as e:
+            logger.error("Pipeline Script - [agent_call] Error in agent call: %s", str(e))
+            agent_result = []
+        finish_batch(batch, agent_result)
+
+    def finish_batch(batch, agent_result):
+        log_end_time("USECASE_1")
+        events.put(("agent", agent_result, len(batch)))
+        with agents["lock"]:
+            agents["busy"] -= 1
+            next_batch = take_batch_locked()
+        for _, pending in batch:
+            with pending["lock"]:
+                pending["count"] -= 1
+                done = pending["count"] == 0
+            if done:
+                ack_message(pending["payload"])
+        start_batch(next_batch)
+
+    try:
+        for vlm_status, vlm_results, payload in process_vlm_enhancement(lane):
+            new_records = []
+            for record in vlm_results:
+                item_name = record.get("item_name")
+                if item_name not in seen_items:
+                    seen_items.add(item_name)
+                    new_records.append(record)
+            # Register the agent work before publishing the results, so the
+            # orchestrator never sees the VLM stage done with agents unaccounted
+            # for; from here every record reaches finish_batch, even if the
+            # pool refuses the work, so the count always drains
+            events.put(("agent_submitted", len(new_records)))
+            if new_records:
+                pending = {"payload": payload, "count": len(new_records), "lock": threading.Lock(),
+                           "deadline": payload.get("deadline") if payload else None}
+                with agents["lock"]:
+                    agents["backlog"].extend((record, pending) for record in new_records)
+                    batch = take_batch_locked()
+            events.put(("vlm", vlm_status, vlm_results))
+            if "❌ Failed" in vlm_status:
+                reject_message(payload)
+                continue
+            if not new_records:
+                ack_message(payload)
+                continue
+            start_batch(batch)
+    except Exception as e:
+        logger.error("Pipeline Script - VLM stage error: %s", str(e))
+        events.put(("vlm", f"🤖 VLM Enhancement: ❌ Failed - {str(e)}", []))
+    finally:
+        events.put(("vlm_end",))
+
+
+def execute_loss_prevention_pipeline(video_file, lane=DEFAULT_LANE):
+    """
+    Main orchestration function for the entire pipeline of one lane.
+
+    Object detection, VLM enhancement and agent validation run as a streaming
+    pipeline: each item moves on to the VLM as soon as its best frame is
+    picked, and to agent validation as soon as its VLM result arrives. Every
+    stage update is yielded right away as an
+    (od_status, od_results, vlm_status, vlm_results, agent_status, agent_results) tuple.
+    """
     try:
         if video_file is None:
             logger.error("Pipeline Script - No video file uploaded")
             yield "📹 Object Detection: ❌ Failed - No video uploaded", {}, "🤖 VLM Enhancement: ⏳ Pending", [], "🤖 Agent: ⏳ Pending", []
             return
         
-        # Phase 1: Object Detection
-        od_completed = False
-        final_od_status = ""
-        final_od_results = {}
-        final_vlm_results = []
         use_case = os.path.splitext(video_file)[0].lower()
-        for od_status, od_results in process_object_detection_results(video_file, use_case):
-            final_od_status = od_status
-            final_od_results = od_results
-            yield od_status, od_results, "🤖 VLM Enhancement: ⏳ Pending", [], "🤖 Agent: ⏳ Pending", []
-            
-            if "❌ Failed" in od_status:
-                logger.error("Pipeline Script - Object detection failed, skipping VLM")
-                yield od_status, od_results, "🤖 VLM Enhancement: ❌ Skipped", [], "🤖 Agent: ❌ Skipped", []
-                return
-            
-            if "✅" in od_status and "Completed" in od_status:
-                od_completed = True
-                yield "📹 Object Detection: ✅ Completed", final_od_results, "🤖 VLM Enhancement: ⚡ Running", [], "🤖 Agent: ⏳ Pending", []
-        
-        # Phase 2: VLM Enhancement
-        vlm_queue.put({"msg_type": "STREAM_END", "data": {}})
-        
-        for vlm_status, vlm_results in process_vlm_enhancement():
-            final_vlm_results.extend(vlm_results)
-            unique_results = list({d['item_name']: d for d in final_vlm_results}.values())
-            yield "📹 Object Detection: ✅ Completed", final_od_results, vlm_status, unique_results, "🤖 Agent: ⏳ Pending", []
+        events = queue.Queue()
+        agent_pool = ThreadPoolExecutor(max_workers=max(1, AGENT_WORKERS), thread_name_prefix="agent")
+        try:
+            threading.Thread(target=_run_od_stage, args=(video_file, use_case, events, lane),
+                             name=f"od-stage-{lane.label}", daemon=True).start()
+            threading.Thread(target=_run_vlm_stage, args=(events, agent_pool, lane),
+                             name=f"vlm-stage-{lane.label}", daemon=True).start()
         
-        write_json_to_file({"vlm_results":unique_results}, COMMON_RESULTS_DIR_FULL_PATH)
+            od_status, od_results = "📹 Object Detection: ⚡ Running", {}
+            vlm_status, agent_status = "🤖 VLM Enhancement: ⏳ Pending", "🤖 Agent: ⏳ Pending"
+            vlm_results, agent_results = [], []
+            od_done = vlm_done = False
+            agents_pending = 0
         
+            while not (od_done and vlm_done and agents_pending == 0):
+                event = events.get()
+                kind = event[0]
+                if kind == "od":
+                    od_status, od_results = event[1], event[2]
+                    if "❌ Failed" in od_status:
+                        logger.error("Pipeline Script - Object detection failed, skipping VLM")
+                        yield od_status, od_results, "🤖 VLM Enhancement: ❌ Skipped", [], "🤖 Agent: ❌ Skipped", []
+                        return
+                elif kind == "od_end":
+                    od_done = True
+                    continue
+                elif kind == "vlm":
+                    vlm_status = event[1]
+                    if "❌ Failed" in vlm_status:
+                        yield od_status, od_results, vlm_status, vlm_results, "🤖 Agent: ❌ Skipped", agent_results
+                        return
+                    vlm_results = list({d['item_name']: d for d in vlm_results + event[2]}.values())
+                    if agents_pending:
+                        agent_status = "🤖 Agent: ⚡ Running"
+                elif kind == "vlm_end":
+                    vlm_done = True
+                    write_json_to_file({"vlm_results": vlm_results}, lane.results_path)
+                    continue
+                elif kind == "agent_submitted":
+                    agents_pending += event[1]
+                    continue
+                elif kind == "agent":
+                    agents_pending -= event[2]
+                    agent_results.extend(event[1])
+                    agent_status = "🤖 Agent: ⚡ Running"
+                yield od_status, od_results, vlm_status, vlm_results, agent_status, agent_results
+        finally:
+            # Also on the early returns above and when the caller stops iterating
+            agent_pool.shutdown(wait=False)
         
-        yield "📹 Object Detection: ✅ Completed", final_od_results, "🤖 VLM Enhancement: ✅ Completed", unique_results, "🤖 Agent: ⚡ Running", []
-        
-        agent_results = []
-        # Phase 3: Agent Call for inventory validation
-        for record in unique_results:
-            agent_status, agent_result = agent_call(record)
-            if agent_status:
-                agent_results.extend(agent_result)
-            log_end_time("USECASE_1")
-        write_json_to_file({"agent_results":agent_results}, COMMON_RESULTS_DIR_FULL_PATH)
+        write_json_to_file({"agent_results": agent_results}, lane.results_path)
+        ack_message(lane.end_message)
         
-        yield "🧠 Decision Agent: ✅ Completed", final_od_results, "🤖 VLM Enhancement: ✅ Completed", unique_results, "🤖 Agent: ✅ Completed", agent_results
+        yield "🧠 Decision Agent: ✅ Completed", od_results, "🤖 VLM Enhancement: ✅ Completed", vlm_results, "🤖 Agent: ✅ Completed", agent_results
         
     except Exception as e:
         error_message = f"Pipeline Error: {str(e)}"
@@ -339,20 +660,14 @@ def agent_call(item, use_case="decision_agent"):
     Returns:
         tuple: (status_message, updated_results)
     """
-    global inventory_list, inventory_set
-    
     try:
         logger.info(f"Pipeline Script - [agent_call] Starting inventory validation {item}")
         
-        if inventory_list is None:
-            inventory_list = load_json_from_file(INVENTORY_FILE)
-            inventory_set = set(item.strip().lower() for item in inventory_list)
-        
-
+        inventory = load_inventory_index()
         
         item_name = item.get("item_name", "").strip().lower()
             
-        if item_name in inventory_set:
+        if inventory is not None and inventory.contains(item_name):
             logger.info(f"Pipeline Script - [agent_call] Item '{item_name}' found in inventory")
             return True,[item]
         
@@ -364,105 +679,313 @@ def agent_call(item, use_case="decision_agent"):
             "items": item_name,
             "use_case": use_case
         }       
-        valid, vlm_validation_result, err_msg = call_vlm(vlm_data, use_case=use_case)
-        logger.info(f"Pipeline Script - [agent_call] result - {vlm_validation_result}-{valid}-{err_msg}")
-        
-        if not valid or err_msg or vlm_validation_result and not isinstance(vlm_validation_result, list):
-            logger.error(f"Pipeline Script - [agent_call] VLM validation failed for item_name {item_name}: %s", err_msg)
-            return False, []
-        # Process VLM validation results
-        logger.info("Pipeline Script - [agent_call] Agent validation completed. Item: %d, Validated: %d", 
-                    item_name, vlm_validation_result)
-        return True, vlm_validation_result
+        return agent_verdict(item_name, *call_vlm(vlm_data, use_case=use_case))
         
     except Exception as e:
         logger.error("Pipeline Script - [agent_call] Error in agent call: %s", str(e))
         logger.error(traceback.format_exc())
         return False, []
+
+
+def agent_verdict(item_name, valid, vlm_validation_result, err_msg):
+    """
+    Turn a decision_agent VLM response into agent_call's (status, results) tuple.
+    """
+    logger.info(f"Pipeline Script - [agent_call] result - {vlm_validation_result}-{valid}-{err_msg}")
+    
+    if not valid or err_msg or vlm_validation_result and not isinstance(vlm_validation_result, list):
+        logger.error(f"Pipeline Script - [agent_call] VLM validation failed for item_name {item_name}: %s", err_msg)
+        return False, []
+    # Process VLM validation results
+    logger.info("Pipeline Script - [agent_call] Agent validation completed. Item: %s, Validated: %s", 
+                item_name, vlm_validation_result)
+    return True, vlm_validation_result
+
+
+@metrics.timed(SPAN_AGENT)
+def agent_validate_all(records, use_case="decision_agent", mode=AGENT_MODE, lane_id="", deadline=None):
+    """
+    Validate all VLM results against the inventory, calling the VLM for unmatched items.
+    
+    Unmatched items are validated concurrently through the VLM service
+    ("parallel"), with one batched decision_agent prompt whose answer is split
+    per item ("batched", falling back to "parallel" for items missing from the
+    answer), or one after another ("serial").
+    
+    Args:
+        records: VLM enhancement results ({"item_name": ...} dicts)
+        use_case: The use case for the agent VLM calls
+        mode: "parallel", "batched" or "serial"
+        lane_id: Lane the items come from, for fair scheduling on the VLM service
+        deadline: Verdict deadline (epoch seconds) of the items, for deadline
+            scheduling on the VLM service
+    
+    Returns:
+        list: Agent results, in record order
+    """
+    if mode == "serial":
+        verdicts = [agent_call(record, use_case) for record in records]
+        return [result for ok, results in verdicts if ok for result in results]
+    
+    inventory = load_inventory_index()
+    verdicts = [None] * len(records)
+    unmatched = []
+    for index, record in enumerate(records):
+        item_name = record.get("item_name", "").strip().lower()
+        if inventory is not None and inventory.contains(item_name):
+            logger.info(f"Pipeline Script - [agent_call] Item '{item_name}' found in inventory")
+            verdicts[index] = (True, [record])
+        else:
+            unmatched.append((index, item_name))
+    logger.info("Pipeline Script - [agent_call] %d of %d items need VLM validation (%s)",
+                len(unmatched), len(records), mode)
+    
+    if mode == "batched" and len(unmatched) > 1:
+        batched = call_agent_batch([name for _, name in unmatched])
+        remaining = []
+        for (index, item_name), result in zip(unmatched, batched):
+            if result is None:
+                remaining.append((index, item_name))
+            else:
+                verdicts[index] = agent_verdict(item_name, True, result, "")
+        if remaining:
+            logger.info("Pipeline Script - [agent_call] %d items missing from batched answer, validating individually",
+                        len(remaining))
+        unmatched = remaining
+    
+    service = get_vlm_service()
+    futures = [(index, item_name, service.submit({"items": item_name, "use_case": use_case},
+                                                 use_case=use_case, lane_id=lane_id, deadline=deadline))
+               for index, item_name in unmatched]
+    for index, item_name, future in futures:
+        try:
+            verdicts[index] = agent_verdict(item_name, *future.result())
+        except Exception as e:
+            logger.error("Pipeline Script - [agent_call] Error in agent call: %s", str(e))
+            verdicts[index] = (False, [])
+    
+    return [result for ok, results in verdicts if ok for result in results]
+
+
 # ============================================================================
 # INITIALIZATION
 # ============================================================================
 
 # Initialize all queues and consumers
-def init_pipeline_components():
-    """Initialize all necessary components for the pipeline"""
-    global vlm_queue, result_queue, od_message_queue
+def init_pipeline_components(lane_ids=None):
+    """
+    Initialize all necessary components for the pipeline.
+
+    Args:
+        lane_ids: camera_ids of the lp_vlm lanes; with more than one, each lane
+                  gets its own queues and VLM consumer and a router splits the
+                  object detection stream between them
+
+    Returns:
+        tuple: (od_consumer, list of VLM enhancer threads)
+    """
+    lane_ids = [lane_id for lane_id in (lane_ids or []) if lane_id]
+    if len(lane_ids) > 1:
+        lanes.clear()
+        lanes.update({lane_id: make_lane(lane_id) for lane_id in lane_ids})
+        threading.Thread(target=lane_router, name="lane-router", daemon=True).start()
         
+    # Queue depth gauges, read at scrape time
+    metrics.gauge("queue_depth", od_message_queue.qsize, queue="od_message_queue")
+    for lane in lanes.values():
+        metrics.gauge("queue_depth", lane.vlm_queue.qsize, queue="vlm_queue", lane=lane.label)
+        metrics.gauge("queue_depth", lane.result_queue.qsize, queue="result_queue", lane=lane.label)
+        if lane.od_queue is not od_message_queue:
+            metrics.gauge("queue_depth", lane.od_queue.qsize, queue="od_queue", lane=lane.label)
+    
     # Object Detection Consumer
+    global od_consumer
     od_consumer = ODConsumer(od_message_queue,RABBITMQ_USER,RABBITMQ_PASSWORD)
     od_consumer.start_consumer()
     
-    # VLM Enhancer Consumer
-    vlm_enhancer_thread = threading.Thread(target=vlm_enhancer_consumer)
-    vlm_enhancer_thread.start()
+    # VLM Enhancer Consumers, one per lane
+    vlm_enhancer_threads = []
+    for lane in lanes.values():
+        vlm_enhancer_thread = threading.Thread(target=vlm_enhancer_consumer, args=(lane,),
+                                               name=f"vlm-enhancer-{lane.label}")
+        vlm_enhancer_thread.start()
+        vlm_enhancer_threads.append(vlm_enhancer_thread)
     
-    return od_consumer, vlm_enhancer_thread
+    return od_consumer, vlm_enhancer_threads
 
-def main(video_file_name=None):
-    """Main function to execute the loss prevention pipeline"""    
-    if video_file_name is None:
-        camera_stream = os.getenv("CAMERA_STREAM")
-        logger.info("Pipeline Script - camera_stream file name===: %s", camera_stream)
-        if not camera_stream:
-            raise RuntimeError("CAMERA_STREAM environment variable is not set")
 
-        camera_config_path = f"/app/lp/configs/{camera_stream}"
-        video_file_name = get_video_name_only(camera_config_path)
-    
+def clear_ready_signal():
+    """Remove a readiness file left over from a previous run."""
+    try:
+        os.remove(VLM_READY_FILE)
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        logger.warning("Pipeline Script - Could not remove stale ready file %s: %s", VLM_READY_FILE, str(e))
+
+
+def write_ready_signal(vlm_loaded):
+    """Write the readiness file that vlm_od_pipeline.sh waits for before starting object detection."""
+    try:
+        os.makedirs(os.path.dirname(VLM_READY_FILE), exist_ok=True)
+        with open(VLM_READY_FILE, "w") as f:
+            json.dump({"ready_at": time.time(), "vlm_loaded": vlm_loaded}, f)
+        logger.info("Pipeline Script - Ready signal written: %s", VLM_READY_FILE)
+    except Exception as e:
+        logger.error("Pipeline Script - Could not write ready file %s: %s", VLM_READY_FILE, str(e))
+
+
+def start_pipeline():
+    """
+    Start-up phase: load and warm up the VLM while the RabbitMQ consumer and
+    MinIO client connect, then signal readiness.
+
+    Returns:
+        tuple: (od_consumer, VLM enhancer threads, lane_streams or None)
+    """
+    clear_ready_signal()
+    atexit.register(clear_ready_signal)
+    start_metrics_exporters()
+    started = time.perf_counter()
+    preload_result = {}
+    preload_thread = threading.Thread(target=lambda: preload_result.update(loaded=preload_vlm()),
+                                      name="vlm-preload", daemon=True)
+    preload_thread.start()
     
-    logger.info("Pipeline Script - STREAM_NAME:======== %s", video_file_name)
+    # Several lp_vlm cameras share this consumer
+    configured_lanes = get_configured_lanes()
+    lane_streams = ({lane["lane_id"]: lane["stream_name"] for lane in configured_lanes}
+                    if len(configured_lanes) > 1 else None)
+    consumer, vlm_enhancer_threads = init_pipeline_components(list(lane_streams or []))
+    try:
+        get_minio_client()
+    except Exception as e:
+        logger.error("Pipeline Script - MinIO client setup failed: %s", str(e))
+    if not consumer.connected.wait(STARTUP_CONNECT_TIMEOUT_S):
+        logger.warning("Pipeline Script - RabbitMQ consumer not connected after %.0f s", STARTUP_CONNECT_TIMEOUT_S)
     
-    global od_results_shown, od_pipeline_status, vlm_pipeline_status
+    preload_thread.join()
+    logger.info("Pipeline Script - Startup finished in %.2f s (VLM loaded: %s)",
+                time.perf_counter() - started, preload_result.get("loaded", False))
+    write_ready_signal(preload_result.get("loaded", False))
+    return consumer, vlm_enhancer_threads, lane_streams
+
+
+def get_camera_config_path():
+    """Return the mounted camera config path from CAMERA_STREAM."""
+    camera_stream = os.getenv("CAMERA_STREAM")
+    logger.info("Pipeline Script - camera_stream file name===: %s", camera_stream)
+    if not camera_stream:
+        raise RuntimeError("CAMERA_STREAM environment variable is not set")
+    return f"/app/lp/configs/{camera_stream}"
+
+
+def get_configured_lanes():
+    """Return the lp_vlm lanes of the camera config, or [] if they cannot be read."""
+    try:
+        return list_vlm_lanes(get_camera_config_path())
+    except Exception as e:
+        logger.error("Pipeline Script - Could not read lp_vlm lanes: %s", str(e))
+        return []
+
+
+def run_lane(video_file_name, lane=DEFAULT_LANE):
+    """Run the pipeline of one lane, printing stage updates; returns the final step tuple."""
+    logger.info("Pipeline Script - STREAM_NAME:======== %s (lane %s)", video_file_name, lane.label)
+    prefix = f"[{lane.lane_id}] " if lane.lane_id else ""
     
+    od_results_shown = od_pipeline_status = vlm_pipeline_status = False
     agent_pipeline_status = False
+    vlm_results_shown = False
     
-    for step in execute_loss_prevention_pipeline(video_file_name):
+    for step in execute_loss_prevention_pipeline(video_file_name, lane):
         od_status, od_results, vlm_status, vlm_results, agent_status, agent_results = step
         
         # Print status updates
         if "pending" not in od_status.replace(" ","").lower() and not od_pipeline_status:
-            print(f"{od_status}")
+            print(f"{prefix}{od_status}")
             od_pipeline_status = True
         if "pending" not in vlm_status.replace(" ","").lower() and not vlm_pipeline_status:
-            print(f"{vlm_status}")
+            print(f"{prefix}{vlm_status}")
             vlm_pipeline_status = True
         if "pending" not in agent_status.replace(" ","").lower() and not agent_pipeline_status:
-            print(f"{agent_status}")
+            print(f"{prefix}{agent_status}")
             agent_pipeline_status = True
         
         # Log the pipeline step
-        logger.info("Pipeline Script - Pipeline Step: OD=%s, VLM=%s, Agent=%s", od_status, vlm_status, agent_status)
+        logger.info("Pipeline Script - Pipeline Step (lane %s): OD=%s, VLM=%s, Agent=%s",
+                    lane.label, od_status, vlm_status, agent_status)
         
         # Check and display Object Detection completion
         if "✅" in od_status and "Completed" in od_status and not od_results_shown:
             logger.info("Pipeline Script - Object Detection COMPLETED")
             logger.info("Pipeline Script - Object Detection Results: %s", od_results)
-            print(f"{od_status}")
-            print(f"📹 Object Detection Results:\n{json.dumps(od_results, indent=2)}\n\n")
+            print(f"{prefix}{od_status}")
+            print(f"{prefix}📹 Object Detection Results:\n{json.dumps(od_results, indent=2)}\n\n")
             od_results_shown = True
         
         # Check and display VLM Enhancement completion
-        if "✅" in vlm_status and "Completed" in vlm_status:
+        if "✅" in vlm_status and "Completed" in vlm_status and not vlm_results_shown:
+            vlm_results_shown = True
             logger.info("Pipeline Script - VLM Enhancement COMPLETED")
             logger.info("Pipeline Script - VLM Enhancement Results: %s", vlm_results)
-            print(f"{vlm_status}")
-            print(f"🤖 VLM Enhancement Results:\n{json.dumps(vlm_results, indent=2)}\n\n")
+            print(f"{prefix}{vlm_status}")
+            print(f"{prefix}🤖 VLM Enhancement Results:\n{json.dumps(vlm_results, indent=2)}\n\n")
         
         # Check and display Agent completion
         if "✅" in agent_status and "completed" in agent_status.lower():
             logger.info("Pipeline Script - Agent COMPLETED")
             logger.info("Pipeline Script - Agent Results: %s", agent_results)
-            print(f"{agent_status}")
-            print(f"🤖 Agent Results:\n{json.dumps(agent_results, indent=2)}")
+            print(f"{prefix}{agent_status}")
+            print(f"{prefix}🤖 Agent Results:\n{json.dumps(agent_results, indent=2)}")
         
         # Break on any failures
         if "❌" in od_status or "Failed" in od_status or "❌" in vlm_status or "Failed" in vlm_status or "❌" in agent_status or "Failed" in agent_status:
-            logger.error(f"Pipeline Script - Pipeline failed at step: OD=%s, VLM=%s, Agent=%s", od_status, vlm_status, agent_status)
+            logger.error(f"Pipeline Script - Pipeline failed at step (lane %s): OD=%s, VLM=%s, Agent=%s",
+                         lane.label, od_status, vlm_status, agent_status)
             break
     
     return od_status, od_results, vlm_status, vlm_results, agent_status, agent_results
 
 
+def main(video_file_name=None, lane_streams=None):
+    """
+    Main function to execute the loss prevention pipeline.
+
+    Args:
+        video_file_name: Stream name of a single-lane run (read from the camera config if None)
+        lane_streams: lane_id -> stream name; when given, every lane runs
+                      concurrently on the shared VLM service
+
+    Returns:
+        The final (od_status, od_results, vlm_status, vlm_results, agent_status, agent_results)
+        tuple, or with lane_streams a dict of such tuples keyed by lane_id
+    """
+    if lane_streams:
+        results = {}
+        
+        def run(lane_id, stream_name):
+            try:
+                results[lane_id] = run_lane(stream_name, lanes[lane_id])
+            except Exception as e:
+                logger.error("Pipeline Script - Lane %s failed: %s", lane_id, str(e))
+                logger.error(traceback.format_exc())
+                failed = f"❌ Failed - {str(e)}"
+                results[lane_id] = (failed, {}, failed, [], failed, [])
+        
+        threads = [threading.Thread(target=run, args=(lane_id, stream_name), name=f"lane-{lane_id}")
+                   for lane_id, stream_name in lane_streams.items()]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results
+    
+    if video_file_name is None:
+        video_file_name = get_video_name_only(get_camera_config_path())
+    return run_lane(video_file_name)
+
+
 if __name__ == "__main__":
     # Check if VLM workload is enabled
     vlm_workload_enabled = os.environ.get("VLM_WORKLOAD_ENABLED", "0")
@@ -474,37 +997,42 @@ if __name__ == "__main__":
     
     logger.info("VLM_WORKLOAD_ENABLED is set to 1. Starting pipeline...")
     
-    # Initialize pipeline components
-    od_consumer, vlm_enhancer_thread = init_pipeline_components()
-    od_results_shown, od_pipeline_status, vlm_pipeline_status = False, False, False
+    # Initialize pipeline components while the VLM loads
+    od_consumer, vlm_enhancer_threads, lane_streams = start_pipeline()
     print("\n================ START OF PIPELINE RUN =================\n")
     
-    result = main() 
+    result = main(lane_streams=lane_streams)
     print(f"\n{'='*60}\nFinal Pipeline Results:\n{'='*60}")
     
-    # Check if pipeline was successful
-    od_status, od_results, vlm_status, vlm_results, agent_status, agent_results = result
-    
-    pipeline_successful = (
-        "✅" in od_status and "Completed" in od_status and
-        "✅" in vlm_status and "Completed" in vlm_status and
-        "✅" in agent_status and "completed" in agent_status.lower()
-    )
-    
-    if pipeline_successful:
-        print(f"✅ Pipeline executed successfully!\n")
-        print(f"OD Status: {od_status}")
-        print(f"OD Results: {json.dumps(od_results, indent=2)}")
-        print(f"\nVLM Status: {vlm_status}")
-        print(f"VLM Results: {json.dumps(vlm_results, indent=2)}")
-        print(f"\nAgent Status: {agent_status}")
-        print(f"Agent Results: {json.dumps(agent_results, indent=2)}")
-    else:
-        print(f"❌ Pipeline execution failed or incomplete\n")
-        print(f"OD Status: {od_status}")
-        print(f"VLM Status: {vlm_status}")
-        print(f"Agent Status: {agent_status}")
-
-    vlm_enhancer_thread.join() 
+    lane_results = result if lane_streams else {"": result}
+    for lane_id, lane_result in lane_results.items():
+        if lane_id:
+            print(f"\n---------------- Lane {lane_id} ----------------")
+        
+        # Check if pipeline was successful
+        od_status, od_results, vlm_status, vlm_results, agent_status, agent_results = lane_result
+        
+        pipeline_successful = (
+            "✅" in od_status and "Completed" in od_status and
+            "✅" in vlm_status and "Completed" in vlm_status and
+            "✅" in agent_status and "completed" in agent_status.lower()
+        )
+        
+        if pipeline_successful:
+            print(f"✅ Pipeline executed successfully!\n")
+            print(f"OD Status: {od_status}")
+            print(f"OD Results: {json.dumps(od_results, indent=2)}")
+            print(f"\nVLM Status: {vlm_status}")
+            print(f"VLM Results: {json.dumps(vlm_results, indent=2)}")
+            print(f"\nAgent Status: {agent_status}")
+            print(f"Agent Results: {json.dumps(agent_results, indent=2)}")
+        else:
+            print(f"❌ Pipeline execution failed or incomplete\n")
+            print(f"OD Status: {od_status}")
+            print(f"VLM Status: {vlm_status}")
+            print(f"Agent Status: {agent_status}")
+
+    for vlm_enhancer_thread in vlm_enhancer_threads:
+        vlm_enhancer_thread.join() 
     logger.info("=== VLM Enhancer finished ===")
-    logger.info("=== END OF PIPELINE RUN ===\n\n\n")
\ No newline at end of file
+    logger.info("=== END OF PIPELINE RUN ===\n\n\n")
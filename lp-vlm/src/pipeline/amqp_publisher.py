@@ -0,0 +1,288 @@
+"""
+Asynchronous RabbitMQ publisher with publisher confirms.
+Owns its own I/O thread and outbound queue so the GStreamer streaming thread
+never blocks on the broker, and survives broker restarts by reconnecting with
+backoff and replaying unconfirmed messages.
+"""
+
+import os
+import json
+import time
+import logging
+import threading
+from collections import deque, OrderedDict
+
+import pika
+
+logger = logging.getLogger("loss_prevention_gvapython")
+
+# ============================================================================
+# CONSTANTS
+# ============================================================================
+
+AMQP_OUTBOUND_MAX = int(os.environ.get("AMQP_OUTBOUND_MAX", "10000"))
+AMQP_PUBLISH_BATCH = int(os.environ.get("AMQP_PUBLISH_BATCH", "100"))
+AMQP_RECONNECT_MIN_S = float(os.environ.get("AMQP_RECONNECT_MIN_S", "0.5"))
+AMQP_RECONNECT_MAX_S = float(os.environ.get("AMQP_RECONNECT_MAX_S", "30"))
+AMQP_CLOSE_TIMEOUT_S = float(os.environ.get("AMQP_CLOSE_TIMEOUT_S", "10"))
+
+# ============================================================================
+# CONFIRMED PUBLISHER
+# ============================================================================
+
+class ConfirmedPublisher:
+    """
+    Publishes JSON messages to a durable queue from a dedicated I/O thread.
+
+    - publish() only appends to a bounded local queue and wakes the I/O thread
+    - the channel runs in confirm mode; the broker acks in batches (multiple=True)
+      and each ack releases every message up to its delivery tag
+    - on connection loss, unconfirmed messages are put back at the head of the
+      outbound queue and replayed after reconnecting with exponential backoff
+    """
+
+    def __init__(self, queue_name, host=None, port=None, username=None, password=None):
+        """
+        Args:
+            queue_name (str): Durable queue to publish to (default exchange)
+            host (str): RabbitMQ host, defaults to RABBITMQ_HOST
+            port (int): RabbitMQ port, defaults to RABBITMQ_PORT
+            username (str): Defaults to RABBITMQ_USER
+            password (str): Defaults to RABBITMQ_PASSWORD
+        """
+        self.queue_name = queue_name
+        self._parameters = pika.ConnectionParameters(
+            host=host or os.getenv("RABBITMQ_HOST", "rabbitmq"),
+            port=int(port or os.getenv("RABBITMQ_PORT", "5672")),
+            credentials=pika.PlainCredentials(
+                username or os.environ.get("RABBITMQ_USER"),
+                password or os.environ.get("RABBITMQ_PASSWORD"),
+            ),
+        )
+
+        self._lock = threading.Condition()
+        self._outbound = deque()          # bodies waiting to be published
+        self._unconfirmed = OrderedDict()  # delivery_tag -> body, in publish order
+        self._next_tag = 1
+        self._dropped = 0
+        self._confirmed = 0
+
+        self._connection = None
+        self._channel = None
+        self._ready = False
+        self._stopping = False
+        self._reconnect_delay = AMQP_RECONNECT_MIN_S
+
+        self._thread = threading.Thread(target=self._run, name="amqp-publisher", daemon=True)
+        self._thread.start()
+
+    # ------------------------------------------------------------------------
+    # PUBLIC API (any thread)
+    # ------------------------------------------------------------------------
+
+    def publish(self, message):
+        """
+        Queue a message for publishing. Never blocks on the broker.
+
+        When the outbound queue is full the oldest queued message is dropped.
+
+        Args:
+            message (dict): JSON-serializable payload
+        """
+        body = json.dumps(message)
+        with self._lock:
+            if self._stopping:
+                logger.error("AMQP publisher is closed, dropping message")
+                return
+            if len(self._outbound) >= AMQP_OUTBOUND_MAX:
+                self._outbound.popleft()
+                self._dropped += 1
+                logger.error(f"AMQP outbound queue full ({AMQP_OUTBOUND_MAX}), dropped oldest message "
+                             f"({self._dropped} dropped so far)")
+            self._outbound.append(body)
+        self._wake()
+
+    def pending(self):
+        """Return the number of queued plus unconfirmed messages."""
+        with self._lock:
+            return len(self._outbound) + len(self._unconfirmed)
+
+    def stats(self):
+        """Return publish counters."""
+        with self._lock:
+            return {
+                "queued": len(self._outbound),
+                "unconfirmed": len(self._unconfirmed),
+                "confirmed": self._confirmed,
+                "dropped": self._dropped,
+            }
+
+    def close(self, timeout=AMQP_CLOSE_TIMEOUT_S):
+        """
+        Wait for queued and unconfirmed messages to be confirmed, then stop.
+
+        Args:
+            timeout (float): Maximum seconds to wait for outstanding confirms
+        """
+        deadline = time.monotonic() + timeout
+        with self._lock:
+            while (self._outbound or self._unconfirmed) and time.monotonic() < deadline:
+                self._lock.wait(timeout=max(0.0, min(0.1, deadline - time.monotonic())))
+            remaining = len(self._outbound) + len(self._unconfirmed)
+            self._stopping = True
+        if remaining:
+            logger.error(f"AMQP publisher closing with {remaining} unconfirmed messages")
+        self._call_threadsafe(self._shutdown)
+        self._thread.join(timeout=max(1.0, deadline - time.monotonic()))
+
+    # ------------------------------------------------------------------------
+    # I/O THREAD
+    # ------------------------------------------------------------------------
+
+    def _run(self):
+        """Connect, run the ioloop, and reconnect with backoff until stopped."""
+        while True:
+            with self._lock:
+                if self._stopping:
+                    return
+            try:
+                self._connection = pika.SelectConnection(
+                    self._parameters,
+                    on_open_callback=self._on_connection_open,
+                    on_open_error_callback=self._on_connection_open_error,
+                    on_close_callback=self._on_connection_closed,
+                )
+                self._connection.ioloop.start()
+            except Exception as e:
+                logger.error(f"AMQP publisher I/O loop error: {e}")
+
+            self._requeue_unconfirmed()
+            with self._lock:
+                if self._stopping:
+                    return
+            delay = self._reconnect_delay
+            self._reconnect_delay = min(self._reconnect_delay * 2, AMQP_RECONNECT_MAX_S)
+            logger.warning(f"AMQP publisher reconnecting in {delay:.1f}s")
+            time.sleep(delay)
+
+    def _on_connection_open(self, connection):
+        connection.channel(on_open_callback=self._on_channel_open)
+
+    def _on_connection_open_error(self, connection, error):
+        logger.error(f"AMQP publisher could not connect: {error}")
+        connection.ioloop.stop()
+
+    def _on_connection_closed(self, connection, reason):
+        self._channel = None
+        self._ready = False
+        with self._lock:
+            stopping = self._stopping
+        if not stopping:
+            logger.warning(f"AMQP publisher connection closed: {reason}")
+        connection.ioloop.stop()
+
+    def _on_channel_open(self, channel):
+        self._channel = channel
+        channel.add_on_close_callback(self._on_channel_closed)
+        channel.queue_declare(queue=self.queue_name, durable=True, callback=self._on_queue_declared)
+
+    def _on_channel_closed(self, channel, reason):
+        logger.warning(f"AMQP publisher channel closed: {reason}")
+        self._channel = None
+        self._ready = False
+        if self._connection is not None and not (self._connection.is_closing or self._connection.is_closed):
+            self._connection.close()
+
+    def _on_queue_declared(self, _frame):
+        self._channel.confirm_delivery(ack_nack_callback=self._on_delivery_confirmation)
+        self._ready = True
+        self._reconnect_delay = AMQP_RECONNECT_MIN_S
+        logger.info(f"AMQP publisher ready (queue={self.queue_name}, confirms on)")
+        self._drain()
+
+    def _on_delivery_confirmation(self, method_frame):
+        """Release acked messages; requeue nacked ones."""
+        method = method_frame.method
+        acked = isinstance(method, pika.spec.Basic.Ack)
+        with self._lock:
+            if method.multiple:
+                tags = [tag for tag in self._unconfirmed if tag <= method.delivery_tag]
+            else:
+                tags = [method.delivery_tag] if method.delivery_tag in self._unconfirmed else []
+            nacked = []
+            for tag in tags:
+                body = self._unconfirmed.pop(tag)
+                if not acked:
+                    nacked.append(body)
+            if acked:
+                self._confirmed += len(tags)
+            self._outbound.extendleft(reversed(nacked))
+            self._lock.notify_all()
+        if nacked:
+            logger.warning(f"AMQP broker nacked {len(nacked)} messages, requeued for publishing")
+            self._drain()
+
+    def _drain(self):
+        """Publish up to AMQP_PUBLISH_BATCH queued messages, rescheduling if more remain."""
+        if not self._ready or self._channel is None:
+            return
+        properties = pika.BasicProperties(delivery_mode=2)
+        published = 0
+        while published < AMQP_PUBLISH_BATCH:
+            with self._lock:
+                if not self._outbound:
+                    break
+                body = self._outbound.popleft()
+                tag = self._next_tag
+                self._next_tag += 1
+                self._unconfirmed[tag] = body
+            try:
+                self._channel.basic_publish(exchange='', routing_key=self.queue_name,
+                                            body=body, properties=properties)
+            except Exception as e:
+                logger.error(f"AMQP publish failed, will replay after reconnect: {e}")
+                return
+            published += 1
+        with self._lock:
+            more = bool(self._outbound)
+        if more:
+            # Yield to the ioloop so confirms and heartbeats are processed between batches
+            self._connection.ioloop.add_callback_threadsafe(self._drain)
+
+    def _requeue_unconfirmed(self):
+        """Move unconfirmed messages back to the head of the outbound queue for replay."""
+        with self._lock:
+            if self._unconfirmed:
+                logger.warning(f"Replaying {len(self._unconfirmed)} unconfirmed messages after reconnect")
+                self._outbound.extendleft(reversed(list(self._unconfirmed.values())))
+                self._unconfirmed.clear()
+            # Delivery tags restart at 1 on every new channel
+            self._next_tag = 1
+        self._channel = None
+        self._ready = False
+
+    def _shutdown(self):
+        connection = self._connection
+        if connection is None:
+            return
+        try:
+            if connection.is_open:
+                connection.close()
+            else:
+                connection.ioloop.stop()
+        except Exception as e:
+            logger.warning(f"AMQP publisher shutdown: {e}")
+            connection.ioloop.stop()
+
+    def _wake(self):
+        self._call_threadsafe(self._drain)
+
+    def _call_threadsafe(self, callback):
+        connection = self._connection
+        if connection is None:
+            return
+        try:
+            connection.ioloop.add_callback_threadsafe(callback)
+        except Exception:
+            # The ioloop is between connections; the next channel open drains the queue
+            pass
@@ -25,5 +25,8 @@ FRAMES_DIR_FULL_PATH = os.path.join(FRAME_DIR_VOL_BASE, RESULTS_DIR, FRAME_DIR)
 
 BUCKET_NAME = "loss-prevention-enhanced-vlm-results"
 
+# Lane (camera_id) this pipeline serves; tags every message so one consumer can serve many lanes
+LANE_ID = os.environ.get("LANE_ID", "").strip()
+
 
 
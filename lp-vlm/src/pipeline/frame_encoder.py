@@ -0,0 +1,123 @@
+"""
+JPEG encoding for video frames mapped by gvapython.
+Encodes straight from the mapped frame buffer, honouring its row stride and
+channel layout, so no full-resolution intermediate copies are created.
+"""
+
+import os
+import logging
+from io import BytesIO
+
+import numpy as np
+
+logger = logging.getLogger("loss_prevention_gvapython")
+
+# ============================================================================
+# CONSTANTS
+# ============================================================================
+
+# Encoder backend: auto | turbojpeg | opencv | pil
+FRAME_ENCODER = os.environ.get("FRAME_ENCODER", "auto").strip().lower()
+JPEG_QUALITY = int(os.environ.get("JPEG_QUALITY", "85"))
+
+BGR_FORMATS = ("BGR", "BGRx", "BGRA")
+RGB_FORMATS = ("RGB", "RGBx", "RGBA")
+
+# ============================================================================
+# FRAME ENCODER
+# ============================================================================
+
+class FrameEncoder:
+    """
+    JPEG encoder that accepts BGR/BGRx (and RGB/RGBx) frame views natively.
+
+    Backends:
+    - turbojpeg: PyTurboJPEG, reads the buffer with its row pitch and 3 or 4 byte pixels
+    - opencv: cv2.imencode, reads strided BGR rows and drops the 4th channel per row
+    - pil: legacy path (channel swap + PIL), kept as a fallback and for benchmarks
+    """
+
+    def __init__(self, backend=FRAME_ENCODER, quality=JPEG_QUALITY):
+        """
+        Args:
+            backend (str): Encoder backend name, or "auto" to pick the fastest available
+            quality (int): JPEG quality (1-100)
+        """
+        self.quality = quality
+        self._turbo = None
+        self._cv2 = None
+        self.backend = self._resolve_backend(backend)
+        logger.info(f"Frame encoder backend: {self.backend} (quality={quality})")
+
+    def _resolve_backend(self, backend):
+        candidates = ["turbojpeg", "opencv", "pil"] if backend == "auto" else [backend]
+        for name in candidates:
+            try:
+                if name == "turbojpeg":
+                    from turbojpeg import TurboJPEG
+                    self._turbo = TurboJPEG()
+                elif name == "opencv":
+                    import cv2
+                    self._cv2 = cv2
+                elif name != "pil":
+                    raise ValueError(f"Unknown frame encoder backend: {name}")
+                return name
+            except (ImportError, OSError) as e:
+                # OSError: PyTurboJPEG installed but libturbojpeg shared library missing
+                logger.warning(f"Frame encoder backend '{name}' unavailable: {e}")
+        logger.warning("Falling back to PIL frame encoder")
+        return "pil"
+
+    def encode(self, image, img_format="BGR"):
+        """
+        Encode a frame to JPEG.
+
+        Args:
+            image (np.ndarray): HxWx3 or HxWx4 uint8 view, possibly with padded rows
+            img_format (str): GStreamer video format of the frame (e.g. "BGR", "BGRx")
+
+        Returns:
+            bytes: JPEG-encoded image
+        """
+        if self.backend == "turbojpeg":
+            return self._encode_turbojpeg(image, img_format)
+        if self.backend == "opencv":
+            return self._encode_opencv(image, img_format)
+        return self._encode_pil(image, img_format)
+
+    def _encode_turbojpeg(self, image, img_format):
+        from turbojpeg import TJPF_BGR, TJPF_BGRX, TJPF_RGB, TJPF_RGBX, TJSAMP_420
+
+        four_channels = image.ndim == 3 and image.shape[2] == 4
+        if img_format in RGB_FORMATS:
+            pixel_format = TJPF_RGBX if four_channels else TJPF_RGB
+        else:
+            pixel_format = TJPF_BGRX if four_channels else TJPF_BGR
+        # TurboJPEG takes the row pitch from strides[0]; only the pixel layout must be packed
+        if image.strides[1:] != (image.shape[2], 1):
+            image = np.ascontiguousarray(image)
+        return self._turbo.encode(image, quality=self.quality, pixel_format=pixel_format,
+                                  jpeg_subsample=TJSAMP_420)
+
+    def _encode_opencv(self, image, img_format):
+        cv2 = self._cv2
+        if img_format in RGB_FORMATS:
+            # OpenCV assumes BGR order; RGB input is the only case that needs a converted copy
+            code = cv2.COLOR_RGBA2BGR if image.shape[2] == 4 else cv2.COLOR_RGB2BGR
+            image = cv2.cvtColor(image, code)
+        # The JPEG codec accepts padded rows and converts 4-channel input row by row
+        ok, encoded = cv2.imencode(".jpg", image, [cv2.IMWRITE_JPEG_QUALITY, self.quality])
+        if not ok:
+            raise RuntimeError("cv2.imencode failed to encode frame")
+        return encoded.tobytes()
+
+    def _encode_pil(self, image, img_format):
+        from PIL import Image
+
+        if img_format in BGR_FORMATS:
+            image = image[:, :, 2::-1]
+        elif image.shape[2] == 4:
+            image = image[:, :, :3]
+        buffer = BytesIO()
+        Image.fromarray(image).save(buffer, format="JPEG", quality=self.quality)
+        return buffer.getvalue()
@@ -0,0 +1,266 @@
+"""
+Shared-memory frame ring for handing frames from the publisher to the VLM consumer.
+
+A fixed-size ring of frame slots in a memory-mapped file on a tmpfs volume
+mounted into both containers. The publisher writes each frame once (raw BGR
+pixels or JPEG bytes) and sends only (slot, seq) references over RabbitMQ; the
+consumer reads the slot back, detecting with the slot's sequence number when
+it has been overwritten in the meantime.
+
+Used by publish.py (gvapython) and by utils/frames_processor.py (consumer), so
+this module depends on numpy and the standard library only.
+"""
+
+import logging
+import mmap
+import os
+import struct
+import threading
+
+import numpy as np
+
+logger = logging.getLogger("loss_prevention_gvapython")
+
+# ============================================================================
+# CONSTANTS
+# ============================================================================
+
+# Directory of the ring files; a tmpfs volume shared by the pipeline and consumer containers
+FRAME_RING_DIR = os.environ.get("FRAME_RING_DIR", "/frame-ring")
+# Ring geometry (publisher side; readers take it from the file header). Slots
+# must outlive a frame from publish until best-frame scoring, and a slot must
+# hold one frame: ~1 MiB covers a 1080p JPEG, raw 1080p BGR needs 6 MiB
+FRAME_RING_SLOTS = int(os.environ.get("FRAME_RING_SLOTS", "256"))
+FRAME_RING_SLOT_BYTES = int(os.environ.get("FRAME_RING_SLOT_BYTES", str(1 << 20)))
+# What the publisher stores: "jpeg" (encoded once, small slots) or "raw" (no encode or decode at all)
+FRAME_RING_FORMAT = os.environ.get("FRAME_RING_FORMAT", "jpeg").strip().lower()
+
+KIND_JPEG = 1
+KIND_RAW_BGR = 2
+
+_MAGIC = b"LPVRING1"
+# magic, slot count, slot payload capacity, next sequence number
+_HEADER = struct.Struct("<8sIIQ")
+_HEADER_SIZE = 64
+# seq, payload length, kind, channels, width, height
+_SLOT_HEADER = struct.Struct("<QIHHII")
+_SLOT_HEADER_SIZE = 32
+
+
+def ring_name_for_lane(lane_id):
+    """File name of a lane's ring ("" maps to the default lane)."""
+    safe_id = "".join(c if c.isalnum() or c in "-_" else "_" for c in str(lane_id or "default"))
+    return f"frames_{safe_id}.ring"
+
+
+class RingFrame:
+    """One frame read back from the ring: a BGR(x) array for raw slots, bytes for JPEG slots."""
+    __slots__ = ("kind", "data")
+
+    def __init__(self, kind, data):
+        self.kind = kind
+        self.data = data
+
+
+# ============================================================================
+# FRAME RING
+# ============================================================================
+
+class FrameRing:
+    """
+    Ring of fixed-size frame slots in a memory-mapped file.
+
+    Slot layout: a 32-byte header (seq, length, kind, channels, width, height)
+    followed by slot_bytes of payload. The single writer zeroes a slot's seq,
+    writes the payload and header, then stores the new seq; a reader copies the
+    payload and accepts it only if the seq before and after the copy matches
+    the reference. Sequence numbers continue across writer restarts, so
+    references from an earlier run never match.
+    """
+
+    def __init__(self, path, mm, slots, slot_bytes, writable):
+        self.path = path
+        self.name = os.path.basename(path)
+        self.slots = slots
+        self.slot_bytes = slot_bytes
+        self.writable = writable
+        self._mm = mm
+        self._lock = threading.Lock()
+        self._next_seq = 1
+        self._inode = os.stat(path).st_ino
+
+    # ------------------------------------------------------------------------
+    # OPEN / CREATE
+    # ------------------------------------------------------------------------
+
+    @classmethod
+    def create(cls, path, slots=FRAME_RING_SLOTS, slot_bytes=FRAME_RING_SLOT_BYTES):
+        """
+        Open a ring for writing, creating or resizing the file as needed.
+
+        An existing file with the same geometry is reused and its sequence
+        numbers continue; otherwise it is replaced (readers notice the new
+        inode and reopen).
+        """
+        size = _HEADER_SIZE + slots * (_SLOT_HEADER_SIZE + slot_bytes)
+        next_seq = 1
+        existing = cls._read_header(path)
+        if existing is not None and existing[:2] == (slots, slot_bytes) and os.path.getsize(path) == size:
+            next_seq = existing[2]
+        else:
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.truncate(size)
+            os.replace(tmp_path, path)
+        fd = os.open(path, os.O_RDWR)
+        try:
+            mm = mmap.mmap(fd, size)
+        finally:
+            os.close(fd)
+        _HEADER.pack_into(mm, 0, _MAGIC, slots, slot_bytes, next_seq)
+        ring = cls(path, mm, slots, slot_bytes, writable=True)
+        ring._next_seq = next_seq
+        logger.info(f"Frame ring {path}: {slots} slots x {slot_bytes} bytes")
+        return ring
+
+    @classmethod
+    def open(cls, path):
+        """Open an existing ring read-only, or return None if it does not exist or is not a ring."""
+        header = cls._read_header(path)
+        if header is None:
+            return None
+        slots, slot_bytes, _ = header
+        fd = os.open(path, os.O_RDONLY)
+        try:
+            mm = mmap.mmap(fd, 0, access=mmap.ACCESS_READ)
+        finally:
+            os.close(fd)
+        return cls(path, mm, slots, slot_bytes, writable=False)
+
+    @staticmethod
+    def _read_header(path):
+        try:
+            with open(path, "rb") as f:
+                magic, slots, slot_bytes, next_seq = _HEADER.unpack(f.read(_HEADER.size))
+        except (OSError, struct.error):
+            return None
+        if magic != _MAGIC or slots <= 0:
+            return None
+        return slots, slot_bytes, next_seq
+
+    def is_stale(self):
+        """True if the file was replaced (or removed) since this ring was opened."""
+        try:
+            return os.stat(self.path).st_ino != self._inode
+        except OSError:
+            return True
+
+    def close(self):
+        self._mm.close()
+
+    # ------------------------------------------------------------------------
+    # WRITE (publisher)
+    # ------------------------------------------------------------------------
+
+    def _slot_offset(self, slot):
+        return _HEADER_SIZE + slot * (_SLOT_HEADER_SIZE + self.slot_bytes)
+
+    def _begin(self):
+        seq = self._next_seq
+        self._next_seq += 1
+        slot = seq % self.slots
+        offset = self._slot_offset(slot)
+        # Invalidate the slot before touching its payload
+        struct.pack_into("<Q", self._mm, offset, 0)
+        return slot, seq, offset
+
+    def _commit(self, offset, seq, length, kind, channels, width, height):
+        _SLOT_HEADER.pack_into(self._mm, offset, 0, length, kind, channels, width, height)
+        struct.pack_into("<Q", self._mm, offset, seq)
+        struct.pack_into("<Q", self._mm, 16, self._next_seq)
+
+    def write_image(self, image):
+        """
+        Copy a BGR or BGRx frame view (padded rows allowed) into the next slot.
+
+        Returns:
+            (slot, seq), or None if the frame does not fit a slot
+        """
+        height, width = image.shape[:2]
+        channels = image.shape[2] if image.ndim == 3 else 1
+        length = height * width * channels
+        if length > self.slot_bytes or image.dtype != np.uint8:
+            return None
+        with self._lock:
+            slot, seq, offset = self._begin()
+            dst = np.ndarray(image.shape, dtype=np.uint8, buffer=self._mm, offset=offset + _SLOT_HEADER_SIZE)
+            dst[...] = image
+            self._commit(offset, seq, length, KIND_RAW_BGR, channels, width, height)
+        return slot, seq
+
+    def write_jpeg(self, jpeg_bytes, width=0, height=0):
+        """
+        Copy JPEG bytes into the next slot.
+
+        Returns:
+            (slot, seq), or None if the JPEG does not fit a slot
+        """
+        length = len(jpeg_bytes)
+        if length > self.slot_bytes:
+            return None
+        with self._lock:
+            slot, seq, offset = self._begin()
+            start = offset + _SLOT_HEADER_SIZE
+            self._mm[start:start + length] = jpeg_bytes
+            self._commit(offset, seq, length, KIND_JPEG, 0, width, height)
+        return slot, seq
+
+    # ------------------------------------------------------------------------
+    # READ (consumer)
+    # ------------------------------------------------------------------------
+
+    def read(self, slot, seq):
+        """
+        Copy a frame out of the ring.
+
+        Returns:
+            RingFrame, or None if the slot no longer holds frame `seq`
+        """
+        if not 0 <= slot < self.slots:
+            return None
+        offset = self._slot_offset(slot)
+        current, length, kind, channels, width, height = _SLOT_HEADER.unpack_from(self._mm, offset)
+        if current != seq or length > self.slot_bytes:
+            return None
+        start = offset + _SLOT_HEADER_SIZE
+        payload = self._mm[start:start + length]
+        if struct.unpack_from("<Q", self._mm, offset)[0] != seq:
+            return None
+        if kind == KIND_RAW_BGR:
+            if height * width * channels != length:
+                return None
+            return RingFrame(kind, np.frombuffer(payload, dtype=np.uint8).reshape(height, width, channels))
+        return RingFrame(kind, payload)
+
+
+_readers = {}
+_readers_lock = threading.Lock()
+
+
+def get_ring_reader(name, directory=FRAME_RING_DIR):
+    """
+    Shared read-only FrameRing for a ring file name, reopened when the writer replaces the file.
+
+    Returns:
+        FrameRing, or None if the ring is not available on this host
+    """
+    name = os.path.basename(str(name))
+    with _readers_lock:
+        ring = _readers.get(name)
+        if ring is None or ring.is_stale():
+            ring = FrameRing.open(os.path.join(directory, name))
+            if ring is not None:
+                _readers[name] = ring
+            else:
+                _readers.pop(name, None)
+        return ring
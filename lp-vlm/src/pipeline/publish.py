@@ -11,16 +11,20 @@ import time
 import random
 import logging
 import atexit
+import queue
+import threading
 import traceback
 from dataclasses import dataclass, field
 from datetime import datetime
 from io import BytesIO
-from collections import defaultdict
+from collections import defaultdict, deque, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 
 import numpy as np
-import pika
-from PIL import Image
-from config import METADATA_DIR_FULL_PATH, FRAMES_DIR_FULL_PATH, BUCKET_NAME, MINIO_HOST, FRAME_DIR_VOL_BASE, RESULTS_DIR
+from frame_encoder import FrameEncoder, BGR_FORMATS
+from amqp_publisher import ConfirmedPublisher
+from frame_ring import FrameRing, FRAME_RING_DIR, FRAME_RING_FORMAT, KIND_JPEG, ring_name_for_lane
+from config import METADATA_DIR_FULL_PATH, FRAMES_DIR_FULL_PATH, BUCKET_NAME, MINIO_HOST, FRAME_DIR_VOL_BASE, RESULTS_DIR, LANE_ID
 
 # ============================================================================
 # CONSTANTS
@@ -32,6 +36,42 @@ THRESHOLD = int(threshold_value) if threshold_value else 12  # Fallback frame-co
 # Time-based tracking threshold (milliseconds) — preferred when gvatrack provides tracking IDs
 TRACKING_THRESHOLD_MS = int(os.environ.get("TRACKING_THRESHOLD_MS", "1500"))
 
+# Track retention — tracks not seen for TRACK_EXPIRY_MS are evicted, and each
+# track keeps only its most recent MAX_FRAMES_PER_TRACK frame paths
+TRACK_EXPIRY_MS = int(os.environ.get("TRACK_EXPIRY_MS", "10000"))
+TRACK_SWEEP_INTERVAL_MS = int(os.environ.get("TRACK_SWEEP_INTERVAL_MS", "1000"))
+MAX_FRAMES_PER_TRACK = int(os.environ.get("MAX_FRAMES_PER_TRACK", "64"))
+SENT_ITEMS_HISTORY = 32
+
+# Detection-to-verdict budget; every FRAME_DATA message carries deadline = timestamp + budget
+# (epoch seconds) so the consumer can schedule VLM work earliest-deadline-first
+ITEM_LATENCY_BUDGET_MS = float(os.environ.get("ITEM_LATENCY_BUDGET_MS", "10000"))
+
+# Metadata JSONL writer — flush at most every METADATA_FLUSH_INTERVAL_MS, optionally
+# from a background thread so the streaming thread never blocks on file I/O
+METADATA_FLUSH_INTERVAL_MS = int(os.environ.get("METADATA_FLUSH_INTERVAL_MS", "1000"))
+METADATA_WRITER_THREAD = os.environ.get("METADATA_WRITER_THREAD", "0") == "1"
+
+# Per-frame log lines are emitted at DEBUG level, one in every LOG_SAMPLE_EVERY calls
+LOG_SAMPLE_EVERY = int(os.environ.get("LOG_SAMPLE_EVERY", "100"))
+
+# Cheap per-frame signals sent with each track so the consumer can pre-rank
+# frames before best-frame scoring; sharpness is a Laplacian variance of the
+# object crop sampled down to at most SIGNAL_CROP_SIZE pixels per side
+FRAME_SIGNAL_SHARPNESS = os.environ.get("FRAME_SIGNAL_SHARPNESS", "1") == "1"
+SIGNAL_CROP_SIZE = 64
+
+# Frame handoff to the consumer: "minio" (JPEG per frame in MinIO, works across hosts)
+# or "shm" (shared-memory ring in FRAME_RING_DIR, consumer on the same host). In shm
+# mode a frame that does not fit the ring still goes to MinIO, and the frames of each
+# published track are copied from the ring to MinIO before its message is sent, so
+# the consumer can fall back to MinIO once ring slots have been reused
+FRAME_TRANSPORT = os.environ.get("FRAME_TRANSPORT", "minio").strip().lower()
+# shm mode needs FRAME_RING_DIR to be a volume mounted into the consumer too; a plain
+# directory is private to this container, so the publisher stays on MinIO instead.
+# 0 skips the check (publisher and consumer in one container or process)
+FRAME_RING_REQUIRE_MOUNT = os.environ.get("FRAME_RING_REQUIRE_MOUNT", "1") == "1"
+
 
 @dataclass
 class TrackedObject:
@@ -41,7 +81,76 @@ class TrackedObject:
     first_seen: float   # wall-clock time in milliseconds
     last_seen: float
     published: bool = False
-    frames: list = field(default_factory=list)
+    frames: deque = field(default_factory=lambda: deque(maxlen=MAX_FRAMES_PER_TRACK))
+    signals: deque = field(default_factory=lambda: deque(maxlen=MAX_FRAMES_PER_TRACK))  # parallel to frames
+    slots: deque = field(default_factory=lambda: deque(maxlen=MAX_FRAMES_PER_TRACK))  # ring refs, parallel to frames
+
+
+class TrackStore:
+    """
+    Tracked objects ordered by last-seen time, with time-based expiry.
+
+    Every update moves the track to the end of an OrderedDict, so the oldest
+    tracks are always at the front and a sweep only visits expired entries.
+    """
+
+    def __init__(self, expiry_ms=TRACK_EXPIRY_MS):
+        self._tracks = OrderedDict()  # tracking_id -> TrackedObject
+        self._expiry_ms = expiry_ms
+
+    def __len__(self):
+        return len(self._tracks)
+
+    def __contains__(self, tracking_id):
+        return tracking_id in self._tracks
+
+    def touch(self, tracking_id, label, now_ms):
+        """
+        Return the track for tracking_id, creating it if needed, and mark it seen.
+
+        Args:
+            tracking_id (int): Tracking ID assigned by gvatrack
+            label (str): Detection label
+            now_ms (float): Current wall-clock time in milliseconds
+
+        Returns:
+            TrackedObject: The updated track
+        """
+        tracked = self._tracks.get(tracking_id)
+        if tracked is None:
+            tracked = TrackedObject(
+                label=label,
+                tracking_id=tracking_id,
+                first_seen=now_ms,
+                last_seen=now_ms,
+            )
+            self._tracks[tracking_id] = tracked
+        else:
+            self._tracks.move_to_end(tracking_id)
+        tracked.last_seen = now_ms
+        return tracked
+
+    def sweep(self, now_ms):
+        """
+        Evict tracks not seen within the expiry window.
+
+        Stops at the first live track, so the cost is proportional to the
+        number of evicted tracks rather than the number of active ones.
+
+        Args:
+            now_ms (float): Current wall-clock time in milliseconds
+
+        Returns:
+            int: Number of evicted tracks
+        """
+        evicted = 0
+        while self._tracks:
+            tracked = next(iter(self._tracks.values()))
+            if now_ms - tracked.last_seen < self._expiry_ms:
+                break
+            self._tracks.popitem(last=False)
+            evicted += 1
+        return evicted
 
 # ============================================================================
 # LOGGER SETUP
@@ -70,6 +179,177 @@ def setup_logger():
 
 logger = setup_logger()
 
+
+class SampledLogger:
+    """
+    Debug logger for hot paths that emits one in every N messages per key.
+
+    Arguments are formatted lazily, and nothing is formatted at all unless
+    DEBUG is enabled and the message is sampled.
+    """
+
+    def __init__(self, base_logger, every=LOG_SAMPLE_EVERY):
+        self._logger = base_logger
+        self._every = max(1, every)
+        self._counts = defaultdict(int)
+
+    def debug(self, key, msg, *args):
+        count = self._counts[key]
+        self._counts[key] = count + 1
+        if count % self._every == 0 and self._logger.isEnabledFor(logging.DEBUG):
+            self._logger.debug(msg, *args)
+
+
+sampled_logger = SampledLogger(logger)
+
+# ============================================================================
+# METADATA WRITER
+# ============================================================================
+
+def compute_frame_signals(obj, image=None):
+    """
+    Cheap quality signals for one detection: confidence, relative bbox area and
+    (optionally) sharpness of the object crop.
+
+    Args:
+        obj (dict): Object entry from the frame metadata
+        image (np.ndarray): Frame pixels (H x W x C), or None to skip sharpness
+
+    Returns:
+        dict: {"confidence", "area", "box"[, "sharpness"]}; box is the normalized
+            [x_min, y_min, x_max, y_max] used to crop the object for the VLM cache key
+    """
+    detection = obj.get("detection", {})
+    box = detection.get("bounding_box", {})
+    area = max(0.0, box.get("x_max", 0.0) - box.get("x_min", 0.0)) * \
+        max(0.0, box.get("y_max", 0.0) - box.get("y_min", 0.0))
+    signals = {"confidence": round(float(detection.get("confidence", 0.0)), 4), "area": round(area, 4),
+               "box": [round(float(box.get(k, 0.0)), 4) for k in ("x_min", "y_min", "x_max", "y_max")]}
+
+    if FRAME_SIGNAL_SHARPNESS and image is not None and getattr(image, "ndim", 0) == 3:
+        x, y, w, h = (int(obj.get(k, 0)) for k in ("x", "y", "w", "h"))
+        # Green channel is a luma proxy for BGR, BGRx and RGB layouts alike
+        crop = image[max(0, y):y + h, max(0, x):x + w, 1]
+        if crop.shape[0] >= 3 and crop.shape[1] >= 3:
+            step = max(1, max(crop.shape) // SIGNAL_CROP_SIZE)
+            crop = crop[::step, ::step].astype(np.float32)
+            laplacian = (crop[1:-1, :-2] + crop[1:-1, 2:] + crop[:-2, 1:-1] + crop[2:, 1:-1]
+                         - 4 * crop[1:-1, 1:-1])
+            if laplacian.size:
+                signals["sharpness"] = round(float(laplacian.var()), 2)
+    return signals
+
+
+class MetadataWriter:
+    """
+    Buffered JSONL writer with interval-based flushing.
+
+    Records are written through a userspace buffer and flushed at most once per
+    flush interval instead of once per frame. With use_thread=True, records are
+    handed to a background thread that serializes and writes them; otherwise
+    they are written inline and a timer thread flushes whatever is still
+    buffered once the interval has passed, so lines never wait on the next
+    write. close() drains pending records, flushes and fsyncs the file.
+    """
+
+    _CLOSE = object()
+
+    def __init__(self, path, flush_interval_ms=METADATA_FLUSH_INTERVAL_MS, use_thread=METADATA_WRITER_THREAD):
+        """
+        Args:
+            path (str): JSONL file path, opened in append mode
+            flush_interval_ms (int): Maximum time between flushes
+            use_thread (bool): Write from a background thread
+        """
+        self.path = path
+        self._file = open(path, 'a', buffering=1 << 16)
+        self._flush_interval_s = flush_interval_ms / 1000.0
+        self._last_flush = time.monotonic()
+        self._closed = False
+        self._queue = None
+        self._thread = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        if use_thread:
+            self._queue = queue.Queue()
+            self._thread = threading.Thread(target=self._run, name="metadata-writer", daemon=True)
+        else:
+            self._thread = threading.Thread(target=self._run_flush_timer, name="metadata-flush", daemon=True)
+        self._thread.start()
+
+    def write(self, record):
+        """
+        Append a record as one JSON line.
+
+        Args:
+            record (dict): Record to write
+        """
+        if self._closed:
+            raise ValueError(f"MetadataWriter for {self.path} is closed")
+        if self._queue is not None:
+            # Shallow copy: callers keep adding keys to the frame metadata after saving it
+            self._queue.put(dict(record))
+            return
+        with self._lock:
+            self._write_line(record)
+            self._maybe_flush()
+
+    def flush(self):
+        """Flush buffered lines to the OS."""
+        with self._lock:
+            self._flush_locked()
+
+    def close(self):
+        """Drain pending records, flush, fsync and close the file."""
+        if self._closed:
+            return
+        self._closed = True
+        if self._queue is not None:
+            self._queue.put(self._CLOSE)
+        self._stop.set()
+        self._thread.join()
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._file.close()
+
+    def _write_line(self, record):
+        self._file.write(json.dumps(record))
+        self._file.write('\n')
+
+    def _flush_locked(self):
+        self._file.flush()
+        self._last_flush = time.monotonic()
+
+    def _maybe_flush(self):
+        if time.monotonic() - self._last_flush >= self._flush_interval_s:
+            self._flush_locked()
+
+    def _run_flush_timer(self):
+        while not self._stop.wait(self._flush_interval_s):
+            try:
+                with self._lock:
+                    self._maybe_flush()
+            except Exception as e:
+                logger.error(f"Error flushing metadata to {self.path}: {e}")
+                logger.error(traceback.format_exc())
+
+    def _run(self):
+        while True:
+            try:
+                record = self._queue.get(timeout=self._flush_interval_s)
+            except queue.Empty:
+                record = None
+            if record is self._CLOSE:
+                return
+            try:
+                with self._lock:
+                    if record is not None:
+                        self._write_line(record)
+                    self._maybe_flush()
+            except Exception as e:
+                logger.error(f"Error writing metadata to {self.path}: {e}")
+                logger.error(traceback.format_exc())
+
 # ============================================================================
 # MINIO CLIENT
 # ============================================================================
@@ -139,6 +419,8 @@ class Publisher:
             # Frame tracking
             self.frame_counter = 0
             self.run_id = f"{int(time.time())}-{random.randint(1000, 9999)}"
+            if LANE_ID:
+                self.run_id = f"{LANE_ID}-{self.run_id}"
             self.person = 0
             # Directory setup
             self.metadata_dir = METADATA_DIR_FULL_PATH
@@ -147,20 +429,30 @@ class Publisher:
             
             # Detection tracking
             self.item_frameid_mapper = defaultdict(list)
-            self.sent_items = []
-            self._tracked_objects = {}  # tracking_id -> TrackedObject
+            self.item_signals_mapper = defaultdict(list)  # parallel to item_frameid_mapper
+            self.item_slots_mapper = defaultdict(list)  # ring refs, parallel to item_frameid_mapper
+            self._label_last_seen = {}  # label -> last seen time (ms), fallback path only
+            self.sent_items = deque(maxlen=SENT_ITEMS_HISTORY)
+            self._tracked_objects = TrackStore()
+            self._last_sweep_ms = 0.0
             self._threshold_ms = TRACKING_THRESHOLD_MS
             
             # External connections
             self.minio_client = get_minio_client()
-            self.connection = None
-            self.channel = None
-            self.file_handle = None
+            self.frame_encoder = FrameEncoder()
+            self.frame_ring = self._setup_frame_ring() if FRAME_TRANSPORT == "shm" else None
+            # One worker, so track messages leave in the order the tracks were published
+            self._frame_backup = (ThreadPoolExecutor(max_workers=1, thread_name_prefix="frame-backup")
+                                  if self.frame_ring is not None else None)
+            self._backup_encoder = FrameEncoder() if self.frame_ring is not None else None
+            self.amqp_publisher = None
+            self.metadata_writer = None
             
             # Setup
             self._setup_directories(clean_output)
             self._setup_jsonl_file()
             self._setup_rabbitmq()            
+            atexit.register(self.close)
             logger.info(f"GVA Publisher initialized: {self.metadata_dir}")
         except Exception as e:
             logger.error(f"Error initializing Publisher: {e}")
@@ -186,19 +478,38 @@ class Publisher:
             timestamp = datetime.now().strftime("%Y%m%d%H%M%S") + str(int(time.time_ns()))[10:16]
             self.jsonl_file = os.path.join(self.metadata_dir, f"rs-1_{timestamp}.jsonl")
             os.makedirs(os.path.dirname(self.jsonl_file), exist_ok=True)
-            self.file_handle = open(self.jsonl_file, 'a')
+            self.metadata_writer = MetadataWriter(self.jsonl_file)
         except Exception as e:
             logger.error(f"Error setting up JSONL file: {e}")
             logger.error(traceback.format_exc())
             sys.exit(1)
     
+    def _setup_frame_ring(self):
+        """Open this lane's shared-memory frame ring, or return None to use MinIO only."""
+        if FRAME_RING_REQUIRE_MOUNT and not os.path.ismount(FRAME_RING_DIR):
+            logger.error(f"FRAME_TRANSPORT=shm but {FRAME_RING_DIR} is not a mounted volume the consumer "
+                         f"can see; saving frames to MinIO instead")
+            return None
+        try:
+            os.makedirs(FRAME_RING_DIR, exist_ok=True)
+            ring = FrameRing.create(os.path.join(FRAME_RING_DIR, ring_name_for_lane(LANE_ID)))
+        except Exception as e:
+            logger.error(f"Frame ring unavailable in {FRAME_RING_DIR}, using MinIO: {e}")
+            return None
+        # Frames in the ring never reach MinIO, so nothing else creates the bucket the
+        # consumer uploads best frames to and presigns them from
+        try:
+            if not self.minio_client.bucket_exists(BUCKET_NAME):
+                self.minio_client.make_bucket(BUCKET_NAME)
+                logger.info(f"Minio Bucket '{BUCKET_NAME}' created ✅")
+        except Exception as e:
+            logger.error(f"Could not create MinIO bucket {BUCKET_NAME}: {e}")
+        return ring
+    
     def _setup_rabbitmq(self):
-        """Establish RabbitMQ connection and channel."""
+        """Start the asynchronous RabbitMQ publisher (connects in its own I/O thread)."""
         try:
-            # Use local client (works with mounted files inside container)
-            self.connection = self.get_rabbitmq_connection()
-            self.channel = self.connection.channel()
-            self.channel.queue_declare(queue="object_detection", durable=True)
+            self.amqp_publisher = ConfirmedPublisher("object_detection")
         except Exception as e:
             logger.error(f"Error setting up RabbitMQ: {e}")
             logger.error(traceback.format_exc())
@@ -221,7 +532,7 @@ class Publisher:
         try:
             with frame.data() as image:
                 video_info = frame.video_info()
-                logger.info("Frame received for processing**********************************")
+                sampled_logger.debug("frame_received", "Frame %d received for processing", self.frame_counter)
                 
                 frame_id = f"frame__{self.frame_counter:06d}.jpg"
                 metadata = {"frame_id": frame_id}
@@ -237,11 +548,11 @@ class Publisher:
                     self.add_video_format_info(video_info, metadata)
                     
                     frame_path = os.path.join(self.run_id, frame_id)
-                    self.save_image(image, frame_path, metadata)
-                    logger.info(f"Image saved: {metadata}")
+                    frame_ref = self.save_image(image, frame_path, metadata)
+                    sampled_logger.debug("image_saved", "Image saved: %s", metadata)
                     
                     # Process detected objects
-                    self._process_detections(metadata, frame_path)
+                    self._process_detections(metadata, frame_path, image, frame_ref)
                     
                     self.frame_counter += 1
             
@@ -250,7 +561,7 @@ class Publisher:
             logger.error(traceback.format_exc())
             sys.exit(1)
     
-    def _process_detections(self, metadata, frame_path):
+    def _process_detections(self, metadata, frame_path, image=None, frame_ref=None):
         """
         Process object detections using tracking IDs and time-based threshold.
         Falls back to frame-count threshold when tracking IDs are not available.
@@ -258,12 +569,15 @@ class Publisher:
         Args:
             metadata (dict): Frame metadata containing detected objects
             frame_path (str): Path to saved frame image
+            image (np.ndarray): Frame pixels, used for per-frame sharpness signals
+            frame_ref (tuple): (slot, seq) of the frame in the shared-memory ring, or None
         """
         try:
             if not metadata or len(metadata.get("objects", [])) == 0:
                 return
             
             current_time_ms = time.time() * 1000
+            self._evict_stale_tracks(current_time_ms)
             
             for obj in metadata.get("objects", []):
                 detection = obj.get("detection", {})
@@ -281,30 +595,32 @@ class Publisher:
                 
                 # Primary path: time-based tracking with unique IDs (when gvatrack is active)
                 if tracking_id is not None:
-                    if tracking_id not in self._tracked_objects:
-                        self._tracked_objects[tracking_id] = TrackedObject(
-                            label=label,
-                            tracking_id=tracking_id,
-                            first_seen=current_time_ms,
-                            last_seen=current_time_ms,
-                        )
-                    
-                    tracked = self._tracked_objects[tracking_id]
-                    tracked.last_seen = current_time_ms
+                    tracked = self._tracked_objects.touch(tracking_id, label, current_time_ms)
+                    if tracked.published:
+                        # Keep the track alive so it is not re-published, but stop collecting frames
+                        continue
                     tracked.frames.append(frame_path)
+                    tracked.signals.append(compute_frame_signals(obj, image))
+                    tracked.slots.append(frame_ref)
                     
                     duration_ms = tracked.last_seen - tracked.first_seen
-                    if duration_ms >= self._threshold_ms and not tracked.published:
+                    if duration_ms >= self._threshold_ms:
                         tracked.published = True
                         logger.info(
                             f"Tracking ID {tracking_id} ({label}) visible for "
                             f"{duration_ms:.0f}ms >= {self._threshold_ms}ms, sending notification"
                         )
                         self._send_detection_notification_tracked(tracked)
+                        tracked.frames.clear()
+                        tracked.signals.clear()
+                        tracked.slots.clear()
                 else:
                     # Fallback: frame-count threshold when no tracking ID
-                    logger.info(f"Items extracted from label: {self.item_frameid_mapper}")
+                    sampled_logger.debug("items_extracted", "Items extracted from label: %s", self.item_frameid_mapper)
                     self.item_frameid_mapper[label].append(frame_path)
+                    self.item_signals_mapper[label].append(compute_frame_signals(obj, image))
+                    self.item_slots_mapper[label].append(frame_ref)
+                    self._label_last_seen[label] = current_time_ms
                     
                     if len(self.item_frameid_mapper[label]) >= THRESHOLD:
                         if len(self.sent_items) == 0 or label != self.sent_items[-1]:
@@ -313,29 +629,72 @@ class Publisher:
                             self.sent_items.append(label)
                             self.person = 0
                             del self.item_frameid_mapper[label]
+                            self.item_signals_mapper.pop(label, None)
+                            self.item_slots_mapper.pop(label, None)
                         else:
                             logger.info(f"Data already sent for {label}, skipping.")
                             del self.item_frameid_mapper[label]
+                            self.item_signals_mapper.pop(label, None)
+                            self.item_slots_mapper.pop(label, None)
         except Exception as e:
             logger.error(f"Error processing detections: {e}")
             logger.error(traceback.format_exc())
             sys.exit(1)
     
+    def _evict_stale_tracks(self, current_time_ms):
+        """
+        Drop tracks and fallback label buffers that have not been seen recently.
+        Runs at most once per TRACK_SWEEP_INTERVAL_MS.
+        
+        Args:
+            current_time_ms (float): Current wall-clock time in milliseconds
+        """
+        if current_time_ms - self._last_sweep_ms < TRACK_SWEEP_INTERVAL_MS:
+            return
+        self._last_sweep_ms = current_time_ms
+        
+        evicted = self._tracked_objects.sweep(current_time_ms)
+        if evicted:
+            logger.debug(f"Evicted {evicted} stale tracks, {len(self._tracked_objects)} active")
+        
+        if not self._label_last_seen:
+            return
+        stale_labels = [
+            label for label, last_seen in self._label_last_seen.items()
+            if current_time_ms - last_seen >= TRACK_EXPIRY_MS
+        ]
+        for label in stale_labels:
+            del self._label_last_seen[label]
+            self.item_frameid_mapper.pop(label, None)
+            self.item_signals_mapper.pop(label, None)
+            self.item_slots_mapper.pop(label, None)
+    
+    def _ring_fields(self, slots):
+        """Message fields pointing the consumer at frames in the ring ({} when MinIO-only)."""
+        if self.frame_ring is None:
+            return {}
+        return {"frame_ring": self.frame_ring.name, "frame_slots": [list(ref) if ref else None for ref in slots]}
+    
     def _send_detection_notification_tracked(self, tracked):
         """Send RabbitMQ notification for a tracked object (time-based path)."""
         try:
+            now = datetime.now()
             message = {
                 "data": {
                     "item_name": tracked.label,
                     "tracking_id": tracked.tracking_id,
-                    "frames": tracked.frames,
-                    "bucket": BUCKET_NAME
+                    "frames": list(tracked.frames),
+                    "frame_signals": list(tracked.signals),
+                    "bucket": BUCKET_NAME,
+                    "lane_id": LANE_ID,
+                    **self._ring_fields(tracked.slots)
                 },
                 "msg_type": "FRAME_DATA",
                 "status": "PROCESSING",
-                "timestamp": datetime.now().isoformat()
+                "timestamp": now.isoformat(),
+                "deadline": now.timestamp() + ITEM_LATENCY_BUDGET_MS / 1000.0
             }
-            self.send_message(message)
+            self._send_frame_message(message, tracked.frames, tracked.slots)
         except Exception as e:
             logger.error(f"Error sending tracked detection notification: {e}")
             logger.error(traceback.format_exc())
@@ -344,17 +703,22 @@ class Publisher:
     def _send_detection_notification(self, label):
         """Send RabbitMQ notification for detected item."""
         try:
+            now = datetime.now()
             message = {
                 "data": {
                     "item_name": label,
-                    "frames": self.item_frameid_mapper[label],
-                    "bucket": BUCKET_NAME
+                    "frames": list(self.item_frameid_mapper[label]),
+                    "frame_signals": list(self.item_signals_mapper[label]),
+                    "bucket": BUCKET_NAME,
+                    "lane_id": LANE_ID,
+                    **self._ring_fields(self.item_slots_mapper[label])
                 },
                 "msg_type": "FRAME_DATA",
                 "status": "PROCESSING",
-                "timestamp": datetime.now().isoformat()
+                "timestamp": now.isoformat(),
+                "deadline": now.timestamp() + ITEM_LATENCY_BUDGET_MS / 1000.0
             }
-            self.send_message(message)
+            self._send_frame_message(message, self.item_frameid_mapper[label], self.item_slots_mapper[label])
         except Exception as e:
             logger.error(f"Error sending detection notification: {e}")
             logger.error(traceback.format_exc())
@@ -388,10 +752,8 @@ class Publisher:
             metadata (dict): Frame metadata to save
         """
         try:
-            json.dump(metadata, self.file_handle)
-            self.file_handle.write('\n')
-            self.file_handle.flush()
-            logger.info(f"Metadata saved to: {self.jsonl_file}")
+            self.metadata_writer.write(metadata)
+            sampled_logger.debug("metadata_saved", "Metadata saved to: %s", self.jsonl_file)
         except Exception as e:
             logger.error(f"Error saving JSON for frame {self.frame_counter}: {e}")
             logger.error(traceback.format_exc())
@@ -426,36 +788,90 @@ class Publisher:
     
     def save_image(self, image_array, image_filename, metadata):
         """
-        Save image to MinIO object storage and local filesystem.
+        Save image to the shared-memory frame ring, or to MinIO object storage.
         
         Args:
-            image_array (np.ndarray): Image data
+            image_array (np.ndarray): Mapped frame view (BGR/BGRx, possibly with padded rows)
             image_filename (str): Filename for MinIO storage
             metadata (dict): Image metadata containing format info
+        
+        Returns:
+            tuple: (slot, seq) of the frame in the ring, or None if it was saved to MinIO
         """
         try:
-            # Convert BGR to RGB if needed
-            if metadata.get("img_format") in ["BGR", "BGRx", "BGRA"]:
-                image_array = image_array[:, :, 2::-1]
+            img_format = metadata.get("img_format", "BGR")
+            if self.frame_ring is not None:
+                frame_ref = self._save_to_ring(image_array, img_format)
+                if frame_ref is not None:
+                    return frame_ref
+            
+            # Encode straight from the mapped buffer — no channel swap or intermediate copies
+            jpeg_bytes = self.frame_encoder.encode(image_array, img_format)
             
             # Save to MinIO
-            self._save_to_minio(image_array, image_filename)
+            self._save_to_minio(jpeg_bytes, image_filename)
             
             # Save to local filesystem
-            #save_to_local(image_array)
+            #self._save_to_local(jpeg_bytes)
             
         except Exception as e:
             logger.error(f"Error saving image {image_filename}: {e}")
             logger.error(traceback.format_exc())
             sys.exit(1)
     
-    def _save_to_minio(self, image_array, image_filename):
-        """Save image to MinIO object storage."""
+    def _save_to_ring(self, image_array, img_format):
+        """Write a frame to the ring (raw BGR/BGRx or JPEG); returns (slot, seq) or None if it does not fit."""
+        if FRAME_RING_FORMAT == "raw":
+            if img_format not in BGR_FORMATS:
+                return None
+            frame_ref = self.frame_ring.write_image(image_array)
+        else:
+            jpeg_bytes = self.frame_encoder.encode(image_array, img_format)
+            frame_ref = self.frame_ring.write_jpeg(jpeg_bytes, image_array.shape[1], image_array.shape[0])
+        if frame_ref is None:
+            sampled_logger.debug("ring_overflow", "Frame does not fit a %d-byte ring slot, saving to MinIO",
+                                 self.frame_ring.slot_bytes)
+        return frame_ref
+    
+    def _send_frame_message(self, message, frames, slots):
+        """
+        Send a track's message; with ring frames, first copy them to MinIO on the
+        frame-backup thread (frames and slots are copied, callers may clear them).
+        """
+        refs = [(frame_path, ref) for frame_path, ref in zip(frames, slots) if ref]
+        if self._frame_backup is None or not refs:
+            self.send_message(message)
+            return
+        self._frame_backup.submit(self._backup_and_send, message, refs)
+    
+    def _backup_and_send(self, message, refs):
+        """Upload ring frames (frame_path, (slot, seq)) to MinIO, then send the track's message."""
         try:
-            image = Image.fromarray(image_array)
-            image_buffer = BytesIO()
-            image.save(image_buffer, format="JPEG", quality=85)
-            image_buffer.seek(0)
+            missed = 0
+            for frame_path, ref in refs:
+                frame = self.frame_ring.read(*ref)
+                if frame is None:
+                    missed += 1
+                    continue
+                if frame.kind == KIND_JPEG:
+                    jpeg_bytes = bytes(frame.data)
+                else:
+                    img_format = "BGRx" if frame.data.shape[2] == 4 else "BGR"
+                    jpeg_bytes = self._backup_encoder.encode(frame.data, img_format)
+                self.minio_client.put_object(BUCKET_NAME, frame_path, BytesIO(jpeg_bytes),
+                                             length=len(jpeg_bytes), content_type="image/jpeg")
+            if missed:
+                logger.warning(f"{missed} of {len(refs)} ring frames were overwritten before the MinIO copy; "
+                               f"consider raising FRAME_RING_SLOTS")
+        except Exception as e:
+            logger.error(f"Error copying ring frames to MinIO: {e}")
+            logger.error(traceback.format_exc())
+        self.send_message(message)
+    
+    def _save_to_minio(self, jpeg_bytes, image_filename):
+        """Save JPEG-encoded image to MinIO object storage."""
+        try:
+            image_buffer = BytesIO(jpeg_bytes)
             if self.minio_client is None:
                 logger.error("MinIO client is not initialized. Initialize MinIO client again to save images.")
                 self.minio_client = get_minio_client()
@@ -467,7 +883,7 @@ class Publisher:
                 BUCKET_NAME,
                 image_filename,
                 image_buffer,
-                length=image_buffer.getbuffer().nbytes,
+                length=len(jpeg_bytes),
                 content_type="image/jpeg"
             )
         except Exception as e:
@@ -475,12 +891,12 @@ class Publisher:
             logger.error(traceback.format_exc())
             sys.exit(1)
     
-    def _save_to_local(self, image_array):
-        """Save image to local filesystem."""
+    def _save_to_local(self, jpeg_bytes):
+        """Save JPEG-encoded image to local filesystem."""
         try:
-            pil_image = Image.fromarray(image_array)
             output_path = f"{self.output_dir_frames}/frame_{self.frame_counter:06d}.jpg"
-            pil_image.save(output_path, format="JPEG")
+            with open(output_path, "wb") as f:
+                f.write(jpeg_bytes)
         except Exception as e:
             logger.error(f"Error saving to local filesystem: {e}")
             logger.error(traceback.format_exc())
@@ -492,51 +908,20 @@ class Publisher:
     
     def send_message(self, text):
         """
-        Send message to RabbitMQ queue.
+        Queue message for publishing to RabbitMQ.
+        
+        Publishing, confirms and reconnects happen on the publisher's I/O thread,
+        so a broker outage neither blocks frame processing nor stops the pipeline.
         
         Args:
             text (dict): Message payload
         """
         try:
-            self.channel.basic_publish(
-                exchange='',
-                routing_key='object_detection',
-                body=json.dumps(text),
-                properties=pika.BasicProperties(delivery_mode=2)
-            )
-            logger.info(f"Sent: {text}")
+            self.amqp_publisher.publish(text)
+            logger.info(f"Queued: {text}")
         except Exception as e:
-            logger.error(f"Error sending message to RabbitMQ: {e}")
+            logger.error(f"Error queueing message for RabbitMQ: {e}")
             logger.error(traceback.format_exc())
-            sys.exit(1)
-    
-    def get_rabbitmq_connection(self):
-        """
-        Establish RabbitMQ connection with retry logic.
-        """
-        RABBITMQ_USERNAME = os.environ.get("RABBITMQ_USER")
-        RABBITMQ_PASSWORD = os.environ.get("RABBITMQ_PASSWORD")
-        rabbit_host = os.getenv("RABBITMQ_HOST", "rabbitmq")
-        MAX_RETRIES = 30
-        retry = 0
-        while retry < MAX_RETRIES:
-            try:
-                credentials = pika.PlainCredentials(RABBITMQ_USERNAME, RABBITMQ_PASSWORD)
-                connection = pika.BlockingConnection(
-                    pika.ConnectionParameters(
-                        host=rabbit_host,
-                        port=5672,
-                        credentials=credentials
-                    )
-                )
-                return connection
-            except Exception as e:
-                logger.error(f"Error establishing RabbitMQ connection: {e}")
-                logger.error(traceback.format_exc())
-                time.sleep(2)
-                retry += 1
-        logger.error("Max retries reached. Could not connect to RabbitMQ.")
-        sys.exit(1)
     
     # ------------------------------------------------------------------------
     # CLEANUP AND UTILITIES
@@ -570,14 +955,30 @@ class Publisher:
             sys.exit(1)
     
     def close(self):
-        """Close file handle."""
+        """Wait for outstanding RabbitMQ confirms, then flush and close the metadata writer."""
+        if getattr(self, '_frame_backup', None) is not None:
+            # Track messages still being backed up must be queued before the publisher closes
+            self._frame_backup.shutdown(wait=True)
+            self._frame_backup = None
+        try:
+            if getattr(self, 'amqp_publisher', None) is not None:
+                self.amqp_publisher.close()
+                logger.info(f"Publisher RabbitMQ stats: {self.amqp_publisher.stats()}")
+                self.amqp_publisher = None
+        except Exception as e:
+            logger.error(f"Error closing RabbitMQ publisher: {e}")
+            logger.error(traceback.format_exc())
         try:
-            if hasattr(self, 'file_handle') and self.file_handle and not self.file_handle.closed:
-                self.file_handle.close()
-                logger.info("Publisher file handle closed")
+            if getattr(self, 'metadata_writer', None) is not None:
+                self.metadata_writer.close()
+                logger.info("Publisher metadata writer closed")
         except Exception as e:
-            logger.error(f"Error closing file handle: {e}")
+            logger.error(f"Error closing metadata writer: {e}")
             logger.error(traceback.format_exc())
+        if getattr(self, 'frame_ring', None) is not None:
+            # Only unmap: the file stays so the consumer can still read outstanding frames
+            self.frame_ring.close()
+            self.frame_ring = None
 # ============================================================================
 # END OF FILE
 # ============================================================================
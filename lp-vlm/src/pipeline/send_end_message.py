@@ -2,7 +2,7 @@ import pika
 import json
 import os
 from datetime import datetime
-from config import LP_IP
+from config import LP_IP, LANE_ID
 import sys
 
 rabbit_user = os.environ.get("RABBITMQ_USER")
@@ -22,7 +22,7 @@ try:
         "msg_type": "STREAM_END",
         "status": "COMPLETED",
         "timestamp": datetime.now().isoformat(),
-        "data": {}
+        "data": {"lane_id": LANE_ID}
     }
     channel.basic_publish(
         exchange="",
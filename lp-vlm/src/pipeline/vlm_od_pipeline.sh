@@ -8,10 +8,12 @@ WORKLOAD_PIPELINE_CONFIG="/home/pipeline-server/lp-vlm/configs/"$WORKLOAD_DIST
 
 ORIGINAL_VIDEO_NAME="$(python3 /home/pipeline-server/lp-vlm/workload_utils.py \
   --camera-config "/home/pipeline-server/lp-vlm/configs/${CAMERA_STREAM}" \
+  --lane-id "${LANE_ID:-}" \
   --extract_video_name)"
 
 STREAM_URI="$(python3 /home/pipeline-server/lp-vlm/workload_utils.py \
   --camera-config "/home/pipeline-server/lp-vlm/configs/${CAMERA_STREAM}" \
+  --lane-id "${LANE_ID:-}" \
   --get-stream-uri)"
 
 export ORIGINAL_VIDEO_NAME
@@ -71,6 +73,23 @@ fi
 echo "🔍 Using model: $MODEL_FULL_PATH"
 
 
+# Wait for the VLM consumer to load and warm up its model, so the first
+# detections are not queued behind model compilation. The consumer removes
+# the file when it starts and when it exits.
+VLM_READY_FILE="${VLM_READY_FILE:-/app/results/.vlm_ready}"
+VLM_READY_TIMEOUT="${VLM_READY_TIMEOUT:-900}"
+echo "⏳ Waiting for VLM consumer readiness: $VLM_READY_FILE (timeout ${VLM_READY_TIMEOUT}s)"
+WAITED=0
+while [ ! -f "$VLM_READY_FILE" ] && [ "$WAITED" -lt "$VLM_READY_TIMEOUT" ]; do
+  sleep 1
+  WAITED=$((WAITED + 1))
+done
+if [ -f "$VLM_READY_FILE" ]; then
+  echo "✅ VLM consumer ready after ${WAITED}s"
+else
+  echo "⚠️  VLM consumer not ready after ${VLM_READY_TIMEOUT}s, starting anyway (messages wait in RabbitMQ)"
+fi
+
 echo "Starting Object Detection pipeline"
 
 export GST_DEBUG="${GST_DEBUG:-4}"
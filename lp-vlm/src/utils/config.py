@@ -29,6 +29,24 @@ TIMESTAMP = datetime.now().strftime("%Y%m%d%H%M%S")
 AGENT_RESULTS_DIR_FULL_PATH = os.path.join(LP_APP_BASE_DIR, RESULTS_DIR, "agent_results.json")
 COMMON_RESULTS_DIR_FULL_PATH = os.path.join(LP_APP_BASE_DIR, RESULTS_DIR,  f"results_{TIMESTAMP}.jsonl")
 STREAM_RESULTS_DIR_FULL_PATH = os.path.join(LP_APP_BASE_DIR, RESULTS_DIR, "stream_results.log")
+# Written once the VLM is loaded and warmed up; the results dir is shared with
+# the pipeline container, whose vlm_od_pipeline.sh waits for this file
+VLM_READY_FILE = os.environ.get("VLM_READY_FILE", os.path.join(LP_APP_BASE_DIR, RESULTS_DIR, ".vlm_ready"))
+# Time from detection to verdict an item may take; messages without a deadline get
+# their timestamp (or receipt time) plus this budget
+ITEM_LATENCY_BUDGET_MS = float(os.environ.get("ITEM_LATENCY_BUDGET_MS", "10000"))
+# VLM service worker threads and largest request batch per worker; shared here so the
+# OD consumer can size its prefetch without importing the VLM (and OpenVINO)
+VLM_WORKERS = int(os.environ.get("VLM_WORKERS", "2"))
+VLM_MAX_BATCH = int(os.environ.get("VLM_MAX_BATCH", "4"))
+
+
+def lane_results_path(lane_id):
+    """Results file of one lane; the default lane ("") keeps the shared results file."""
+    if not lane_id:
+        return COMMON_RESULTS_DIR_FULL_PATH
+    safe_id = "".join(c if c.isalnum() or c in "-_" else "_" for c in str(lane_id))
+    return os.path.join(LP_APP_BASE_DIR, RESULTS_DIR, f"results_{safe_id}_{TIMESTAMP}.jsonl")
 
 ####### volume-mount paths ############
 FRAME_DIR_VOL_BASE = "/app"
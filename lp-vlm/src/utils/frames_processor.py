@@ -1,12 +1,63 @@
+import os
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
 import cv2
 import numpy as np
-from skimage.metrics import structural_similarity as ssim
-from utils.save_results import get_frames_from_minio
+from utils.config import logger
+from utils.metrics import metrics, SPAN_IMAGE_FETCH
+from utils.save_results import get_frames_from_minio, get_objects_from_minio
+from pipeline.frame_ring import get_ring_reader, KIND_JPEG
+
+# Frames decoded concurrently (cv2 releases the GIL while decoding); downloads run on
+# the MinIO client's pool (MINIO_FETCH_WORKERS)
+BEST_FRAME_FETCH_WORKERS = int(os.environ.get("BEST_FRAME_FETCH_WORKERS", "8"))
+# Frames scored per batch; the next batch is downloaded while the current one is scored
+BEST_FRAME_CHUNK_SIZE = int(os.environ.get("BEST_FRAME_CHUNK_SIZE", "16"))
+# Preallocated download buffers kept for reuse across chunks and tracks; frames larger
+# than BEST_FRAME_BUFFER_BYTES are read into a fresh bytes object instead
+BEST_FRAME_BUFFERS = int(os.environ.get("BEST_FRAME_BUFFERS", "64"))
+BEST_FRAME_BUFFER_BYTES = int(os.environ.get("BEST_FRAME_BUFFER_BYTES", str(1 << 20)))
+# "farneback" (dense optical flow) or "diff" (mean absolute difference, much cheaper)
+BEST_FRAME_MOTION_METRIC = os.environ.get("BEST_FRAME_MOTION_METRIC", "farneback").lower()
+# Stop scoring a track once a frame reaches this stability score (0 = score every frame)
+BEST_FRAME_TARGET_SCORE = float(os.environ.get("BEST_FRAME_TARGET_SCORE", "0"))
+
+# Candidate selection before full scoring: "all" scores every frame (exhaustive, the
+# default), "signals" ranks frames by the publisher's per-frame signals (confidence,
+# bbox area, sharpness), "uniform" samples evenly over the track. The sampling
+# strategies are opt-in: they can miss the frame "all" would pick, so measure them on
+# your own footage first (benchmarks/bench_best_frame.py reports speedup and quality)
+BEST_FRAME_STRATEGY = os.environ.get("BEST_FRAME_STRATEGY", "all").lower()
+# Frames kept for full scoring (0 = score every frame)
+BEST_FRAME_CANDIDATES = int(os.environ.get("BEST_FRAME_CANDIDATES", "8"))
+SIGNAL_WEIGHTS = {"confidence": 0.4, "area": 0.3, "sharpness": 0.3}
+
+# SSIM constants, matching skimage.metrics.structural_similarity defaults for uint8
+SSIM_WIN_SIZE = 7
+SSIM_K1 = 0.01
+SSIM_K2 = 0.03
+SSIM_DATA_RANGE = 255.0
+
+_fetch_pool = None
+_fetch_pool_lock = threading.Lock()
+_download_buffers = queue.LifoQueue(maxsize=max(1, BEST_FRAME_BUFFERS))
+
 
 class FrameProcessingError(Exception):
     pass
 
 
+def _get_fetch_pool():
+    global _fetch_pool
+    with _fetch_pool_lock:
+        if _fetch_pool is None:
+            _fetch_pool = ThreadPoolExecutor(max_workers=max(1, BEST_FRAME_FETCH_WORKERS),
+                                             thread_name_prefix="frame-fetch")
+    return _fetch_pool
+
+
 def compute_optical_flow_mag_fast(gray1, gray2):
     """Compute average motion magnitude on small grayscale frames."""
     flow = cv2.calcOpticalFlowFarneback(
@@ -16,42 +67,322 @@ def compute_optical_flow_mag_fast(gray1, gray2):
     return np.mean(mag)
 
 
-def get_best_frame(frames_list, bucket_name="", alpha=0.5, resize_factor=0.2):
-    prev_gray = None
+def ssim_batch(grays_a, grays_b, win_size=SSIM_WIN_SIZE):
+    """
+    Mean SSIM of each pair of grayscale images in two (N, H, W) stacks.
+
+    Same result as skimage's structural_similarity with default arguments
+    (7x7 uniform window, sample covariance, border of win_size // 2 excluded
+    from the mean) to within float32 precision. The stack is box-filtered as
+    one tall image; windows that straddle two images only touch the excluded
+    border rows, so they never reach the mean.
+
+    Returns:
+        np.ndarray: (N,) SSIM values
+    """
+    x = np.asarray(grays_a)
+    y = np.asarray(grays_b)
+    if x.ndim == 2:
+        x, y = x[None], y[None]
+    n, h, w = x.shape
+    pad = win_size // 2
+    x = x.reshape(n * h, w).astype(np.float32)
+    y = y.reshape(n * h, w).astype(np.float32)
+
+    def box_mean(img):
+        mean = cv2.boxFilter(img, -1, (win_size, win_size), normalize=True, borderType=cv2.BORDER_REFLECT)
+        return mean.reshape(n, h, w)[:, pad:h - pad, pad:w - pad]
+
+    ux, uy = box_mean(x), box_mean(y)
+    uxx, uyy, uxy = box_mean(cv2.multiply(x, x)), box_mean(cv2.multiply(y, y)), box_mean(cv2.multiply(x, y))
+
+    num_px = win_size * win_size
+    cov_norm = num_px / (num_px - 1.0)
+    c1 = (SSIM_K1 * SSIM_DATA_RANGE) ** 2
+    c2 = (SSIM_K2 * SSIM_DATA_RANGE) ** 2
+    ux_uy, ux_sq, uy_sq = ux * uy, ux * ux, uy * uy
+    num = (2 * ux_uy + c1) * (2 * cov_norm * (uxy - ux_uy) + c2)
+    den = (ux_sq + uy_sq + c1) * (cov_norm * (uxx - ux_sq + uyy - uy_sq) + c2)
+    return (num / den).reshape(n, -1).mean(axis=1, dtype=np.float64)
+
+
+def motion_scores(grays_a, grays_b, metric=BEST_FRAME_MOTION_METRIC):
+    """
+    Motion score in (0, 1] for each frame pair; 1 means no motion.
+
+    "farneback" uses dense optical flow magnitude (1 / (1 + mean magnitude)),
+    with pairs spread over the thread pool; "diff" uses 1 - mean absolute
+    intensity difference / 255.
+    """
+    if metric == "diff":
+        diff = np.abs(np.asarray(grays_a, dtype=np.int16) - np.asarray(grays_b, dtype=np.int16))
+        return 1.0 - diff.reshape(diff.shape[0], -1).mean(axis=1) / SSIM_DATA_RANGE
+    motions = _get_fetch_pool().map(compute_optical_flow_mag_fast, grays_a, grays_b)
+    return 1 / (1 + np.fromiter(motions, dtype=np.float64))
+
+
+def _read_ring_frame(ring, frame_ref):
+    """Decoded BGR image of a frame in the shared-memory ring, or None if its slot was overwritten."""
+    with metrics.span(SPAN_IMAGE_FETCH, source="ring"):
+        frame = ring.read(*frame_ref)
+    if frame is None:
+        return None
+    if frame.kind == KIND_JPEG:
+        return cv2.imdecode(np.frombuffer(frame.data, np.uint8), cv2.IMREAD_COLOR)
+    if frame.data.shape[2] == 4:
+        return cv2.cvtColor(frame.data, cv2.COLOR_BGRA2BGR)
+    return frame.data
+
+
+def _acquire_buffers(count):
+    buffers = []
+    for _ in range(count):
+        try:
+            buffers.append(_download_buffers.get_nowait())
+        except queue.Empty:
+            buffers.append(bytearray(BEST_FRAME_BUFFER_BYTES))
+    return buffers
+
+
+def _release_buffers(buffers):
+    if BEST_FRAME_BUFFERS <= 0:
+        return
+    for buffer in buffers:
+        try:
+            _download_buffers.put_nowait(buffer)
+        except queue.Full:
+            break
+
+
+def _download(frames_list, indices, bucket_name, refs=None):
+    """
+    Download the frames at `indices` that have no ring reference in one
+    get_objects_from_minio call, into pooled buffers.
+
+    Returns:
+        (data, buffers): bytes/memoryview/None per downloaded index, and the
+        buffers to release once the data has been decoded
+    """
+    wanted = [i for i in indices if not (refs and refs[i])]
+    if not wanted:
+        return {}, []
+    buffers = _acquire_buffers(len(wanted))
+    with metrics.span(SPAN_IMAGE_FETCH, source="minio"):
+        data = get_objects_from_minio([frames_list[i] for i in wanted], bucket_name=bucket_name,
+                                      buffers=buffers)
+    return dict(zip(wanted, data)), buffers
+
+
+def _decode(frame_path, frame_bytes, bucket_name, resize_factor, ring=None, frame_ref=None):
+    """
+    Decode and downscale one frame; returns (image, gray) or None.
+
+    Frames with a ring reference are read from the shared-memory ring; if the
+    slot has been overwritten the frame is fetched from MinIO instead.
+    """
+    img = None
+    if ring is not None and frame_ref:
+        img = _read_ring_frame(ring, frame_ref)
+        if img is None:
+            metrics.inc("frame_ring_misses")
+            logger.warning(f"Frame {frame_path} no longer in ring {ring.name}, falling back to MinIO")
+            with metrics.span(SPAN_IMAGE_FETCH, source="minio"):
+                frame_bytes = get_frames_from_minio(frame_path, bucket_name=bucket_name)
+    if img is None:
+        if not isinstance(frame_bytes, (bytes, bytearray, memoryview)):
+            logger.warning(f"Skipping frame {frame_path}: {frame_bytes}")
+            return None
+        img = cv2.imdecode(np.frombuffer(frame_bytes, np.uint8), cv2.IMREAD_COLOR)
+        if img is None:
+            return None
+    # Resize once — used for BOTH SSIM & motion
+    small = cv2.resize(img, None, fx=resize_factor, fy=resize_factor,
+                       interpolation=cv2.INTER_AREA)
+    return img, cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+
+
+def _fetch_chunk(frames_list, indices, bucket_name, refs=None):
+    """Start downloading a chunk in the background; returns the Future of _download."""
+    return _get_fetch_pool().submit(_download, frames_list, indices, bucket_name, refs)
+
+
+def _decode_chunk(frames_list, indices, download, bucket_name, resize_factor, ring=None, refs=None):
+    """Wait for a chunk's download and decode its frames concurrently; one (image, gray) or None per index."""
+    data, buffers = download.result()
+    try:
+        return list(_get_fetch_pool().map(
+            lambda i: _decode(frames_list[i], data.get(i), bucket_name, resize_factor,
+                              ring, refs[i] if refs else None),
+            indices))
+    finally:
+        _release_buffers(buffers)
+
+
+def _discard_chunk(download):
+    """Drop a prefetched chunk that will not be scored, returning its buffers once downloaded."""
+    def release(future):
+        if not future.cancelled() and future.exception() is None:
+            _release_buffers(future.result()[1])
+
+    if not download.cancel():
+        download.add_done_callback(release)
+
+
+def select_candidates(frames_list, frame_signals=None, k=BEST_FRAME_CANDIDATES,
+                      strategy=BEST_FRAME_STRATEGY):
+    """
+    Pick up to k frame indices worth full scoring, in temporal order.
+
+    "signals" ranks frames by a weighted sum of their per-frame signals, each
+    normalized by its maximum over the track; it falls back to "uniform" when
+    the signals are missing or do not line up with the frames.
+
+    Returns:
+        list: Sorted frame indices, or None to score every frame
+    """
+    count = len(frames_list)
+    if strategy == "all" or k <= 0 or count <= k + 1:
+        return None
+    if strategy == "signals" and frame_signals and len(frame_signals) == count:
+        peaks = {name: max((s.get(name, 0.0) for s in frame_signals), default=0.0) for name in SIGNAL_WEIGHTS}
+        ranks = [
+            sum(weight * s.get(name, 0.0) / peaks[name] for name, weight in SIGNAL_WEIGHTS.items() if peaks[name] > 0)
+            for s in frame_signals
+        ]
+        # The first frame has no predecessor to be scored against
+        ranked = sorted(range(1, count), key=lambda i: ranks[i], reverse=True)
+        return sorted(ranked[:k])
+    return sorted({int(round(x)) for x in np.linspace(1, count - 1, k)})
+
+
+def best_frame_box(frames_list, frame_signals, best_frame):
+    """Normalized object box of the chosen frame from its signals, or None when unknown."""
+    if not frame_signals or len(frame_signals) != len(frames_list) or best_frame not in frames_list:
+        return None
+    return frame_signals[frames_list.index(best_frame)].get("box")
+
+
+def ring_refs(frames_list, frame_slots=None, frame_ring=None):
+    """
+    Resolve the shared-memory ring references of a track's frames.
+
+    Returns:
+        (ring, refs): the ring reader and a (slot, seq) or None per frame, or
+        (None, None) when the frames are not in a ring readable on this host
+    """
+    if not frame_ring or not frame_slots or len(frame_slots) != len(frames_list):
+        return None, None
+    ring = get_ring_reader(frame_ring)
+    if ring is None:
+        logger.warning(f"Frame ring {frame_ring} not available, fetching frames from MinIO")
+        return None, None
+    return ring, [tuple(ref) if ref else None for ref in frame_slots]
+
+
+def _score_candidates(frames_list, candidates, bucket_name, alpha, resize_factor, motion_metric,
+                      ring=None, refs=None):
+    """Score each candidate frame against its temporal predecessor; returns (frame, score, image)."""
+    needed = sorted({i for c in candidates for i in (c - 1, c)})
+    download = _fetch_chunk(frames_list, needed, bucket_name, refs)
+    decoded = dict(zip(needed, _decode_chunk(frames_list, needed, download, bucket_name, resize_factor,
+                                             ring, refs)))
+
+    pairs = [c for c in candidates if decoded[c] is not None and decoded[c - 1] is not None]
+    if not pairs:
+        return None, -1, None
+    prev_grays = np.stack([decoded[c - 1][1] for c in pairs])
+    grays = np.stack([decoded[c][1] for c in pairs])
+    scores = (alpha * ssim_batch(prev_grays, grays)
+              + (1 - alpha) * motion_scores(prev_grays, grays, motion_metric))
+    best = int(np.argmax(scores))
+    return frames_list[pairs[best]], float(scores[best]), decoded[pairs[best]][0]
+
+
+def _chunks(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _score_sequential(frames_list, bucket_name, alpha, resize_factor, motion_metric, target_score,
+                      ring=None, refs=None):
+    """Score every frame against the previous one, chunk by chunk; returns (frame, score, image)."""
     best_frame = None
+    best_image = None
     best_score = -1
+    prev = None  # (path, image, gray) of the last decoded frame of the previous chunk
 
-    try:
-        for f in frames_list:
-            # Fetch → decode
-            frame_bytes = get_frames_from_minio(f, bucket_name=bucket_name)
-            img = cv2.imdecode(np.frombuffer(frame_bytes, np.uint8), cv2.IMREAD_COLOR)
-            if img is None:
-                continue
+    chunks = list(_chunks(range(len(frames_list)), max(1, BEST_FRAME_CHUNK_SIZE)))
+    pending = _fetch_chunk(frames_list, chunks[0], bucket_name, refs) if chunks else None
+
+    for index, chunk in enumerate(chunks):
+        download = pending
+        # Download the next chunk while this one is decoded and scored
+        pending = (_fetch_chunk(frames_list, chunks[index + 1], bucket_name, refs)
+                   if index + 1 < len(chunks) else None)
+        decoded = _decode_chunk(frames_list, chunk, download, bucket_name, resize_factor, ring, refs)
+
+        frames = [(frames_list[i], d[0], d[1]) for i, d in zip(chunk, decoded) if d is not None]
+        if prev is not None:
+            frames.insert(0, prev)
+        if not frames:
+            continue
+        prev = frames[-1]
+        if len(frames) < 2:
+            continue
 
-            # Resize once — used for BOTH SSIM & optical flow
-            small = cv2.resize(img, None, fx=resize_factor, fy=resize_factor,
-                               interpolation=cv2.INTER_AREA)
-            gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+        grays = np.stack([gray for _, _, gray in frames])
+        scores = (alpha * ssim_batch(grays[:-1], grays[1:])
+                  + (1 - alpha) * motion_scores(grays[:-1], grays[1:], motion_metric))
 
-            if prev_gray is not None:
-                # Optical flow on resized grayscale frames (FASTER)
-                motion = compute_optical_flow_mag_fast(prev_gray, gray)
-                motion_score = 1 / (1 + motion)
+        best_index = int(np.argmax(scores))
+        if scores[best_index] > best_score:
+            best_score = float(scores[best_index])
+            best_frame, best_image = frames[best_index + 1][0], frames[best_index + 1][1]
 
-                # SSIM (no full map → much faster)
-                ssim_score = ssim(prev_gray, gray)
+        if target_score > 0 and best_score >= target_score:
+            if pending is not None:
+                _discard_chunk(pending)
+            break
 
-                # Weighted score
-                stability_score = alpha * ssim_score + (1 - alpha) * motion_score
+    return best_frame, best_score, best_image
 
-                if stability_score > best_score:
-                    best_score = stability_score
-                    best_frame = f
 
-            prev_gray = gray
+def get_best_frame(frames_list, bucket_name="", alpha=0.5, resize_factor=0.2, return_image=False,
+                   motion_metric=BEST_FRAME_MOTION_METRIC, target_score=BEST_FRAME_TARGET_SCORE,
+                   frame_signals=None, candidates=BEST_FRAME_CANDIDATES, strategy=BEST_FRAME_STRATEGY,
+                   frame_slots=None, frame_ring=None):
+    """
+    Pick the most stable frame of a track (SSIM + motion against the previous frame).
+
+    Long tracks are first narrowed to `candidates` frames (see select_candidates),
+    each scored against its predecessor. Otherwise frames are downloaded one
+    chunk ahead of scoring (one bulk MinIO request per chunk, into reused
+    buffers), decoded on a thread pool, and each chunk is scored as a batch.
+    Scoring stops early once a frame reaches target_score (when > 0).
+    With frame_ring and frame_slots (one (slot, seq) or None per frame) frames
+    are read from the shared-memory ring instead of MinIO.
+
+    Returns:
+        (best_frame, score), or (best_frame, score, image) when return_image is True,
+        where image is the decoded full-resolution BGR frame so callers do not
+        have to fetch and decode it again.
+    """
+    try:
+        frames_list = list(frames_list)
+        ring, refs = ring_refs(frames_list, frame_slots, frame_ring)
+        selected = select_candidates(frames_list, frame_signals, candidates, strategy)
+        if selected is not None:
+            best_frame, best_score, best_image = _score_candidates(
+                frames_list, selected, bucket_name, alpha, resize_factor, motion_metric, ring, refs)
+        else:
+            best_frame, best_score, best_image = _score_sequential(
+                frames_list, bucket_name, alpha, resize_factor, motion_metric, target_score, ring, refs)
 
-        return best_frame, best_score if best_frame else (None, 0.0)
+        if not best_frame:
+            best_score = 0.0
+        if return_image:
+            return best_frame, best_score, best_image
+        return best_frame, best_score
 
     except Exception as e:
         raise FrameProcessingError(f"Error processing frames: {e}")
@@ -0,0 +1,146 @@
+"""Fast VLM input preprocessing: reduced-size JPEG decode into pooled RGB buffers."""
+import os
+import queue
+import struct
+import threading
+import weakref
+from typing import Optional, Tuple
+
+import cv2
+import numpy as np
+
+from utils.config import logger
+
+# Preallocated RGB input buffers kept for reuse; requests beyond the pool get a fresh array
+VLM_INPUT_BUFFERS = int(os.environ.get("VLM_INPUT_BUFFERS", "16"))
+
+# libjpeg can decode at 1/2, 1/4 and 1/8 scale directly from the DCT coefficients
+_REDUCED_DECODE = ((8, cv2.IMREAD_REDUCED_COLOR_8), (4, cv2.IMREAD_REDUCED_COLOR_4),
+                   (2, cv2.IMREAD_REDUCED_COLOR_2))
+# SOF markers carrying the frame size (SOF0-SOF15 except DHT, JPG and DAC)
+_SOF_MARKERS = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+
+
+def jpeg_size(data) -> Optional[Tuple[int, int]]:
+    """Return (width, height) from a JPEG's SOF header, or None if it is not a readable JPEG."""
+    view = memoryview(data)
+    if len(view) < 4 or view[0] != 0xFF or view[1] != 0xD8:
+        return None
+    pos = 2
+    while pos + 4 <= len(view):
+        if view[pos] != 0xFF:
+            return None
+        marker = view[pos + 1]
+        if marker == 0xFF:  # fill byte
+            pos += 1
+            continue
+        if marker in (0x01, 0xD0, 0xD1, 0xD2, 0xD3, 0xD4, 0xD5, 0xD6, 0xD7):
+            pos += 2
+            continue
+        (segment_length,) = struct.unpack(">H", view[pos + 2:pos + 4])
+        if marker in _SOF_MARKERS:
+            if pos + 9 > len(view):
+                return None
+            height, width = struct.unpack(">HH", view[pos + 5:pos + 9])
+            return width, height
+        pos += 2 + segment_length
+    return None
+
+
+def reduced_decode_flag(source_size, target_size) -> int:
+    """Largest libjpeg reduction whose output still covers target_size (IMREAD_COLOR if none)."""
+    width, height = source_size
+    target_w, target_h = target_size
+    for factor, flag in _REDUCED_DECODE:
+        if width // factor >= target_w and height // factor >= target_h:
+            return flag
+    return cv2.IMREAD_COLOR
+
+
+class InputBufferPool:
+    """
+    Pool of preallocated (H, W, 3) uint8 buffers for VLM input images.
+
+    Buffers are C-contiguous, so ov.Tensor(buffer, shared_memory=True) wraps
+    them without a copy. A buffer must be released only after the generation
+    that reads it has returned.
+    """
+
+    def __init__(self, size: Tuple[int, int], capacity: int = VLM_INPUT_BUFFERS):
+        self.shape = (size[1], size[0], 3)
+        self.capacity = max(0, capacity)
+        self._free = queue.LifoQueue()
+        # id -> buffer, held weakly: an entry dies with its array, and the identity check
+        # in release() keeps a new array that reuses a dead buffer's id from passing as owned
+        self._owned = weakref.WeakValueDictionary()
+        self._lock = threading.Lock()
+        # Per-thread BGR scratch for the resize step before the in-place RGB conversion
+        self._scratch = threading.local()
+
+    def acquire(self) -> np.ndarray:
+        try:
+            return self._free.get_nowait()
+        except queue.Empty:
+            pass
+        buffer = np.empty(self.shape, dtype=np.uint8)
+        with self._lock:
+            if len(self._owned) < self.capacity:
+                self._owned[id(buffer)] = buffer
+        return buffer
+
+    def release(self, buffer) -> None:
+        """Return a buffer to the pool; arrays the pool does not own are ignored."""
+        with self._lock:
+            owned = self._owned.get(id(buffer)) is buffer
+        if owned and getattr(buffer, "shape", None) == self.shape:
+            self._free.put(buffer)
+
+    def scratch(self) -> np.ndarray:
+        buffer = getattr(self._scratch, "bgr", None)
+        if buffer is None:
+            buffer = self._scratch.bgr = np.empty(self.shape, dtype=np.uint8)
+        return buffer
+
+    def from_bgr(self, image: np.ndarray) -> np.ndarray:
+        """Resize a decoded BGR image straight into a pooled RGB buffer."""
+        out = self.acquire()
+        target = (self.shape[1], self.shape[0])
+        if image.shape[:2] == self.shape[:2]:
+            cv2.cvtColor(image, cv2.COLOR_BGR2RGB, dst=out)
+        else:
+            scratch = self.scratch()
+            cv2.resize(image, target, dst=scratch, interpolation=cv2.INTER_AREA)
+            cv2.cvtColor(scratch, cv2.COLOR_BGR2RGB, dst=out)
+        return out
+
+    def from_jpeg(self, data) -> Optional[np.ndarray]:
+        """
+        Decode JPEG bytes into a pooled RGB buffer at the target size.
+
+        Decodes at the largest libjpeg DCT reduction that still covers the
+        target, so a 1080p frame for a 640x360 input decodes at 960x540.
+
+        Returns:
+            np.ndarray, or None if the data cannot be decoded
+        """
+        target = (self.shape[1], self.shape[0])
+        source_size = jpeg_size(data)
+        flag = reduced_decode_flag(source_size, target) if source_size else cv2.IMREAD_COLOR
+        image = cv2.imdecode(np.frombuffer(data, np.uint8), flag)
+        if image is None:
+            logger.error("Image preprocess - could not decode image (%d bytes)", len(data))
+            return None
+        return self.from_bgr(image)
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_input_buffer_pool(size: Tuple[int, int]) -> InputBufferPool:
+    """Get the shared InputBufferPool for a (width, height) input size."""
+    with _pools_lock:
+        pool = _pools.get(size)
+        if pool is None:
+            pool = _pools[size] = InputBufferPool(size)
+    return pool
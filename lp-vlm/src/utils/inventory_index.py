@@ -0,0 +1,146 @@
+"""Precomputed inventory index for exact, substring and fuzzy item lookups."""
+import os
+import re
+from collections import defaultdict
+from typing import Iterable, List, Optional
+
+from utils.config import logger
+
+# Minimum trigram similarity (0-1) for fuzzy label matches; 0 disables fuzzy matching
+INVENTORY_FUZZY_MIN_SCORE = float(os.environ.get("INVENTORY_FUZZY_MIN_SCORE", "0"))
+INVENTORY_FUZZY_MAX_RESULTS = int(os.environ.get("INVENTORY_FUZZY_MAX_RESULTS", "10"))
+
+NGRAM_SIZE = 3
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def normalize_name(name: str) -> str:
+    """Lowercase and strip an item name, the form used for inventory membership."""
+    return name.strip().lower()
+
+
+def char_ngrams(text: str, n: int = NGRAM_SIZE) -> set:
+    """Return the set of character n-grams of text (the whole text if shorter than n)."""
+    if len(text) < n:
+        return {text} if text else set()
+    return {text[i:i + n] for i in range(len(text) - n + 1)}
+
+
+class InventoryIndex:
+    """
+    Inventory item names with lookup structures built once at load time.
+
+    - exact: normalized name -> item, for membership checks
+    - tokens: word token -> item ids, for fuzzy candidate generation
+    - ngrams: character trigram -> item ids; any item containing a label also
+      contains every trigram of the label, so the rarest trigram's postings
+      bound the substring candidates
+
+    Lookups cost roughly the size of the smallest posting list instead of a
+    scan of the whole inventory.
+    """
+
+    def __init__(self, items: Iterable[str]):
+        self.items: List[str] = [item for item in items if isinstance(item, str)]
+        # item.lower() without strip keeps the original substring semantics of
+        # `label in item.lower() or item.lower() in label`
+        self._lowered = [item.lower() for item in self.items]
+        self._exact = {}
+        self._by_lowered = defaultdict(list)
+        self._tokens = defaultdict(list)
+        self._ngrams = defaultdict(list)
+        for item_id, lowered in enumerate(self._lowered):
+            self._exact.setdefault(normalize_name(lowered), self.items[item_id])
+            self._by_lowered[lowered].append(item_id)
+            for token in set(_TOKEN_RE.findall(lowered)):
+                self._tokens[token].append(item_id)
+            for gram in char_ngrams(lowered):
+                self._ngrams[gram].append(item_id)
+        self._max_len = max((len(lowered) for lowered in self._lowered), default=0)
+        logger.info("Inventory index built: %d items, %d tokens, %d trigrams",
+                    len(self.items), len(self._tokens), len(self._ngrams))
+
+    def __len__(self):
+        return len(self.items)
+
+    def __contains__(self, name):
+        return self.contains(name)
+
+    def contains(self, name: str) -> bool:
+        """True if name matches an inventory item after normalization."""
+        return isinstance(name, str) and normalize_name(name) in self._exact
+
+    def match_label(self, label: str) -> List[str]:
+        """
+        Return inventory items where the label is a substring of the item or the
+        item is a substring of the label (case-insensitive), in inventory order.
+        """
+        if not label:
+            return []
+        label_lower = label.strip().lower()
+        if not label_lower:
+            return list(self.items)
+        matched = set(self._items_containing(label_lower))
+        matched.update(self._items_within(label_lower))
+        matched.update(self._by_lowered.get("", ()))
+        return [self.items[item_id] for item_id in sorted(matched)]
+
+    def fuzzy_match(self, label: str, min_score: float = INVENTORY_FUZZY_MIN_SCORE,
+                    max_results: int = INVENTORY_FUZZY_MAX_RESULTS) -> List[str]:
+        """
+        Return items whose trigram similarity (Jaccard) to the label is at least
+        min_score, best first. Candidates are items sharing a word token or a
+        trigram with the label.
+        """
+        label_lower = label.strip().lower() if label else ""
+        if not label_lower or min_score <= 0:
+            return []
+        label_grams = char_ngrams(label_lower)
+        counts = defaultdict(int)
+        for gram in label_grams:
+            for item_id in self._ngrams.get(gram, ()):
+                counts[item_id] += 1
+        for token in set(_TOKEN_RE.findall(label_lower)):
+            for item_id in self._tokens.get(token, ()):
+                counts.setdefault(item_id, 0)
+        scored = []
+        for item_id, shared in counts.items():
+            union = len(label_grams) + len(char_ngrams(self._lowered[item_id])) - shared
+            score = shared / union if union else 0.0
+            if score >= min_score:
+                scored.append((-score, item_id))
+        scored.sort()
+        return [self.items[item_id] for _, item_id in scored[:max_results]]
+
+    def match_or_fuzzy(self, label: str) -> List[str]:
+        """Substring matches, falling back to fuzzy matches when enabled and nothing matched."""
+        matched = self.match_label(label)
+        if not matched and INVENTORY_FUZZY_MIN_SCORE > 0:
+            matched = self.fuzzy_match(label)
+        return matched
+
+    def _items_containing(self, label_lower: str) -> Iterable[int]:
+        # label in item: verify only items holding the label's rarest trigram
+        if len(label_lower) < NGRAM_SIZE:
+            # Short labels can sit anywhere inside a trigram; fall back to a scan
+            return (i for i, lowered in enumerate(self._lowered) if label_lower in lowered)
+        postings = [self._ngrams.get(gram) for gram in char_ngrams(label_lower)]
+        if any(p is None for p in postings):
+            return ()
+        rarest = min(postings, key=len)
+        return (i for i in rarest if label_lower in self._lowered[i])
+
+    def _items_within(self, label_lower: str) -> Iterable[int]:
+        # item in label: every such item equals some substring of the (short) label
+        limit = min(len(label_lower), self._max_len)
+        for start in range(len(label_lower)):
+            for end in range(start + 1, min(len(label_lower), start + limit) + 1):
+                yield from self._by_lowered.get(label_lower[start:end], ())
+
+
+def build_inventory_index(items) -> Optional[InventoryIndex]:
+    """Build an InventoryIndex from a loaded inventory list, or None if it is not a list."""
+    if not isinstance(items, list):
+        logger.error("Inventory index - expected a list of item names, got %s", type(items).__name__)
+        return None
+    return InventoryIndex(items)
@@ -0,0 +1,78 @@
+"""Incremental detection of a complete JSON array in streamed VLM output."""
+import json
+from typing import Any, Optional
+
+_OPENERS = {"[": "]", "{": "}"}
+
+
+class JsonArrayScanner:
+    """
+    Scan generated text chunk by chunk and report when a top-level JSON array
+    is complete and valid.
+
+    Text outside JSON values is skipped. A top-level object (e.g. {"objects": [...]})
+    is tracked as a whole but never ends the scan, since parse_vlm_output
+    prefers an array that may follow it. A bracketed span that is not valid
+    JSON (e.g. "[note]" in prose) is dropped and scanning continues after it.
+    """
+
+    def __init__(self):
+        self.text = []
+        self.result: Optional[Any] = None
+        self._root_start = None  # offset of the current top-level opener
+        self._stack = []
+        self._in_string = False
+        self._escaped = False
+        self._length = 0
+
+    @property
+    def done(self) -> bool:
+        return self.result is not None
+
+    def feed(self, chunk: str) -> bool:
+        """
+        Consume the next chunk of generated text.
+
+        Returns:
+            bool: True once a complete, valid top-level array has been seen
+        """
+        if self.done or not chunk:
+            return self.done
+        offset = self._length
+        self.text.append(chunk)
+        self._length += len(chunk)
+        for index, char in enumerate(chunk, offset):
+            if not self._stack:
+                if char in _OPENERS:
+                    self._root_start = index
+                    self._stack.append(_OPENERS[char])
+                continue
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+                continue
+            if char == '"':
+                self._in_string = True
+            elif char in _OPENERS:
+                self._stack.append(_OPENERS[char])
+            elif char == self._stack[-1]:
+                self._stack.pop()
+                if not self._stack and self._close_root(index):
+                    return True
+        return False
+
+    def _close_root(self, end: int) -> bool:
+        full_text = "".join(self.text)
+        self.text = [full_text]
+        candidate = full_text[self._root_start:end + 1]
+        if not candidate.startswith("["):
+            return False
+        try:
+            self.result = json.loads(candidate)
+        except ValueError:
+            return False
+        return True
@@ -0,0 +1,52 @@
+"""Rolling latency statistics for pipeline stages."""
+import threading
+import time
+from collections import deque
+
+
+class LatencyStats:
+    """
+    Thread-safe rolling window of latency samples (seconds).
+
+    Keeps the last `window` samples for percentiles plus all-time count/sum.
+    """
+
+    def __init__(self, name: str, window: int = 1000):
+        self.name = name
+        self._samples = deque(maxlen=window)
+        self._timestamps = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self.count = 0
+        self.total = 0.0
+
+    def record(self, seconds: float) -> None:
+        with self._lock:
+            self._samples.append(seconds)
+            self._timestamps.append(time.monotonic())
+            self.count += 1
+            self.total += seconds
+
+    def percentile(self, pct: float) -> float:
+        """Return the pct-th percentile (0-100) of the window, or 0.0 if empty."""
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples:
+            return 0.0
+        index = min(len(samples) - 1, max(0, int(round(pct / 100.0 * (len(samples) - 1)))))
+        return samples[index]
+
+    def rate_per_minute(self, horizon_s: float = 60.0) -> float:
+        """Return samples recorded per minute over the last horizon_s seconds."""
+        cutoff = time.monotonic() - horizon_s
+        with self._lock:
+            recent = sum(1 for ts in self._timestamps if ts >= cutoff)
+        return recent * 60.0 / horizon_s
+
+    def summary(self) -> dict:
+        mean = self.total / self.count if self.count else 0.0
+        return {
+            "count": self.count,
+            "mean_ms": round(mean * 1000, 1),
+            "p50_ms": round(self.percentile(50) * 1000, 1),
+            "p95_ms": round(self.percentile(95) * 1000, 1),
+        }
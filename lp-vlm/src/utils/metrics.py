@@ -0,0 +1,278 @@
+"""Pipeline instrumentation: named spans, counters and gauges with Prometheus/OpenMetrics export."""
+import functools
+import os
+import threading
+import time
+from bisect import bisect_left
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Tuple
+
+from utils.config import logger
+
+# Recording is cheap enough to stay on (see benchmarks/bench_metrics.py); 0 turns every call into a no-op
+METRICS_ENABLED = os.environ.get("METRICS_ENABLED", "1") == "1"
+# Prometheus text endpoint (GET /metrics); 0 disables the HTTP exporter
+METRICS_PORT = int(os.environ.get("METRICS_PORT", "9464"))
+# Interface the endpoint listens on; loopback unless the deployment opts in (e.g. 0.0.0.0 in a container)
+METRICS_HOST = os.environ.get("METRICS_HOST", "127.0.0.1")
+# OpenMetrics file rewritten every METRICS_FILE_INTERVAL_S seconds; empty disables the file exporter
+METRICS_FILE = os.environ.get("METRICS_FILE", "")
+METRICS_FILE_INTERVAL_S = float(os.environ.get("METRICS_FILE_INTERVAL_S", "10"))
+
+METRIC_PREFIX = "lp_vlm"
+# Span duration buckets (seconds), from sub-ms queue hops up to slow VLM generations
+SPAN_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# Span names used across the pipeline
+SPAN_RABBIT_RECEIVE = "rabbit_receive"
+SPAN_BEST_FRAME = "best_frame"
+SPAN_PRESIGN = "presign"
+SPAN_IMAGE_FETCH = "image_fetch"
+SPAN_VLM_PREFILL = "vlm_prefill"
+SPAN_VLM_DECODE = "vlm_decode"
+SPAN_VLM_GENERATE = "vlm_generate"
+SPAN_AGENT = "agent"
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _label_key(labels: Dict[str, object]) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items())) if labels else ()
+
+
+def _format_labels(key: LabelKey, extra: Tuple[Tuple[str, str], ...] = ()) -> str:
+    pairs = key + extra
+    if not pairs:
+        return ""
+    escaped = (f'{k}="{v.replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34))}"' for k, v in pairs)
+    return "{" + ",".join(escaped) + "}"
+
+
+def _format_value(value: float) -> str:
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class _Histogram:
+    __slots__ = ("counts", "sum", "count")
+
+    def __init__(self):
+        self.counts = [0] * (len(SPAN_BUCKETS) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+
+class _Span:
+    """Times a block and records it as a span observation on exit."""
+    __slots__ = ("_registry", "_name", "_labels", "_start")
+
+    def __init__(self, registry, name, labels):
+        self._registry = registry
+        self._name = name
+        self._labels = labels
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._registry.observe(self._name, time.perf_counter() - self._start, **self._labels)
+        return False
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+class MetricsRegistry:
+    """
+    Thread-safe store of span histograms, counters and gauges.
+
+    Spans share one histogram family (lp_vlm_span_seconds) labelled by span
+    name; gauges are callbacks evaluated only when metrics are rendered, so
+    queue depths cost nothing on the hot path.
+    """
+
+    def __init__(self, enabled: bool = METRICS_ENABLED):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._spans: Dict[Tuple[str, LabelKey], _Histogram] = {}
+        self._counters: Dict[Tuple[str, LabelKey], float] = {}
+        self._gauges: Dict[Tuple[str, LabelKey], Callable[[], float]] = {}
+
+    def span(self, name: str, **labels):
+        """Context manager timing a block as span `name`."""
+        if not self.enabled:
+            return _NOOP_SPAN
+        return _Span(self, name, labels)
+
+    def timed(self, name: str, **labels):
+        """Decorator timing every call of a function as span `name`."""
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.span(name, **labels):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def observe(self, name: str, seconds: float, **labels) -> None:
+        """Record one span duration in seconds."""
+        if not self.enabled:
+            return
+        bucket = bisect_left(SPAN_BUCKETS, seconds)
+        key = (name, _label_key(labels))
+        with self._lock:
+            histogram = self._spans.get(key)
+            if histogram is None:
+                histogram = self._spans[key] = _Histogram()
+            histogram.counts[bucket] += 1
+            histogram.sum += seconds
+            histogram.count += 1
+
+    def inc(self, name: str, amount: float = 1, **labels) -> None:
+        """Increase counter `name` (exported as <name>_total)."""
+        if not self.enabled:
+            return
+        key = (name, _label_key(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def gauge(self, name: str, read: Callable[[], float], **labels) -> None:
+        """Register (or replace) gauge `name`, read by calling `read` at render time."""
+        with self._lock:
+            self._gauges[(name, _label_key(labels))] = read
+
+    def span_totals(self) -> Dict[str, Tuple[int, float]]:
+        """Return span name -> (observation count, total seconds), summed over labels."""
+        totals: Dict[str, Tuple[int, float]] = {}
+        with self._lock:
+            for (name, _), histogram in self._spans.items():
+                count, total = totals.get(name, (0, 0.0))
+                totals[name] = (count + histogram.count, total + histogram.sum)
+        return totals
+
+    def render(self, openmetrics: bool = False) -> str:
+        """Render all metrics in Prometheus text format, or OpenMetrics when openmetrics is True."""
+        with self._lock:
+            spans = {key: (list(h.counts), h.sum, h.count) for key, h in self._spans.items()}
+            counters = dict(self._counters)
+            gauges = dict(self._gauges)
+
+        lines = []
+        family = f"{METRIC_PREFIX}_span_seconds"
+        if spans:
+            lines.append(f"# HELP {family} Duration of pipeline spans.")
+            lines.append(f"# TYPE {family} histogram")
+            for (name, key), (counts, total, count) in sorted(spans.items()):
+                labels = (("span", name),) + key
+                cumulative = 0
+                for bound, bucket_count in zip(SPAN_BUCKETS + (float("inf"),), counts):
+                    cumulative += bucket_count
+                    le = "+Inf" if bound == float("inf") else repr(bound)
+                    lines.append(f"{family}_bucket{_format_labels(labels, (('le', le),))} {cumulative}")
+                lines.append(f"{family}_sum{_format_labels(labels)} {repr(total)}")
+                lines.append(f"{family}_count{_format_labels(labels)} {count}")
+
+        for name in sorted({name for name, _ in counters}):
+            metric = f"{METRIC_PREFIX}_{name}"
+            lines.append(f"# TYPE {metric} counter")
+            for (counter_name, key), value in sorted(counters.items()):
+                if counter_name == name:
+                    lines.append(f"{metric}_total{_format_labels(key)} {_format_value(value)}")
+
+        for name in sorted({name for name, _ in gauges}):
+            metric = f"{METRIC_PREFIX}_{name}"
+            lines.append(f"# TYPE {metric} gauge")
+            for (gauge_name, key), read in sorted(gauges.items(), key=lambda item: item[0]):
+                if gauge_name != name:
+                    continue
+                try:
+                    value = read()
+                except Exception as e:
+                    logger.debug("Metrics - gauge %s failed: %s", name, e)
+                    continue
+                lines.append(f"{metric}{_format_labels(key)} {_format_value(value)}")
+
+        if openmetrics:
+            lines.append("# EOF")
+        return "\n".join(lines) + "\n"
+
+
+metrics = MetricsRegistry()
+
+
+# ============================================================================
+# EXPORTERS
+# ============================================================================
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?", 1)[0] != "/metrics":
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        openmetrics = "application/openmetrics-text" in self.headers.get("Accept", "")
+        body = metrics.render(openmetrics=openmetrics).encode("utf-8")
+        content_type = ("application/openmetrics-text; version=1.0.0; charset=utf-8" if openmetrics
+                        else "text/plain; version=0.0.4; charset=utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def _write_metrics_file(path: str) -> None:
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        f.write(metrics.render(openmetrics=True))
+    os.replace(tmp_path, path)
+
+
+def _file_exporter_loop(path: str, interval_s: float) -> None:
+    while True:
+        time.sleep(interval_s)
+        try:
+            _write_metrics_file(path)
+        except Exception as e:
+            logger.error("Metrics - failed to write %s: %s", path, e)
+
+
+_exporters_started = False
+_exporters_lock = threading.Lock()
+
+
+def start_metrics_exporters(port: int = METRICS_PORT, path: str = METRICS_FILE,
+                            interval_s: float = METRICS_FILE_INTERVAL_S, host: str = METRICS_HOST) -> None:
+    """Start the HTTP endpoint and/or periodic OpenMetrics file writer (once per process)."""
+    global _exporters_started
+    with _exporters_lock:
+        if _exporters_started or not metrics.enabled:
+            return
+        _exporters_started = True
+    if port > 0:
+        try:
+            server = ThreadingHTTPServer((host, port), _MetricsHandler)
+            server.daemon_threads = True
+            threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+            bound_host, bound_port = server.server_address[:2]
+            logger.info("Metrics - serving http://%s:%d/metrics", bound_host, bound_port)
+        except OSError as e:
+            logger.error("Metrics - could not listen on %s:%d: %s", host, port, e)
+    if path:
+        threading.Thread(target=_file_exporter_loop, args=(path, max(1.0, interval_s)),
+                         name="metrics-file", daemon=True).start()
+        logger.info("Metrics - writing %s every %.0f s", path, interval_s)
@@ -1,3 +1,5 @@
+from utils.inventory_index import InventoryIndex
+
 ITEMS_IN_PLASTIC_BOX_VLM_PROMPT = """
                                     Analyze this image captured at a grocery checkout counter.
                                     Focus specifically on any grocery items that are stored **inside transparent plastic boxes or containers**.
@@ -131,33 +133,80 @@ There may be spelling mistakes or additional prepositions from above but the ite
   - Return only a single JSON object in an array."""
 
 
-def generate_inventory_prompt(detected_label, inventory_list):
+# AGENT_PROMPT extended to validate a list of item names in one generation
+AGENT_BATCH_PROMPT = AGENT_PROMPT + """
+
+3) Multiple items:
+  - The input is a JSON list of item names. Validate each name independently using the rules above.
+  - Return a JSON array with exactly one object per input name, in the same order, and add an "input" field holding the original name, e.g.
+     [{"input": "coca cola 500ml", "item_name": "Coca-Cola Bottle Medium", "match": true}]
+  - This replaces the single-object rule above."""
+
+
+# Static instructions for inventory prompts. Kept ahead of the item-specific part
+# so the VLM can reuse the prefilled prefix across calls (prefix caching).
+INVENTORY_PROMPT_PREFIX = (
+    "Identify which of the candidate items below is visible in this image. "
+    "Items may be inside transparent plastic bags, containers, or packaging, or partially occluded. "
+    "Reply only with strict JSON: "
+    '[{"item_name": "item name here"}]. '
+    'If none of the candidates is visible, reply with [{"item_name": "None"}].'
+)
+
+# Introduces the item-specific candidate list that follows INVENTORY_PROMPT_PREFIX
+INVENTORY_CANDIDATES_LABEL = "Candidate items: "
+
+# Prompts whose static part can be cached; the remainder of a prompt is the per-call suffix
+STATIC_PROMPT_PREFIXES = (INVENTORY_PROMPT_PREFIX, AGENT_BATCH_PROMPT, AGENT_PROMPT, COMMON_PROMPT)
+
+
+def split_static_prefix(prompt):
+    """Split a prompt into (static_prefix, item_specific_suffix).
+
+    Returns ("", prompt) when the prompt does not start with a known static prefix.
+    """
+    for prefix in STATIC_PROMPT_PREFIXES:
+        if prompt.startswith(prefix):
+            return prefix, prompt[len(prefix):]
+    return "", prompt
+
+
+def generate_inventory_prompt(detected_label, inventory):
     """Generate a dynamic VLM prompt narrowed to inventory items matching the detected label.
 
+    The static instructions come first and only the candidate list varies per call.
+
     Args:
         detected_label: Object label from the detection model (e.g. "bottle").
-        inventory_list: List of inventory item names.
+        inventory: InventoryIndex, or a plain list of inventory item names.
 
     Returns:
         A targeted prompt string, or None if no inventory items match.
     """
-    if not detected_label or not inventory_list:
+    if not detected_label or not inventory:
         return None
-    label_lower = detected_label.strip().lower()
-    matched_items = [
-        item for item in inventory_list
-        if label_lower in item.lower() or item.lower() in label_lower
-    ]
+    if isinstance(inventory, InventoryIndex):
+        matched_items = inventory.match_or_fuzzy(detected_label)
+    else:
+        label_lower = detected_label.strip().lower()
+        matched_items = [
+            item for item in inventory
+            if label_lower in item.lower() or item.lower() in label_lower
+        ]
     if not matched_items:
         return None
     items_list = ", ".join(matched_items)
-    return (
-        f"Which of the following items is visible in this image: {items_list}? "
-        f"Items may appear inside transparent plastic bags, containers, or packaging. "
-        f"Identify the item even if it is wrapped or partially occluded by packaging. "
-        f"Reply only with names of detected items in strict JSON format: "
-        f'[{{"item_name": "item name here"}}]. '
-        f'If no items from the list are visible, reply with [{{"item_name": "None"}}].'
-    )
+    return f"{INVENTORY_PROMPT_PREFIX}\n{INVENTORY_CANDIDATES_LABEL}{items_list}"
+
+
+def is_inventory_prompt(prompt):
+    """Return True if prompt was built by generate_inventory_prompt."""
+    return bool(prompt) and prompt.startswith(INVENTORY_PROMPT_PREFIX)
 
 
+def inventory_prompt_candidates(prompt):
+    """Return the candidate item names of an inventory prompt ([] for other prompts)."""
+    if not is_inventory_prompt(prompt):
+        return []
+    _, _, items_list = prompt.partition(INVENTORY_CANDIDATES_LABEL)
+    return [item.strip() for item in items_list.split(",") if item.strip()]
@@ -1,37 +1,112 @@
-import pika
 import json
-import queue
-import time
+import os
+import threading
 from datetime import datetime
-from .vlm import call_vlm
 from .rabbitmq_client import get_rabbitmq_connection
-import threading
-from concurrent.futures import ThreadPoolExecutor
-from .config import logger
-            
+from .config import logger, VLM_WORKERS, VLM_MAX_BATCH
+from .metrics import metrics, SPAN_RABBIT_RECEIVE
+
+# Unacknowledged messages the broker may hand this consumer; a batch in work plus
+# one forming per VLM worker keeps the VLM busy while the rest waits in RabbitMQ
+OD_PREFETCH = int(os.environ.get("OD_PREFETCH", str(2 * VLM_WORKERS * VLM_MAX_BATCH)))
+
+# Key under which each parsed message carries its AMQP delivery tag
+DELIVERY_TAG_KEY = "delivery_tag"
+
+
 class ODConsumer:
-    def __init__(self,message_queue,user_name, password):
-        self.message_queue = message_queue 
+    """
+    Consumes object detection messages with manual acknowledgements.
+
+    Each message is parsed once and put on message_queue as a dict carrying its
+    delivery tag; the pipeline calls ack(payload) once the item is fully
+    processed. At most `prefetch` messages are unacknowledged at a time, so a
+    slow VLM holds messages back in the broker instead of growing in-process
+    queues, and messages not yet acked are redelivered if the consumer dies.
+    """
+
+    def __init__(self,message_queue,user_name, password, prefetch=OD_PREFETCH):
+        self.message_queue = message_queue
         self.user_name = user_name
         self.password = password
+        self.prefetch = max(1, prefetch)
+        self._connection = None
+        self._channel = None
+        self._unacked = set()
+        self._lock = threading.Lock()
+        # Set once the consumer is registered with the broker
+        self.connected = threading.Event()
 
     # RabbitMQ consumer running in background
     def rabbitmq_consumer(self):
         connection = get_rabbitmq_connection(self.user_name, self.password)
         channel = connection.channel()
         channel.queue_declare(queue="object_detection", durable=True)
+        channel.basic_qos(prefetch_count=self.prefetch)
+        self._connection, self._channel = connection, channel
 
         def callback(ch, method, properties, body):
-            payload = json.loads(body)
+            with metrics.span(SPAN_RABBIT_RECEIVE):
+                handle(ch, method, body)
+
+        def handle(ch, method, body):
+            try:
+                payload = json.loads(body)
+                if not isinstance(payload, dict):
+                    raise ValueError(f"expected a JSON object, got {type(payload).__name__}")
+            except Exception as e:
+                logger.error(f"OD Consumer - Rejecting malformed message: {e}")
+                ch.basic_reject(delivery_tag=method.delivery_tag, requeue=False)
+                metrics.inc("od_messages_rejected")
+                return
             timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
             logger.info(f"OD Consumer - Received object_detection message at {timestamp}: {payload}")
-            self.message_queue.put(json.dumps(payload),block=False)
-
+            payload[DELIVERY_TAG_KEY] = method.delivery_tag
+            with self._lock:
+                self._unacked.add(method.delivery_tag)
+            self.message_queue.put(payload)
+            metrics.inc("od_messages_received")
 
-        channel.basic_consume(queue="object_detection", on_message_callback=callback, auto_ack=True)
+        logger.info(f"OD Consumer - Consuming with manual acks, prefetch={self.prefetch}")
+        channel.basic_consume(queue="object_detection", on_message_callback=callback, auto_ack=False)
+        self.connected.set()
         channel.start_consuming()
-        
+
     def start_consumer(self):
         threading.Thread(target=self.rabbitmq_consumer, daemon=True).start()
-        
-        
+
+    def ack(self, payload):
+        """
+        Acknowledge a message once it is fully processed; safe to call from any
+        thread and more than once for the same message.
+
+        Args:
+            payload: Parsed message as put on message_queue
+        """
+        self._settle(payload, "ack", lambda tag: self._channel.basic_ack(delivery_tag=tag))
+
+    def reject(self, payload):
+        """
+        Reject a message that failed processing without requeueing it (the
+        broker drops it or dead-letters it); same threading rules as ack.
+
+        Args:
+            payload: Parsed message as put on message_queue
+        """
+        self._settle(payload, "reject",
+                     lambda tag: self._channel.basic_reject(delivery_tag=tag, requeue=False))
+        metrics.inc("od_messages_rejected")
+
+    def _settle(self, payload, action, settle):
+        delivery_tag = payload.get(DELIVERY_TAG_KEY) if isinstance(payload, dict) else None
+        if delivery_tag is None:
+            return
+        with self._lock:
+            if delivery_tag not in self._unacked:
+                return
+            self._unacked.discard(delivery_tag)
+        try:
+            # pika channels are not thread-safe; run the ack/reject on the connection's thread
+            self._connection.add_callback_threadsafe(lambda: settle(delivery_tag))
+        except Exception as e:
+            logger.error(f"OD Consumer - Failed to {action} message {delivery_tag}: {e}")
@@ -1,10 +1,12 @@
 import os
 import sys
 import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 import json
 import io
-from typing import Tuple
+from typing import List, Optional, Sequence, Tuple, Union
 from utils.config import MINIO_HOST, logger
 from datetime import timedelta
 
@@ -15,6 +17,16 @@ MINIO_BUCKET = "loss-prevention-enhanced-vlm-results"
 MINIO_API_HOST_PORT=os.environ.get("MINIO_API_HOST_PORT",4000)
 MINIO_CONSOLE_HOST_PORT=os.environ.get("MINIO_CONSOLE_HOST_PORT",4001)
 MINIO_HOST=f"{os.environ.get('LP_IP','localhost')}:{MINIO_API_HOST_PORT}"
+MINIO_ENDPOINT = os.environ.get("MINIO_ENDPOINT", "minio-service:80")
+# Setting the region skips the bucket-location lookup before the first request to each bucket
+MINIO_REGION = os.environ.get("MINIO_REGION") or None
+# Pooled HTTP connections shared by all MinIO calls, and workers for bulk fetches
+MINIO_MAX_POOL_SIZE = int(os.environ.get("MINIO_MAX_POOL_SIZE", "16"))
+MINIO_FETCH_WORKERS = int(os.environ.get("MINIO_FETCH_WORKERS", "8"))
+
+_minio_client_lock = threading.Lock()
+_fetch_pool = None
+_fetch_pool_lock = threading.Lock()
 
 def get_presigned_url( file_path: str, bucket_name: str) -> str:
     """
@@ -65,26 +77,45 @@ def get_presigned_url( file_path: str, bucket_name: str) -> str:
 
 def get_minio_client():
     global _minio_client
-    if _minio_client is None:
-        try:
-            from minio import Minio
-        except ImportError:
-            logger.error(
-                "MinIO Python SDK is not installed. Please install it with:\n"
-                "  pip install minio"
+    with _minio_client_lock:
+        if _minio_client is None:
+            try:
+                from minio import Minio
+            except ImportError:
+                logger.error(
+                    "MinIO Python SDK is not installed. Please install it with:\n"
+                    "  pip install minio"
+                )
+                return None
+            import urllib3
+            logger.info(f"############ MINIO_HOST =================={MINIO_HOST}")
+            MINIO_ACCESS_KEY = os.environ.get("MINIO_ROOT_USER", "user")
+            MINIO_SECRET_KEY = os.environ.get("MINIO_ROOT_PASSWORD", "passwd")
+            # One pool sized for concurrent fetches, so bulk reads reuse connections instead of reconnecting
+            http_client = urllib3.PoolManager(
+                maxsize=MINIO_MAX_POOL_SIZE,
+                block=True,
+                timeout=urllib3.Timeout(connect=5, read=30),
+                retries=urllib3.Retry(total=3, backoff_factor=0.2, status_forcelist=[500, 502, 503, 504]),
             )
-            return None
-        logger.info(f"############ MINIO_HOST =================={MINIO_HOST}")
-        MINIO_ENDPOINT = "minio-service:80"
-        MINIO_ACCESS_KEY = os.environ.get("MINIO_ROOT_USER", "user")
-        MINIO_SECRET_KEY = os.environ.get("MINIO_ROOT_PASSWORD", "passwd")
-        _minio_client = Minio(
-            MINIO_ENDPOINT,
-            access_key=MINIO_ACCESS_KEY,
-            secret_key=MINIO_SECRET_KEY,
-            secure=False
-        )
-    return _minio_client
+            _minio_client = Minio(
+                MINIO_ENDPOINT,
+                access_key=MINIO_ACCESS_KEY,
+                secret_key=MINIO_SECRET_KEY,
+                secure=False,
+                region=MINIO_REGION,
+                http_client=http_client
+            )
+        return _minio_client
+
+
+def _get_fetch_pool():
+    global _fetch_pool
+    with _fetch_pool_lock:
+        if _fetch_pool is None:
+            _fetch_pool = ThreadPoolExecutor(max_workers=max(1, MINIO_FETCH_WORKERS),
+                                             thread_name_prefix="minio-fetch")
+    return _fetch_pool
 
 def save_to_minio(use_case:str, data_type: str, data, bucket: str = None) -> Tuple[bool, str]:  
     """
@@ -201,28 +232,90 @@ def get_order_json_from_minio(order_id: str, bucket: str = None) -> dict:
         logger.error(f"Failed to fetch {filename} from {target_bucket}: {e}")
         return {"error": f"Failed to fetch order: {e}"}
     
-def get_frames_from_minio(minio_path,bucket_name=None) -> dict:
+def fetch_object(minio_path: str, bucket_name: str = None, offset: int = 0, length: int = 0,
+                 buffer: Union[bytearray, memoryview, None] = None) -> Union[bytes, memoryview]:
     """
-    Download and return the JSON (excluding video_id) from MinIO for the given order_id.
+    Fetch one object (or a byte range of it) from MinIO.
+
+    Args:
+        minio_path: Object key
+        bucket_name: Bucket (defaults to MINIO_BUCKET)
+        offset: First byte to read
+        length: Number of bytes to read (0 = to the end of the object)
+        buffer: Optional preallocated buffer; the body is streamed into it when it fits
+
+    Returns:
+        bytes, or a memoryview over the filled part of buffer
+
+    Raises:
+        Exception: on client or transfer errors
     """
     client = get_minio_client()
     if client is None:
-        logger.error("MinIO client not available")
-        return {"error": "MinIO client not available"}
+        raise RuntimeError("MinIO client not available")
     if not minio_path:
-        logger.error("No minio_path provided")
-        return {"error": "No minio_path provided"}
-
-    # Use provided bucket or default to MINIO_BUCKET
+        raise ValueError("No minio_path provided")
     target_bucket = bucket_name if bucket_name is not None else MINIO_BUCKET
 
+    response = client.get_object(target_bucket, minio_path, offset=offset, length=length)
     try:
-        response = client.get_object(target_bucket, minio_path)
-        image_bytes = response.read()
+        size = int(response.headers.get("Content-Length", -1))
+        if buffer is None or size < 0 or size > len(buffer):
+            return response.read()
+        view = memoryview(buffer)[:size]
+        filled = 0
+        while filled < size:
+            read = response.readinto(view[filled:])
+            if not read:
+                break
+            filled += read
+        return view[:filled]
+    finally:
         response.close()
         response.release_conn()
-        return image_bytes
-    
+
+
+def get_objects_from_minio(minio_paths: Sequence[str], bucket_name: str = None, offset: int = 0,
+                           length: int = 0, buffers: Optional[Sequence[bytearray]] = None
+                           ) -> List[Union[bytes, memoryview, None]]:
+    """
+    Fetch several objects concurrently over the pooled client.
+
+    At most MINIO_FETCH_WORKERS requests are in flight at once. Results are in
+    the order of minio_paths; objects that fail to download are None.
+
+    Args:
+        minio_paths: Object keys
+        bucket_name: Bucket (defaults to MINIO_BUCKET)
+        offset, length: Byte range applied to every object (see fetch_object)
+        buffers: Optional preallocated buffers, one per key
+
+    Returns:
+        list: bytes / memoryview / None per key
+    """
+    if buffers is not None and len(buffers) != len(minio_paths):
+        raise ValueError("buffers must have one entry per object key")
+
+    def fetch(index):
+        try:
+            return fetch_object(minio_paths[index], bucket_name=bucket_name, offset=offset, length=length,
+                                buffer=buffers[index] if buffers is not None else None)
+        except Exception as e:
+            logger.error(f"Failed to fetch {minio_paths[index]}: {e}")
+            return None
+
+    if len(minio_paths) <= 1:
+        return [fetch(i) for i in range(len(minio_paths))]
+    return list(_get_fetch_pool().map(fetch, range(len(minio_paths))))
+
+
+def get_frames_from_minio(minio_path,bucket_name=None) -> dict:
+    """
+    Download and return the raw bytes of a frame from MinIO, or an error dict.
+    """
+    target_bucket = bucket_name if bucket_name is not None else MINIO_BUCKET
+    try:
+        return fetch_object(minio_path, bucket_name=bucket_name)
     except Exception as e:
         logger.error(f"Failed to fetch {minio_path} from {target_bucket}: {e}")
         return {"error": f"Failed to fetch order: {e}"}
@@ -1,19 +1,26 @@
 """Vision Language Model integration for grocery item detection."""
 import json
 from typing import List, Dict, Any, Tuple
-from io import BytesIO
 import os
 import re
 import time
+import threading
+import cv2
 import numpy as np
 import openvino as ov
-from PIL import Image
 import requests
 import sys
 from pathlib import Path
 import argparse
 from utils.config import VLM_URL, VLM_MODEL, LP_IP, logger, LP_PORT, SAMPLE_MEDIA_DIR, FRAME_DIR_VOL_BASE, FRAME_DIR, LP_APP_BASE_DIR, RESULTS_DIR
 from utils.prompts import *
+from utils.vlm_cache import get_vlm_cache, make_cache_key
+from utils.latency import LatencyStats
+from utils.json_stream import JsonArrayScanner
+from utils.image_preprocess import get_input_buffer_pool
+from utils.metrics import metrics, SPAN_IMAGE_FETCH, SPAN_VLM_PREFILL, SPAN_VLM_DECODE, SPAN_VLM_GENERATE
+from utils.vlm_router import (VLM_TIERED, VLM_TIER_SMALL, VLM_TIER_LARGE, routes_to_small_tier,
+                              escalation_reason, tier_stats)
 from openvino_genai import VLMPipeline, GenerationConfig
 from vlm_metrics_logger import (
     log_start_time, 
@@ -26,80 +33,368 @@ WORKLOAD_PIPELINE_CONFIG = "/app/lp/configs/"
 TARGET_WORKLOAD = "lp_vlm"  # normalized compare
 # Get env variables
 frames_base_dir = os.path.join(LP_APP_BASE_DIR, RESULTS_DIR, FRAME_DIR)
+VLM_IMAGE_SIZE = (640, 360)
+# Cheaper path for requests at risk of missing their deadline: a smaller input
+# image (fewer vision tokens to prefill) and a shorter generation
+VLM_DEGRADED_IMAGE_SIZE = (448, 252)
+VLM_DEGRADED_MAX_TOKENS = int(os.environ.get("VLM_DEGRADED_MAX_TOKENS", "128"))
+# Use cases whose prompts carry no image
+TEXT_ONLY_USE_CASES = ("decision_agent", "decision_agent_batch")
 
-# VLMComponent implementation (singleton pattern)
+# Load openvino_genai's ContinuousBatchingPipeline instead of VLMPipeline when supported, so
+# batches share one model copy and are decoded together (single requests use it too)
+VLM_CONTINUOUS_BATCHING = os.environ.get("VLM_CONTINUOUS_BATCHING", "0") == "1"
+# Reuse the KV cache of the static prompt prefix across calls so only the item-specific suffix is prefilled
+VLM_PREFIX_CACHING = os.environ.get("VLM_PREFIX_CACHING", "1") == "1"
+# OpenVINO compiled-model cache; on the mounted model volume so restarts skip recompilation ("" disables)
+VLM_CACHE_DIR = os.environ.get("VLM_CACHE_DIR", "/home/pipeline-server/lp-vlm/ov-model/.ov_cache")
+# Run one short generation on a synthetic image at startup so the first item does not pay for it
+VLM_WARMUP = os.environ.get("VLM_WARMUP", "1") == "1"
+VLM_WARMUP_IMAGE_SIZE = (64, 64)
+# Stream tokens through a JSON scanner and stop generating once a complete, valid array is closed
+VLM_STREAM_EARLY_STOP = os.environ.get("VLM_STREAM_EARLY_STOP", "1") == "1"
+# Constrain decoding to a JSON array of objects when the backend supports structured output;
+# only for prompts whose answer is an array (all default use cases)
+VLM_STRUCTURED_OUTPUT = os.environ.get("VLM_STRUCTURED_OUTPUT", "0") == "1"
+VLM_OUTPUT_SCHEMA = {"type": "array", "items": {"type": "object"}}
+
+try:
+    from openvino_genai import StreamingStatus
+    _STREAM_STOP, _STREAM_CONTINUE = StreamingStatus.STOP, StreamingStatus.RUNNING
+except ImportError:
+    # Older openvino_genai: the streamer returns True to stop
+    _STREAM_STOP, _STREAM_CONTINUE = True, False
+
+# VLMComponent implementation (one instance per model tier)
 class VLMComponent:
-    _model = None
-    _config = None
+    # (model_path, device, temperature, max_new_tokens) -> (VLMPipeline or None, ContinuousBatchingPipeline
+    # or None, generate lock); exactly one pipeline is loaded, and neither is safe for concurrent
+    # generate() calls on one instance
+    _pipelines = {}
     
-    def __init__(self, model_path, device, max_new_tokens=512, temperature=0.0):
+    def __init__(self, model_path, device, max_new_tokens=512, temperature=0.0, tier=VLM_TIER_LARGE):
         self.model_path = model_path
         self.device = device
         self.temperature = temperature
         self.max_new_tokens = max_new_tokens
+        self.tier = tier
+        self.ttft = LatencyStats(f"vlm_ttft[{tier}]")
         
         config_key = (model_path, device, temperature, max_new_tokens)
-        if VLMComponent._model is None or VLMComponent._config != config_key:
-            logger.info(f"[VLM] Loading model: {model_path} on {device}")
-            VLMComponent._model = VLMPipeline(
-                models_path=model_path,
-                device=device
+        if config_key not in VLMComponent._pipelines:
+            logger.info(f"[VLM] Loading {tier} model: {model_path} on {device}")
+            cb_vlm = self._load_continuous_batching() if VLM_CONTINUOUS_BATCHING else None
+            VLMComponent._pipelines[config_key] = (
+                self._load_pipeline() if cb_vlm is None else None,
+                cb_vlm,
+                threading.Lock(),
             )
-            VLMComponent._config = config_key
             logger.info("[VLM] Model loaded.\n")
         
-        self.vlm = VLMComponent._model
+        self.vlm, self.cb_vlm, self._generate_lock = VLMComponent._pipelines[config_key]
         self.gen_config = GenerationConfig(
             max_new_tokens=max_new_tokens,
             temperature=temperature,
             do_sample=False
         )
+        self.degraded_gen_config = GenerationConfig(
+            max_new_tokens=min(max_new_tokens, VLM_DEGRADED_MAX_TOKENS),
+            temperature=temperature,
+            do_sample=False
+        )
+        if VLM_STRUCTURED_OUTPUT:
+            self._enable_structured_output(self.gen_config)
+            self._enable_structured_output(self.degraded_gen_config)
+    
+    @staticmethod
+    def _enable_structured_output(gen_config):
+        """Constrain generation to VLM_OUTPUT_SCHEMA, if this openvino_genai supports it."""
+        try:
+            from openvino_genai import StructuredOutputConfig
+            gen_config.structured_output_config = StructuredOutputConfig(json_schema=json.dumps(VLM_OUTPUT_SCHEMA))
+            logger.info("[VLM] Structured JSON output enabled.")
+        except Exception as e:
+            logger.warning(f"[VLM] Structured output unavailable, decoding unconstrained: {e}")
+    
+    def _scheduler_config(self):
+        """SchedulerConfig with prefix caching enabled when VLM_PREFIX_CACHING is on."""
+        from openvino_genai import SchedulerConfig
+        scheduler_config = SchedulerConfig()
+        scheduler_config.enable_prefix_caching = VLM_PREFIX_CACHING
+        return scheduler_config
+    
+    @staticmethod
+    def _ov_properties():
+        """OpenVINO properties for compiling the model (compiled-model cache when VLM_CACHE_DIR is set)."""
+        if not VLM_CACHE_DIR:
+            return {}
+        try:
+            os.makedirs(VLM_CACHE_DIR, exist_ok=True)
+        except OSError as e:
+            logger.warning(f"[VLM] Model cache dir {VLM_CACHE_DIR} unavailable, compiling without cache: {e}")
+            return {}
+        return {"CACHE_DIR": VLM_CACHE_DIR}
+    
+    def _load_pipeline(self):
+        """Load the VLMPipeline, with prefix caching when enabled and supported."""
+        properties = self._ov_properties()
+        if VLM_PREFIX_CACHING:
+            try:
+                pipe = VLMPipeline(self.model_path, self.device, scheduler_config=self._scheduler_config(),
+                                   **properties)
+                logger.info("[VLM] Prefix caching enabled.")
+                return pipe
+            except Exception as e:
+                logger.warning(f"[VLM] Prefix caching unavailable, loading without it: {e}")
+        return VLMPipeline(models_path=self.model_path, device=self.device, **properties)
+    
+    def _load_continuous_batching(self):
+        """Load a ContinuousBatchingPipeline to serve all requests, or None to fall back to VLMPipeline."""
+        try:
+            from openvino_genai import ContinuousBatchingPipeline
+            pipe = ContinuousBatchingPipeline(self.model_path, self._scheduler_config(), self.device,
+                                              properties=self._ov_properties())
+            logger.info("[VLM] Continuous batching pipeline loaded.")
+            return pipe
+        except Exception as e:
+            logger.warning(f"[VLM] Continuous batching unavailable, loading VLMPipeline: {e}")
+            return None
+    
+    @staticmethod
+    def place_images(prompt, num_images):
+        """
+        Insert image tags after the static prompt prefix.
+        
+        Without explicit tags the pipeline puts the images first, so every call
+        would start with different tokens and nothing could be reused. With the
+        static prefix ahead of the images, only images and suffix are prefilled.
+        """
+        prefix, suffix = split_static_prefix(prompt)
+        if not VLM_PREFIX_CACHING or not prefix or num_images == 0:
+            return prompt
+        tags = "".join(f"<ov_genai_image_{i}>" for i in range(num_images))
+        return f"{prefix}\n{tags}{suffix}"
     
-    def generate(self, prompt, images=None):
-        """Generate output from VLM model."""
+    def _report_prefill(self, output):
+        """Log prefill tokens and time-to-first-token of a generation; record prefill/decode spans."""
+        perf_metrics = getattr(output, "perf_metrics", None)
+        if perf_metrics is None:
+            return
+        try:
+            input_tokens = perf_metrics.get_num_input_tokens()
+            generated_tokens = perf_metrics.get_num_generated_tokens()
+            ttft_ms = perf_metrics.get_ttft().mean
+            generate_ms = perf_metrics.get_generate_duration().mean
+        except Exception as e:
+            logger.debug(f"[VLM] Perf metrics unavailable: {e}")
+            return
+        self.ttft.record(ttft_ms / 1000.0)
+        metrics.observe(SPAN_VLM_PREFILL, ttft_ms / 1000.0, tier=self.tier)
+        metrics.observe(SPAN_VLM_DECODE, max(0.0, generate_ms - ttft_ms) / 1000.0, tier=self.tier)
+        metrics.inc("vlm_input_tokens", input_tokens, tier=self.tier)
+        metrics.inc("vlm_generated_tokens", generated_tokens, tier=self.tier)
+        logger.info("[VLM] %s tier prefill tokens: %d, TTFT: %.1f ms (p50 %.1f ms, p95 %.1f ms)",
+                    self.tier, input_tokens, ttft_ms,
+                    self.ttft.percentile(50) * 1000, self.ttft.percentile(95) * 1000)
+    
+    def generate(self, prompt, images=None, generation_config=None):
+        """Generate output from VLM model (with self.gen_config unless generation_config is given)."""
         if images is None:
             images = []
+        gen_config = generation_config or self.gen_config
         
-        ov_frames = [ov.Tensor(img) for img in images]
-        output = self.vlm.generate(prompt, images=ov_frames, generation_config=self.gen_config)
+        # Inputs are contiguous uint8 buffers; share them with OpenVINO instead of copying
+        ov_frames = [ov.Tensor(img, shared_memory=True) for img in images]
+        prompt = self.place_images(prompt, len(ov_frames))
+        streamer = self._early_stop_streamer() if VLM_STREAM_EARLY_STOP else None
+        with self._generate_lock:
+            if self.cb_vlm is not None:
+                output = self.cb_vlm.generate([prompt], images=[ov_frames], generation_config=[gen_config],
+                                              streamer=streamer)[0]
+            elif streamer is not None:
+                output = self.vlm.generate(prompt, images=ov_frames, generation_config=gen_config,
+                                           streamer=streamer)
+            else:
+                output = self.vlm.generate(prompt, images=ov_frames, generation_config=gen_config)
+        if streamer is not None:
+            streamer.report(gen_config.max_new_tokens)
         log_performance_metric("USECASE_2", output)
+        self._report_prefill(output)
         return output
+    
+    @staticmethod
+    def _early_stop_streamer():
+        """Streamer callback that stops generation once the output holds a complete JSON array."""
+        scanner = JsonArrayScanner()
+        chunks = [0]
+        
+        def streamer(subword):
+            chunks[0] += 1
+            return _STREAM_STOP if scanner.feed(subword) else _STREAM_CONTINUE
+        
+        def report(max_new_tokens):
+            if scanner.done:
+                logger.info("[VLM] Early stop: JSON array closed after %d streamed chunks (max %d tokens)",
+                            chunks[0], max_new_tokens)
+        
+        streamer.report = report
+        return streamer
+    
+    def generate_batch(self, prompts, images_list, generation_config=None):
+        """
+        Generate outputs for several prompts.
+        
+        Uses continuous batching when available (one generate call for the
+        whole batch), otherwise runs the prompts back to back on the shared
+        VLMPipeline.
+        
+        Returns:
+            list: One output per prompt (VLMDecodedResults or GenerationResult)
+        """
+        gen_config = generation_config or self.gen_config
+        if self.cb_vlm is not None and len(prompts) > 1:
+            ov_frames = [[ov.Tensor(img, shared_memory=True) for img in images] for images in images_list]
+            prompts = [self.place_images(prompt, len(frames)) for prompt, frames in zip(prompts, ov_frames)]
+            with self._generate_lock:
+                return self.cb_vlm.generate(prompts, images=ov_frames,
+                                            generation_config=[gen_config] * len(prompts))
+        return [self.generate(prompt, images=images, generation_config=gen_config)
+                for prompt, images in zip(prompts, images_list)]
+    
+    def warm_up(self):
+        """
+        Run one short generation on a tiny synthetic image.
+        
+        Triggers the lazy first-inference work (plugin init, memory allocation)
+        and, with prefix caching, fills the KV cache with the inventory prompt's
+        static prefix so the first real item only prefills its own suffix.
+        """
+        image = np.full((*VLM_WARMUP_IMAGE_SIZE[::-1], 3), 127, dtype=np.uint8)
+        prompt = f"{INVENTORY_PROMPT_PREFIX}\n{INVENTORY_CANDIDATES_LABEL}"
+        warmup_config = GenerationConfig(max_new_tokens=1, temperature=0.0, do_sample=False)
+        start = time.perf_counter()
+        with self._generate_lock:
+            if self.cb_vlm is not None:
+                self.cb_vlm.generate([self.place_images(prompt, 1)], images=[[ov.Tensor(image)]],
+                                     generation_config=[warmup_config])
+            else:
+                self.vlm.generate(self.place_images(prompt, 1), images=[ov.Tensor(image)],
+                                  generation_config=warmup_config)
+        logger.info("[VLM] %s tier warm-up generation took %.2f s", self.tier, time.perf_counter() - start)
+
+
+# VLMComponent per tier; the small tier maps to None when no small model is configured
+_vlm_components = {}
+_vlm_component_lock = threading.Lock()
+
+def get_vlm_component(tier=VLM_TIER_LARGE):
+    """
+    Get or initialize the VLMComponent of a tier (thread-safe, so startup preload and requests share one load).
+    
+    Returns:
+        VLMComponent, or None for the small tier when no small model is configured
+    """
+    with _vlm_component_lock:
+        if tier not in _vlm_components:
+            _vlm_components[tier] = (_create_small_vlm_component() if tier == VLM_TIER_SMALL
+                                     else _create_vlm_component())
+        return _vlm_components[tier]
 
 
-# Global VLMComponent instance
-_vlm_component = None
+def _create_vlm_component():
+    try:
+        vlm_model_name, vlm_precision, vlm_device = get_vlm_model_from_workload()
+        model_path = os.environ.get("VLM_MODEL_PATH", 
+                                   f"/home/pipeline-server/lp-vlm/ov-model/{vlm_model_name}/{vlm_precision}")
+        device = vlm_device
+    except Exception as e:
+        logger.warning(f"Failed to get VLM model from config: {e}, using defaults")
+        model_path = os.environ.get("VLM_MODEL_PATH", 
+                                   "/home/pipeline-server/lp-vlm/ov-model/Qwen2.5-VL-7B-Instruct/int8")
+        device = os.environ.get("VLM_DEVICE", "GPU")
+    
+    max_tokens = int(os.environ.get("VLM_MAX_TOKENS", "512"))        
+    logger.info(f"Initializing VLMComponent with model_path={model_path}, device={device}")
+    return VLMComponent(
+        model_path=model_path,
+        device=device,
+        max_new_tokens=max_tokens,
+        temperature=0.0
+    )
 
-def get_vlm_component():
-    """Get or initialize VLMComponent singleton."""
-    global _vlm_component
-    if _vlm_component is None:
+
+def _create_small_vlm_component():
+    """Small-tier VLMComponent from VLM_SMALL_MODEL_PATH or the workload's vlm_small_model, else None."""
+    if not VLM_TIERED:
+        return None
+    model_path = os.environ.get("VLM_SMALL_MODEL_PATH")
+    device = os.environ.get("VLM_SMALL_DEVICE")
+    if not model_path:
         try:
-            vlm_model_name, vlm_precision, vlm_device = get_vlm_model_from_workload()
-            model_path = os.environ.get("VLM_MODEL_PATH", 
-                                       f"/home/pipeline-server/lp-vlm/ov-model/{vlm_model_name}/{vlm_precision}")
-            device = vlm_device
+            small_model = get_small_vlm_model_from_workload()
         except Exception as e:
-            logger.warning(f"Failed to get VLM model from config: {e}, using defaults")
-            model_path = os.environ.get("VLM_MODEL_PATH", 
-                                       "/home/pipeline-server/lp-vlm/ov-model/Qwen2.5-VL-7B-Instruct/int8")
-            device = os.environ.get("VLM_DEVICE", "GPU")
-        
-        max_tokens = int(os.environ.get("VLM_MAX_TOKENS", "512"))        
-        logger.info(f"Initializing VLMComponent with model_path={model_path}, device={device}")
-        _vlm_component = VLMComponent(
+            logger.warning(f"Failed to get small VLM model from config: {e}")
+            small_model = None
+        if small_model is None:
+            logger.info("[VLM] No small VLM configured; every request runs on the large model")
+            return None
+        vlm_model_name, vlm_precision, vlm_device = small_model
+        model_path = f"/home/pipeline-server/lp-vlm/ov-model/{vlm_model_name}/{vlm_precision}"
+        device = device or vlm_device
+    
+    max_tokens = int(os.environ.get("VLM_MAX_TOKENS", "512"))
+    logger.info(f"Initializing small VLMComponent with model_path={model_path}, device={device or 'GPU'}")
+    try:
+        return VLMComponent(
             model_path=model_path,
-            device=device,
+            device=device or "GPU",
             max_new_tokens=max_tokens,
-            temperature=0.0
+            temperature=0.0,
+            tier=VLM_TIER_SMALL
         )
-    return _vlm_component
+    except Exception as e:
+        logger.error(f"[VLM] Failed to load small VLM {model_path}, using the large model only: {e}")
+        return None
+
+
+def preload_vlm(warm_up: bool = VLM_WARMUP) -> bool:
+    """
+    Load (and optionally warm up) the VLM tiers ahead of the first request.
+    
+    Returns:
+        bool: True if the large model is loaded; small-tier and warm-up failures are logged but not fatal
+    """
+    start = time.perf_counter()
+    try:
+        tiers = [get_vlm_component(), get_vlm_component(VLM_TIER_SMALL)]
+    except Exception as e:
+        logger.error(f"[VLM] Preload failed: {e}")
+        return False
+    tiers = [vlm for vlm in tiers if vlm is not None]
+    logger.info("[VLM] Model ready in %.2f s (tiers: %s, cache dir: %s)", time.perf_counter() - start,
+                ", ".join(vlm.tier for vlm in tiers), VLM_CACHE_DIR or "off")
+    if warm_up:
+        for vlm in tiers:
+            try:
+                vlm.warm_up()
+            except Exception as e:
+                logger.warning(f"[VLM] {vlm.tier} tier warm-up failed, first request will pay for it: {e}")
+    return True
 
 
-def extract_prompt_and_images(frame_records: Dict[str, Any], use_case: str = None) -> Tuple[str, List[np.ndarray]]:
-    """Extract prompt and images from frame_records."""
+def extract_prompt_and_images(frame_records: Dict[str, Any], use_case: str = None,
+                              image_size: Tuple[int, int] = VLM_IMAGE_SIZE) -> Tuple[str, List[np.ndarray]]:
+    """
+    Extract prompt and images from frame_records.
+    
+    Images are RGB at image_size in pooled buffers; hand them back with
+    release_images once generation has returned.
+    """
     # Select prompt based on use_case
     if use_case == "decision_agent":
         prompt = AGENT_PROMPT
+    elif use_case == "decision_agent_batch":
+        prompt = AGENT_BATCH_PROMPT
     else:
         # Use dynamic inventory-aware prompt if provided, otherwise fall back to generic
         dynamic_prompt = frame_records.get("dynamic_prompt")
@@ -108,19 +403,26 @@ def extract_prompt_and_images(frame_records: Dict[str, Any], use_case: str = Non
     images = []
     
     # Extract images based on frame_records format
-    if use_case == "decision_agent":
+    if use_case in TEXT_ONLY_USE_CASES:
         # For decision_agent, append the JSON data to prompt
         prompt = f"{prompt}\nInput {json.dumps(frame_records.get('items', {}), indent=4)}"
     else:
-        # Extract image from presigned_url
+        # Prefer the best frame already decoded in-process by get_best_frame
+        image = frame_records.get("image")
         presigned_url = frame_records.get("presigned_url", "")
-        if presigned_url:
+        pool = get_input_buffer_pool(image_size)
+        if image is not None:
+            images.append(pool.from_bgr(image))
+        # Fall back to fetching the frame through its presigned URL
+        elif presigned_url:
             try:
-                response = requests.get(presigned_url, timeout=30)
-                response.raise_for_status()
-                img = Image.open(BytesIO(response.content)).convert("RGB")
-                img = img.resize((640, 360))
-                images.append(np.array(img))
+                with metrics.span(SPAN_IMAGE_FETCH, source="presigned"):
+                    response = requests.get(presigned_url, timeout=30)
+                    response.raise_for_status()
+                img = pool.from_jpeg(response.content)
+                if img is None:
+                    raise ValueError("could not decode image")
+                images.append(img)
                 logger.info(f"Successfully loaded image from {presigned_url}")
             except Exception as e:
                 logger.error(f"Failed to load image from {presigned_url}: {str(e)}")
@@ -128,6 +430,70 @@ def extract_prompt_and_images(frame_records: Dict[str, Any], use_case: str = Non
     return prompt, images
 
 
+def release_images(images: List[np.ndarray]) -> None:
+    """Return images from extract_prompt_and_images to the input buffer pool of their size."""
+    for image in images or ():
+        get_input_buffer_pool((image.shape[1], image.shape[0])).release(image)
+
+
+def _output_text(output):
+    """Return the generated text of a VLMDecodedResults or continuous-batching GenerationResult."""
+    texts = getattr(output, "texts", None) or getattr(output, "m_generation_ids", None)
+    return texts[0] if texts else None
+
+
+def parse_vlm_output(output) -> Tuple[bool, Any, str]:
+    """Parse the JSON answer out of a VLM output."""
+    raw_text = _output_text(output)
+    if not raw_text:
+        return False, {}, "No output from VLM model"
+    
+    # Try to extract JSON from response
+    json_start = raw_text.find('[')
+    json_end = raw_text.rfind(']')
+    if json_start != -1 and json_end != -1 and json_end > json_start:
+        json_str = raw_text[json_start:json_end + 1]
+        try:
+            parsed = json.loads(json_str)
+            logger.info(f"vlm Script - [call_vlm] Successfully parsed JSON from extracted string: {parsed}")
+            return True, parsed, ""
+        except Exception as e:
+            logger.error(f"vlm Script - [call_vlm] - Failed to parse JSON from extracted string: {e}")
+            return False, {}, f"Failed to parse JSON: {e}; content: {raw_text}"
+    
+    # If no JSON array, try to parse as generic response
+    try:
+        parsed = json.loads(raw_text)
+        return True, parsed, ""
+    except Exception as e:
+        logger.error(f"vlm Script - [call_vlm] - Failed to parse JSON from raw text: {e}")
+        return True, {"raw_response": raw_text}, ""
+
+
+def _lookup_cache(frame_records, use_case, prompt, images):
+    """Return (cache, key, cached_result); cache and key are None when caching does not apply."""
+    cache = get_vlm_cache()
+    if cache is None:
+        return None, None, None
+    key = make_cache_key(frame_records, use_case, prompt, images)
+    if key is None:
+        return None, None, None
+    cached = cache.get(key)
+    if cached is not None:
+        logger.info("vlm Script - [call_vlm] Cache hit for %s (%s)", key, cache.stats())
+    return cache, key, cached
+
+
+def _store_in_cache(cache, key, result):
+    """Cache successfully parsed results; unparsed raw responses are not cached."""
+    valid, parsed, _ = result
+    if cache is None or not valid:
+        return
+    if isinstance(parsed, dict) and "raw_response" in parsed:
+        return
+    cache.put(key, parsed)
+
+
 def call_vlm(
     frame_records: Dict[str, Any],
     seed: int = 0,
@@ -142,42 +508,26 @@ def call_vlm(
         prompt, images = extract_prompt_and_images(frame_records, use_case)            
         
         # Use local VLMComponent
-        if not images and use_case != "decision_agent":
+        if not images and use_case not in TEXT_ONLY_USE_CASES:
             return False, {}, "No images extracted from frame_records"
         
-        vlm = get_vlm_component()
-        #logger.info(f"VLM Input: {prompt}, images count: {len(images)}")
-        output = vlm.generate(prompt, images=images)
+        try:
+            cache, cache_key, cached = _lookup_cache(frame_records, use_case, prompt, images)
+            if cached is not None:
+                return True, cached, ""
+            
+            vlm = get_vlm_component()
+            #logger.info(f"VLM Input: {prompt}, images count: {len(images)}")
+            output = vlm.generate(prompt, images=images)
+        finally:
+            release_images(images)
         
         elapsed = time.time() - start_time
         logger.info("VLM call completed in %.2f seconds", elapsed)
         
-        # Parse the output
-        if hasattr(output, 'texts') and output.texts:
-            raw_text = output.texts[0]
-            
-            # Try to extract JSON from response
-            json_start = raw_text.find('[')
-            json_end = raw_text.rfind(']')
-            if json_start != -1 and json_end != -1 and json_end > json_start:
-                json_str = raw_text[json_start:json_end + 1]
-                try:
-                    parsed = json.loads(json_str)
-                    logger.info(f"vlm Script - [call_vlm] Successfully parsed JSON from extracted string: {parsed}")
-                    return True, parsed, ""
-                except Exception as e:
-                    logger.error(f"vlm Script - [call_vlm] - Failed to parse JSON from extracted string: {e}")
-                    return False, {}, f"Failed to parse JSON: {e}; content: {raw_text}"
-            
-            # If no JSON array, try to parse as generic response
-            try:
-                parsed = json.loads(raw_text)
-                return True, parsed, ""
-            except Exception as e:
-                logger.error(f"vlm Script - [call_vlm] - Failed to parse JSON from raw text: {e}")
-                return True, {"raw_response": raw_text}, ""
-        else:
-            return False, {}, "No output from VLM model"
+        result = parse_vlm_output(output)
+        _store_in_cache(cache, cache_key, result)
+        return result
     
     except Exception as e:
         error_msg = f"Unexpected error: {str(e)}"
@@ -185,13 +535,186 @@ def call_vlm(
         return False, None, error_msg
 
 
-def get_vlm_model_from_workload(workload_config_path: str = None) -> tuple:
+def call_vlm_batch(
+    frame_records_list: List[Dict[str, Any]],
+    use_case: str = None,
+    degraded: bool = False,
+) -> List[Tuple[bool, Any, str]]:
     """
-    Extract vlm_model, vlm_precision, and vlm_device from workload configuration.
+    Call the VLM for several requests of the same use case in one batch.
+    
+    With degraded, images are VLM_DEGRADED_IMAGE_SIZE and generation stops at
+    VLM_DEGRADED_MAX_TOKENS; degraded results are served from the cache but
+    never stored in it. Inventory prompts go through the tiered router (see
+    _generate_routed).
+    
+    Returns:
+        list: One (valid, result, error) tuple per request, in input order
+    """
+    results: List[Tuple[bool, Any, str]] = [None] * len(frame_records_list)
+    prompts, images_list, indices, cache_keys = [], [], [], []
+    cache = None
+    for i, frame_records in enumerate(frame_records_list):
+        images = []
+        try:
+            prompt, images = extract_prompt_and_images(
+                frame_records, use_case, image_size=VLM_DEGRADED_IMAGE_SIZE if degraded else VLM_IMAGE_SIZE)
+            if not images and use_case not in TEXT_ONLY_USE_CASES:
+                results[i] = (False, {}, "No images extracted from frame_records")
+                continue
+            cache, cache_key, cached = _lookup_cache(frame_records, use_case, prompt, images)
+        except Exception as e:
+            release_images(images)
+            results[i] = (False, None, f"Unexpected error: {str(e)}")
+            continue
+        if cached is not None:
+            release_images(images)
+            results[i] = (True, cached, "")
+            continue
+        prompts.append(prompt)
+        images_list.append(images)
+        indices.append(i)
+        cache_keys.append(cache_key)
+    
+    if prompts:
+        try:
+            start_time = time.time()
+            parsed = _generate_routed([frame_records_list[i] for i in indices], prompts, images_list, degraded)
+            logger.info("VLM batch of %d%s completed in %.2f seconds", len(prompts),
+                        " (degraded)" if degraded else "", time.time() - start_time)
+            for i, cache_key, result in zip(indices, cache_keys, parsed):
+                results[i] = result
+                if not degraded:
+                    _store_in_cache(cache if cache_key else None, cache_key, results[i])
+        except Exception as e:
+            error_msg = f"Unexpected error: {str(e)}"
+            logger.error(error_msg)
+            for i in indices:
+                results[i] = (False, None, error_msg)
+        finally:
+            for images in images_list:
+                release_images(images)
+    return results
+
+
+def _generate_on_tier(vlm, prompts, images_list, degraded):
+    """Run prompts on one tier and parse the outputs, recording per-tier generation time."""
+    metrics.inc("vlm_tier_requests", len(prompts), tier=vlm.tier)
+    with metrics.span(SPAN_VLM_GENERATE, tier=vlm.tier):
+        outputs = vlm.generate_batch(prompts, images_list,
+                                     generation_config=vlm.degraded_gen_config if degraded else None)
+    return [parse_vlm_output(output) for output in outputs]
 
+
+def _generate_routed(frame_records_list, prompts, images_list, degraded=False):
+    """
+    Generate and parse one result per prompt, trying the small tier first where allowed.
+    
+    Inventory prompts run on the small model when one is configured; answers
+    that escalation_reason rejects (unparseable, "None", or at odds with the
+    detector label) are rerun on the large model with the same inputs.
+    Degraded requests keep the small-tier answer without escalating. If the
+    small tier raises, its whole share falls through to the large model.
+    Everything else runs on the large model.
+    
     Returns:
-        (vlm_model, vlm_precision, vlm_device)
+        list: (valid, result, error) tuples, in prompt order
+    """
+    results = [None] * len(prompts)
+    small = get_vlm_component(VLM_TIER_SMALL) if VLM_TIERED else None
+    routed = [i for i, frame_records in enumerate(frame_records_list)
+              if small is not None and routes_to_small_tier(frame_records)]
+    if routed:
+        try:
+            small_results = _generate_on_tier(small, [prompts[i] for i in routed],
+                                              [images_list[i] for i in routed], degraded)
+        except Exception as e:
+            logger.warning(f"[VLM] Small-tier generation failed, escalating {len(routed)} request(s) "
+                           f"to large model: {e}")
+            metrics.inc("vlm_escalations", len(routed), reason="small_tier_error")
+            for _ in routed:
+                tier_stats.record(escalated=True)
+            small_results = []
+        for i, result in zip(routed, small_results):
+            reason = None if degraded else escalation_reason(frame_records_list[i], result)
+            rate = tier_stats.record(escalated=reason is not None)
+            if reason is None:
+                results[i] = result
+                continue
+            metrics.inc("vlm_escalations", reason=reason)
+            logger.info("[VLM] Escalating to large model (%s): small-tier answer %s; escalation rate %.1f%%",
+                        reason, result[1], rate * 100)
+    
+    remaining = [i for i, result in enumerate(results) if result is None]
+    if remaining:
+        large_results = _generate_on_tier(get_vlm_component(), [prompts[i] for i in remaining],
+                                          [images_list[i] for i in remaining], degraded)
+        for i, result in zip(remaining, large_results):
+            results[i] = result
+    return results
+
+
+def _demux_agent_batch(item_names, parsed):
+    """Map a batched decision_agent answer back to its inputs; unmatched names map to None."""
+    if not isinstance(parsed, list):
+        return [None] * len(item_names)
+    by_input = {}
+    for entry in parsed:
+        if isinstance(entry, dict) and isinstance(entry.get("input"), str):
+            by_input.setdefault(entry["input"].strip().lower(), entry)
+    positional = len(parsed) == len(item_names)
+    demuxed = []
+    for index, name in enumerate(item_names):
+        entry = by_input.get(name.strip().lower())
+        # Fall back to position only for entries that did not echo their input
+        if entry is None and positional and isinstance(parsed[index], dict) and "input" not in parsed[index]:
+            entry = parsed[index]
+        if entry is None:
+            demuxed.append(None)
+            continue
+        demuxed.append([{k: v for k, v in entry.items() if k != "input"}])
+    return demuxed
+
+
+def call_agent_batch(item_names: List[str]) -> List[Any]:
+    """
+    Validate several item names with one decision_agent generation.
+    
+    Names already in the VLM cache are answered from it; the rest go into a
+    single AGENT_BATCH_PROMPT and the answer is split back per name.
+    
+    Returns:
+        list: Per name, the validated result list (as call_vlm returns for
+        decision_agent), or None when the name could not be matched in the
+        batched answer and should be validated on its own
     """
+    results: List[Any] = [None] * len(item_names)
+    cache = get_vlm_cache()
+    keys = [make_cache_key({"items": name}, "decision_agent", "", []) for name in item_names]
+    pending = []
+    for index, key in enumerate(keys):
+        cached = cache.get(key) if cache is not None else None
+        if cached is not None:
+            results[index] = cached
+        else:
+            pending.append(index)
+    if not pending:
+        return results
+    
+    names = [item_names[i] for i in pending]
+    valid, parsed, err_msg = call_vlm({"items": names}, use_case="decision_agent_batch")
+    if not valid or err_msg:
+        logger.error("vlm Script - [call_agent_batch] Batched validation failed: %s", err_msg)
+        return results
+    for index, result in zip(pending, _demux_agent_batch(names, parsed)):
+        results[index] = result
+        if result is not None:
+            _store_in_cache(cache, keys[index], (True, result, ""))
+    return results
+
+
+def _get_workload_vlm_entry(workload_config_path: str = None) -> dict:
+    """Return the VLM entry of the lp_vlm workload in the workload configuration."""
     # Resolve config path
     workload_dist = os.getenv("WORKLOAD_DIST")
     if workload_dist:
@@ -216,30 +739,67 @@ def get_vlm_model_from_workload(workload_config_path: str = None) -> tuple:
 
     # 2️⃣ Find the VLM entry inside lp_vlm
     for entry in pipeline_list:
-        if not isinstance(entry, dict):
-            continue
+        if isinstance(entry, dict) and entry.get("type", "").lower() == "vlm":
+            return entry
+
+    raise ValueError(
+        f"No VLM entry found in workload '{TARGET_WORKLOAD}'"
+    )
+
 
-        if entry.get("type", "").lower() == "vlm":
-            vlm_model = entry.get("vlm_model")
-            vlm_precision = entry.get("vlm_precision", "int8")
-            vlm_device = entry.get("vlm_device", "GPU")
+def get_vlm_model_from_workload(workload_config_path: str = None) -> tuple:
+    """
+    Extract vlm_model, vlm_precision, and vlm_device from workload configuration.
 
-            if not vlm_model:
-                raise ValueError("vlm_model is missing in VLM configuration")
+    Returns:
+        (vlm_model, vlm_precision, vlm_device)
+    """
+    entry = _get_workload_vlm_entry(workload_config_path)
+    vlm_model = entry.get("vlm_model")
+    vlm_precision = entry.get("vlm_precision", "int8")
+    vlm_device = entry.get("vlm_device", "GPU")
 
-            # Optional cleanup
-            if vlm_model.startswith("Qwen/"):
-                vlm_model = vlm_model.replace("Qwen/", "", 1)
+    if not vlm_model:
+        raise ValueError("vlm_model is missing in VLM configuration")
 
-            logger.info(
-                "✅ Found VLM config: model=%s, precision=%s, device=%s",
-                vlm_model,
-                vlm_precision,
-                vlm_device,
-            )
+    # Optional cleanup
+    if vlm_model.startswith("Qwen/"):
+        vlm_model = vlm_model.replace("Qwen/", "", 1)
 
-            return vlm_model, vlm_precision, vlm_device
+    logger.info(
+        "✅ Found VLM config: model=%s, precision=%s, device=%s",
+        vlm_model,
+        vlm_precision,
+        vlm_device,
+    )
 
-    raise ValueError(
-        f"No VLM entry found in workload '{TARGET_WORKLOAD}'"
-    )
\ No newline at end of file
+    return vlm_model, vlm_precision, vlm_device
+
+
+def get_small_vlm_model_from_workload(workload_config_path: str = None):
+    """
+    Extract the optional small-tier VLM (vlm_small_model, vlm_small_precision,
+    vlm_small_device) from the workload configuration.
+
+    Precision and device default to those of the large model.
+
+    Returns:
+        (vlm_model, vlm_precision, vlm_device), or None if no small model is configured
+    """
+    entry = _get_workload_vlm_entry(workload_config_path)
+    vlm_model = entry.get("vlm_small_model")
+    if not vlm_model:
+        return None
+    vlm_precision = entry.get("vlm_small_precision", entry.get("vlm_precision", "int8"))
+    vlm_device = entry.get("vlm_small_device", entry.get("vlm_device", "GPU"))
+    if vlm_model.startswith("Qwen/"):
+        vlm_model = vlm_model.replace("Qwen/", "", 1)
+
+    logger.info(
+        "✅ Found small VLM config: model=%s, precision=%s, device=%s",
+        vlm_model,
+        vlm_precision,
+        vlm_device,
+    )
+
+    return vlm_model, vlm_precision, vlm_device
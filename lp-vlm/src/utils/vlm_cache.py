@@ -0,0 +1,204 @@
+"""Result cache for VLM calls keyed on image content and prompt."""
+import copy
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+import cv2
+import numpy as np
+
+from utils.config import logger
+
+VLM_CACHE_ENABLED = os.environ.get("VLM_CACHE_ENABLED", "1") == "1"
+# Image requests are keyed on the detector label, the prompt and a perceptual hash of
+# the object crop, so repeat scans of the same product hit the cache
+VLM_IMAGE_CACHE_ENABLED = os.environ.get("VLM_IMAGE_CACHE_ENABLED", "1") == "1"
+# Side of the dHash grid (bits = side^2) and the largest Hamming distance still treated as
+# the same object; 0 only accepts identical hashes
+VLM_IMAGE_HASH_SIZE = 16
+VLM_IMAGE_CACHE_MAX_DISTANCE = int(os.environ.get("VLM_IMAGE_CACHE_MAX_DISTANCE", "16"))
+VLM_CACHE_SIZE = int(os.environ.get("VLM_CACHE_SIZE", "1024"))
+VLM_CACHE_TTL_S = float(os.environ.get("VLM_CACHE_TTL_S", "3600"))
+# Optional SQLite file so cached results survive restarts (empty = memory only)
+VLM_CACHE_PATH = os.environ.get("VLM_CACHE_PATH", "")
+
+
+def crop_to_box(image: np.ndarray, box: Optional[List[float]]) -> np.ndarray:
+    """Crop an image to a normalized [x_min, y_min, x_max, y_max] box; the whole image without a usable box."""
+    if not box or len(box) != 4:
+        return image
+    height, width = image.shape[:2]
+    x_min, y_min = int(max(0.0, box[0]) * width), int(max(0.0, box[1]) * height)
+    x_max, y_max = int(min(1.0, box[2]) * width), int(min(1.0, box[3]) * height)
+    if x_max - x_min < 2 or y_max - y_min < 2:
+        return image
+    return image[y_min:y_max, x_min:x_max]
+
+
+def perceptual_hash(image: np.ndarray, size: int = VLM_IMAGE_HASH_SIZE) -> str:
+    """
+    Difference hash (dHash) of an RGB or grayscale image with size x size bits.
+
+    Robust to re-encoding, small lighting changes and resizing; computed on the
+    object crop, so the background and the rest of the frame do not decide it.
+    """
+    gray = cv2.cvtColor(image, cv2.COLOR_RGB2GRAY) if image.ndim == 3 else image
+    small = cv2.resize(gray, (size + 1, size), interpolation=cv2.INTER_AREA)
+    return np.packbits(small[:, 1:] > small[:, :-1]).tobytes().hex()
+
+
+def hamming_distance(hash_a: str, hash_b: str) -> int:
+    """Number of differing bits between two equal-length hex hashes."""
+    return bin(int(hash_a, 16) ^ int(hash_b, 16)).count("1")
+
+
+def _normalize_items(items: Any) -> str:
+    if isinstance(items, str):
+        return re.sub(r"\s+", " ", items.strip().lower())
+    return json.dumps(items, sort_keys=True).lower()
+
+
+def make_cache_key(frame_records: Dict[str, Any], use_case: str, prompt: str,
+                   images: List[np.ndarray]) -> Optional[str]:
+    """
+    Build the cache key for a VLM request, or None if it is not cacheable.
+
+    decision_agent requests key on the normalized item name(s). Single-image
+    requests (with VLM_IMAGE_CACHE_ENABLED) key on the detector label, a hash
+    of the prompt and the perceptual hash of the object crop (object_box), as
+    "img:<label>:<prompt hash>:<dHash>"; VLMResultCache.get also accepts a
+    cached entry whose dHash is within VLM_IMAGE_CACHE_MAX_DISTANCE bits.
+    """
+    if use_case == "decision_agent":
+        return "agent:" + _normalize_items(frame_records.get("items", ""))
+    if len(images) != 1 or not VLM_IMAGE_CACHE_ENABLED:
+        return None
+    label = _normalize_items(frame_records.get("detected_label") or "").replace(":", " ")
+    prompt_hash = hashlib.sha1(prompt.encode("utf-8")).hexdigest()[:16]
+    crop = crop_to_box(images[0], frame_records.get("object_box"))
+    return f"img:{label}:{prompt_hash}:{perceptual_hash(crop)}"
+
+
+class VLMResultCache:
+    """
+    LRU + TTL cache of parsed VLM results with hit/miss counters.
+
+    Entries are kept in memory up to max_entries; with a path, they are also
+    written to SQLite and looked up there on a memory miss. Image keys without
+    an exact entry match the most recent in-memory entry of the same label and
+    prompt whose perceptual hash is within max_distance bits. Values are copied
+    on the way in and out, so callers may mutate what they get back.
+    """
+
+    def __init__(self, max_entries: int = VLM_CACHE_SIZE, ttl_s: float = VLM_CACHE_TTL_S,
+                 path: str = VLM_CACHE_PATH, max_distance: int = VLM_IMAGE_CACHE_MAX_DISTANCE):
+        self.max_entries = max(1, max_entries)
+        self.ttl_s = ttl_s
+        self.max_distance = max(0, max_distance)
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        self._db = None
+        if path:
+            try:
+                os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+                self._db = sqlite3.connect(path, check_same_thread=False)
+                self._db.execute(
+                    "CREATE TABLE IF NOT EXISTS vlm_cache (key TEXT PRIMARY KEY, expires_at REAL, value TEXT)"
+                )
+                self._db.execute("DELETE FROM vlm_cache WHERE expires_at < ?", (time.time(),))
+                self._db.commit()
+                logger.info(f"VLM cache backed by {path}")
+            except Exception as e:
+                logger.error(f"VLM cache - could not open {path}, using memory only: {e}")
+                self._db = None
+
+    def get(self, key: str) -> Optional[Any]:
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] < now:
+                del self._entries[key]
+                entry = None
+            if entry is None and self._db is not None:
+                row = self._db.execute(
+                    "SELECT expires_at, value FROM vlm_cache WHERE key = ? AND expires_at >= ?", (key, now)
+                ).fetchone()
+                if row is not None:
+                    entry = (row[0], json.loads(row[1]))
+                    self._store_locked(key, entry)
+            if entry is None:
+                key, entry = self._near_match_locked(key, now)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            value = entry[1]
+        return copy.deepcopy(value)
+
+    def put(self, key: str, value: Any) -> None:
+        entry = (time.time() + self.ttl_s, copy.deepcopy(value))
+        with self._lock:
+            self._store_locked(key, entry)
+            if self._db is not None:
+                try:
+                    self._db.execute("INSERT OR REPLACE INTO vlm_cache VALUES (?, ?, ?)",
+                                     (key, entry[0], json.dumps(value)))
+                    self._db.commit()
+                except Exception as e:
+                    logger.error(f"VLM cache - failed to persist entry: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 3) if total else 0.0,
+            }
+
+    def _near_match_locked(self, key, now):
+        """Most recent live image entry with the same label and prompt within max_distance bits, or (key, None)."""
+        if not key.startswith("img:") or self.max_distance <= 0:
+            return key, None
+        prefix, _, image_hash = key.rpartition(":")
+        prefix += ":"
+        for candidate in reversed(self._entries):
+            if not candidate.startswith(prefix):
+                continue
+            entry = self._entries[candidate]
+            candidate_hash = candidate[len(prefix):]
+            if (entry[0] >= now and len(candidate_hash) == len(image_hash)
+                    and hamming_distance(candidate_hash, image_hash) <= self.max_distance):
+                return candidate, entry
+        return key, None
+
+    def _store_locked(self, key, entry):
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+
+_vlm_cache = None
+_vlm_cache_lock = threading.Lock()
+
+
+def get_vlm_cache() -> Optional[VLMResultCache]:
+    """Get or initialize the VLMResultCache singleton, or None when caching is disabled."""
+    global _vlm_cache
+    if not VLM_CACHE_ENABLED:
+        return None
+    with _vlm_cache_lock:
+        if _vlm_cache is None:
+            _vlm_cache = VLMResultCache()
+    return _vlm_cache
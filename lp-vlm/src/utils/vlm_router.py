@@ -0,0 +1,90 @@
+"""Tiered VLM routing: which requests try the small model first, and when to escalate."""
+import os
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+from utils.prompts import is_inventory_prompt, inventory_prompt_candidates
+
+# Run inventory prompts on the small VLM tier first when one is configured; 0 always uses the large model
+VLM_TIERED = os.environ.get("VLM_TIERED", "1") == "1"
+
+VLM_TIER_SMALL = "small"
+VLM_TIER_LARGE = "large"
+
+# Escalation reasons (label values of lp_vlm_vlm_escalations_total)
+ESCALATE_UNPARSEABLE = "unparseable"
+ESCALATE_NONE = "none"
+ESCALATE_LABEL_CONFLICT = "label_conflict"
+
+
+def routes_to_small_tier(frame_records: Dict[str, Any]) -> bool:
+    """Return True for requests the small tier may answer (inventory prompts with an image)."""
+    return is_inventory_prompt(frame_records.get("dynamic_prompt"))
+
+
+def _normalize(name: str) -> str:
+    return " ".join(str(name).strip().lower().split())
+
+
+def agrees_with_detection(item_name: str, detected_label: str, candidates) -> bool:
+    """
+    Return True if an answered item name is consistent with what the detector saw.
+
+    The answer agrees when it is one of the prompt's candidate items, or when it
+    and the detector label contain one another (the same rule
+    generate_inventory_prompt uses to pick candidates).
+    """
+    answer = _normalize(item_name)
+    if any(answer == _normalize(candidate) for candidate in candidates):
+        return True
+    label = _normalize(detected_label or "")
+    return bool(label) and (label in answer or answer in label)
+
+
+def escalation_reason(frame_records: Dict[str, Any], result: Tuple[bool, Any, str]) -> Optional[str]:
+    """
+    Decide whether a small-tier answer must be redone on the large model.
+
+    Args:
+        frame_records: Request the answer belongs to (dynamic_prompt, detected_label)
+        result: (valid, parsed, error) tuple from parse_vlm_output
+
+    Returns:
+        str: ESCALATE_UNPARSEABLE when there is no JSON array of named items,
+        ESCALATE_NONE when every item is "None", ESCALATE_LABEL_CONFLICT when no
+        item agrees with the detector label; None to accept the answer
+    """
+    valid, parsed, err_msg = result
+    if not valid or err_msg or not isinstance(parsed, list):
+        return ESCALATE_UNPARSEABLE
+    names = [entry.get("item_name") for entry in parsed if isinstance(entry, dict)]
+    names = [name for name in names if isinstance(name, str) and name.strip()]
+    if not names:
+        return ESCALATE_UNPARSEABLE
+    if all(_normalize(name) == "none" for name in names):
+        return ESCALATE_NONE
+    detected_label = frame_records.get("detected_label")
+    candidates = inventory_prompt_candidates(frame_records.get("dynamic_prompt"))
+    if (detected_label or candidates) and not any(
+            agrees_with_detection(name, detected_label, candidates) for name in names):
+        return ESCALATE_LABEL_CONFLICT
+    return None
+
+
+class TierStats:
+    """Counts of small-tier answers and escalations, for the escalation rate."""
+
+    def __init__(self):
+        self.small = 0
+        self.escalated = 0
+        self._lock = threading.Lock()
+
+    def record(self, escalated: bool) -> float:
+        """Count one small-tier answer; returns the escalation rate so far (0-1)."""
+        with self._lock:
+            self.small += 1
+            self.escalated += int(escalated)
+            return self.escalated / self.small
+
+
+tier_stats = TierStats()
@@ -0,0 +1,248 @@
+"""VLM execution service: worker pool with request batching."""
+import heapq
+import itertools
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Dict
+
+from utils.config import logger, ITEM_LATENCY_BUDGET_MS, VLM_WORKERS, VLM_MAX_BATCH
+from utils.latency import LatencyStats
+from utils.metrics import metrics
+from utils.vlm import call_vlm_batch
+
+VLM_BATCH_WINDOW_MS = float(os.environ.get("VLM_BATCH_WINDOW_MS", "50"))
+# Order of requests within a lane: "edf" (earliest deadline first) or "fifo" (arrival order);
+# lanes always take turns, so a busy lane cannot starve the others
+VLM_SCHEDULING = os.environ.get("VLM_SCHEDULING", "edf").lower()
+# Run a request on the cheaper degraded path when its expected finish is past its deadline
+VLM_DEGRADE = os.environ.get("VLM_DEGRADE", "1") == "1"
+# Weight of the newest batch in the per-use-case batch duration estimate
+SERVICE_TIME_EWMA_ALPHA = 0.2
+
+_sequence = itertools.count()
+
+
+@dataclass
+class VLMRequest:
+    frame_records: Dict[str, Any]
+    use_case: str
+    lane_id: str = ""
+    # Wall-clock (epoch seconds) time the verdict is due; defaults to submit time plus the item budget
+    deadline: float = None
+    degraded: bool = False
+    future: Future = field(default_factory=Future)
+    submitted_at: float = field(default_factory=time.monotonic)
+    seq: int = field(default_factory=lambda: next(_sequence))
+
+    def __post_init__(self):
+        if self.deadline is None:
+            self.deadline = time.time() + ITEM_LATENCY_BUDGET_MS / 1000.0
+
+
+
+class VLMExecutionService:
+    """
+    Runs VLM requests on a pool of workers, batching requests that arrive together.
+
+    A batcher thread takes the first pending request, then gathers more for up to
+    batch_window_ms (or until max_batch) and hands the batch to a worker. Workers
+    prepare prompts and images concurrently; generation runs as one continuous
+    batch when the backend supports it, otherwise back to back on the shared model.
+
+    Requests are queued per lane, ordered by deadline ("edf" scheduling) or
+    by arrival ("fifo"), and batch slots go to the lanes in turn, so one lane
+    flooding the service with early deadlines cannot starve the others.
+    Batches are only formed when a worker is free, so requests wait in the
+    per-lane queues rather than in the executor's FIFO.
+
+    When a batch is formed, a request whose deadline falls before now plus the
+    recent batch duration of its use case is marked degraded and runs on the
+    cheaper path of call_vlm_batch (smaller image, fewer new tokens, and the
+    small model tier without escalation when one is configured).
+    Requests completing after their deadline are counted as misses.
+    """
+
+    def __init__(self, workers: int = VLM_WORKERS, batch_window_ms: float = VLM_BATCH_WINDOW_MS,
+                 max_batch: int = VLM_MAX_BATCH, scheduling: str = VLM_SCHEDULING,
+                 degrade: bool = VLM_DEGRADE):
+        self.workers = max(1, workers)
+        self.batch_window_s = max(0.0, batch_window_ms) / 1000.0
+        self.max_batch = max(1, max_batch)
+        self.scheduling = scheduling if scheduling in ("edf", "fifo") else "edf"
+        self.degrade = degrade
+        self.latency = LatencyStats("vlm_request")
+        self.degraded = 0
+        self.deadline_misses = 0
+        self._service_time = {}  # use_case -> EWMA of batch duration (s)
+        self._lanes = OrderedDict()  # lane_id -> heap of (sort key, request), in round-robin order
+        self._queued = 0
+        self._closed = False
+        self._cond = threading.Condition()
+        self._free_workers = threading.Semaphore(self.workers)
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="vlm-worker")
+        self._in_flight = 0
+        self._lock = threading.Lock()
+        self._batcher = threading.Thread(target=self._batch_loop, name="vlm-batcher", daemon=True)
+        self._batcher.start()
+        metrics.gauge("vlm_service_queued", lambda: self._queued)
+        metrics.gauge("vlm_service_in_flight", lambda: self._in_flight)
+        logger.info("VLM service started: workers=%d, batch_window=%.0fms, max_batch=%d, scheduling=%s, degrade=%s",
+                    self.workers, self.batch_window_s * 1000, self.max_batch, self.scheduling, self.degrade)
+
+    def submit(self, frame_records: Dict[str, Any], use_case: str = "", lane_id: str = "",
+               deadline: float = None) -> Future:
+        """
+        Queue a VLM request.
+
+        Args:
+            frame_records: Frame record dict passed to call_vlm
+            use_case: VLM use case
+            lane_id: Lane the request belongs to, for fair scheduling across lanes
+            deadline: Wall-clock time (epoch seconds) the result is due; None uses
+                the submit time plus ITEM_LATENCY_BUDGET_MS
+
+        Returns:
+            Future resolving to the (valid, result, error) tuple returned by call_vlm
+        """
+        request = VLMRequest(frame_records=frame_records, use_case=use_case, lane_id=lane_id or "",
+                             deadline=deadline)
+        with self._lock:
+            self._in_flight += 1
+        sort_key = (request.deadline, request.seq) if self.scheduling == "edf" else (request.seq,)
+        with self._cond:
+            heapq.heappush(self._lanes.setdefault(request.lane_id, []), (sort_key, request))
+            self._queued += 1
+            self._cond.notify()
+        return request.future
+
+    def stats(self) -> Dict[str, Any]:
+        """Return throughput (items/min over the last minute), latency percentiles and queue depth."""
+        with self._lock:
+            in_flight = self._in_flight
+        with self._cond:
+            queued = self._queued
+            lanes = {lane_id or "default": len(pending) for lane_id, pending in self._lanes.items() if pending}
+        with self._lock:
+            degraded, deadline_misses = self.degraded, self.deadline_misses
+        return {
+            "items_per_min": round(self.latency.rate_per_minute(), 1),
+            "in_flight": in_flight,
+            "queued": queued,
+            "queued_by_lane": lanes,
+            "degraded": degraded,
+            "deadline_misses": deadline_misses,
+            **self.latency.summary(),
+        }
+
+    def shutdown(self, wait: bool = True) -> None:
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._batcher.join()
+        self._executor.shutdown(wait=wait)
+
+    def _next_request(self):
+        """Pop the head of the next lane in turn (caller holds _cond)."""
+        for lane_id in [lane_id for lane_id, pending in self._lanes.items() if not pending]:
+            del self._lanes[lane_id]
+        if not self._lanes:
+            return None
+        lane_id = next(iter(self._lanes))
+        self._lanes.move_to_end(lane_id)
+        self._queued -= 1
+        return heapq.heappop(self._lanes[lane_id])[1]
+
+    def _mark_at_risk(self, batch):
+        """Mark requests whose expected finish (now + recent batch duration) is past their deadline."""
+        now = time.time()
+        with self._lock:
+            service_time = dict(self._service_time)
+        for request in batch:
+            expected = service_time.get(request.use_case)
+            if expected is not None and now + expected > request.deadline:
+                request.degraded = True
+                with self._lock:
+                    self.degraded += 1
+                metrics.inc("vlm_degraded", use_case=request.use_case, lane=request.lane_id or "default")
+
+    def _batch_loop(self):
+        while True:
+            self._free_workers.acquire()
+            with self._cond:
+                while not self._queued and not self._closed:
+                    self._cond.wait()
+                if not self._queued:
+                    return
+                batch = [self._next_request()]
+                deadline = time.monotonic() + self.batch_window_s
+                while len(batch) < self.max_batch:
+                    if self._queued:
+                        batch.append(self._next_request())
+                        continue
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0 or self._closed:
+                        break
+                    self._cond.wait(remaining)
+            if self.degrade:
+                self._mark_at_risk(batch)
+            self._executor.submit(self._run_batch, batch)
+
+    def _run_batch(self, batch):
+        try:
+            self._run_use_cases(batch)
+        finally:
+            self._free_workers.release()
+
+    def _run_use_cases(self, batch):
+        by_use_case = {}
+        for request in batch:
+            by_use_case.setdefault((request.use_case, request.degraded), []).append(request)
+
+        for (use_case, degraded), requests in by_use_case.items():
+            metrics.inc("vlm_batches", use_case=use_case)
+            started = time.monotonic()
+            try:
+                results = call_vlm_batch([r.frame_records for r in requests], use_case=use_case,
+                                         degraded=degraded)
+            except Exception as e:
+                logger.error("VLM service - batch failed: %s", str(e))
+                results = [(False, None, f"Unexpected error: {str(e)}")] * len(requests)
+            now = time.monotonic()
+            if not degraded:
+                self._update_service_time(use_case, now - started)
+            finished_at = time.time()
+            for request, result in zip(requests, results):
+                self.latency.record(now - request.submitted_at)
+                if finished_at > request.deadline:
+                    with self._lock:
+                        self.deadline_misses += 1
+                    metrics.inc("deadline_misses", use_case=use_case, lane=request.lane_id or "default")
+                    logger.warning("VLM service - %s request for lane %s finished %.2f s past its deadline",
+                                   use_case, request.lane_id or "default", finished_at - request.deadline)
+                with self._lock:
+                    self._in_flight -= 1
+                request.future.set_result(result)
+
+    def _update_service_time(self, use_case, duration):
+        # Worker threads update concurrently; the read-modify-write must not lose samples
+        with self._lock:
+            previous = self._service_time.get(use_case)
+            self._service_time[use_case] = duration if previous is None else (
+                SERVICE_TIME_EWMA_ALPHA * duration + (1 - SERVICE_TIME_EWMA_ALPHA) * previous)
+
+
+_vlm_service = None
+_vlm_service_lock = threading.Lock()
+
+
+def get_vlm_service() -> VLMExecutionService:
+    """Get or initialize the VLMExecutionService singleton."""
+    global _vlm_service
+    with _vlm_service_lock:
+        if _vlm_service is None:
+            _vlm_service = VLMExecutionService()
+    return _vlm_service
@@ -21,6 +21,8 @@ CONFIG_PATH_DEFAULT = "../../configs/camera_to_workload.json"
 TARGET_WORKLOAD = "lp_vlm"  # normalized compare
 RTSP_DEFAULT_HOST = os.getenv("RTSP_STREAM_HOST", "rtsp-streamer")
 RTSP_DEFAULT_PORT = os.getenv("RTSP_STREAM_PORT", "8554")
+# Lane (camera_id) served by this pipeline when several cameras run LP_VLM
+LANE_ID = os.getenv("LANE_ID", "").strip()
 
 # -------------------- Stream Validation --------------------
 def check_rtsp_stream_exists(stream_uri: str, timeout: int = 60) -> bool:
@@ -153,17 +155,13 @@ def derive_stream_name(camera: dict, stream_uri: str) -> str:
     fileSrc = camera.get("fileSrc", "")
     return extract_video_name(fileSrc, camera.get("width"), camera.get("fps"))
 
-# -------------------- Main Validation --------------------
-def validate_and_extract_vlm_config(camera_cfg_path: str = None) -> dict:
+# -------------------- Lane Selection --------------------
+def get_vlm_cameras(camera_cfg_path: str = None) -> list:
     """
-    Validate that exactly one camera has LP_VLM workload.
-    Extract and return video metadata.
-    
-    Returns:
-        dict with keys: stream_name, stream_uri, roi
+    Return all cameras with the LP_VLM workload.
     
     Raises:
-        ValueError: if zero or more than one LP_VLM workload found
+        ValueError: if no camera has the LP_VLM workload
     """
     # Determine config path
     if not camera_cfg_path:
@@ -187,17 +185,65 @@ def validate_and_extract_vlm_config(camera_cfg_path: str = None) -> dict:
             f"[ERROR] No lp_vlm workload found in any camera. "
             f"Available workloads: {[c.get('workloads', []) for c in cameras]}"
         )
+    return vlm_cameras
+
+
+def select_vlm_camera(camera_cfg_path: str = None, lane_id: str = None) -> dict:
+    """
+    Select the LP_VLM camera for one lane.
+    
+    With several LP_VLM cameras, lane_id (or the LANE_ID environment variable)
+    picks the camera by camera_id.
+    
+    Raises:
+        ValueError: if no camera matches, or several do and no lane is given
+    """
+    vlm_cameras = get_vlm_cameras(camera_cfg_path)
+    lane_id = (lane_id or LANE_ID).strip()
+    camera_ids = [str(c.get("camera_id", "unknown")) for c in vlm_cameras]
+    
+    if lane_id:
+        for cam in vlm_cameras:
+            if str(cam.get("camera_id", "")).strip() == lane_id:
+                return cam
+        raise ValueError(
+            f"[ERROR] Lane '{lane_id}' not found among LP_VLM cameras: {camera_ids}"
+        )
     
     if len(vlm_cameras) > 1:
-        camera_ids = [c.get("camera_id", "unknown") for c in vlm_cameras]
         raise ValueError(
             f"[ERROR] More than one LP_VLM workload defined. "
             f"Found {len(vlm_cameras)} cameras with LP_VLM: {camera_ids}. "
-            f"Only one camera should have LP_VLM workload."
+            f"Set LANE_ID (or --lane-id) to the camera_id this pipeline serves."
         )
+    return vlm_cameras[0]
+
+
+def list_vlm_lanes(camera_cfg_path: str = None) -> list:
+    """
+    Return one entry per LP_VLM camera: lane_id (its camera_id) and stream_name.
+    """
+    lanes = []
+    for cam in get_vlm_cameras(camera_cfg_path):
+        stream_name = derive_stream_name(cam, derive_stream_uri(cam))
+        lanes.append({"lane_id": str(cam.get("camera_id", "")).strip(), "stream_name": stream_name})
+    lane_ids = [lane["lane_id"] for lane in lanes]
+    if len(lanes) > 1 and (not all(lane_ids) or len(set(lane_ids)) != len(lane_ids)):
+        raise ValueError(f"[ERROR] LP_VLM cameras need unique camera_id values to run as lanes: {lane_ids}")
+    return lanes
+
+# -------------------- Main Validation --------------------
+def validate_and_extract_vlm_config(camera_cfg_path: str = None, lane_id: str = None) -> dict:
+    """
+    Validate the LP_VLM camera of a lane and extract its video metadata.
     
-    # Extract metadata from the single LP_VLM camera
-    cam = vlm_cameras[0]
+    Returns:
+        dict with keys: stream_name, stream_uri, roi
+    
+    Raises:
+        ValueError: if no LP_VLM workload is found, or several are and no lane is selected
+    """
+    cam = select_vlm_camera(camera_cfg_path, lane_id)
     camera_id = cam.get("camera_id", "unknown")
     roi_dict = cam.get("region_of_interest", {})
 
@@ -243,45 +289,20 @@ def has_lp_vlm_workload(camera_cfg_path: str = None) -> bool:
             return True
     return False
 
-def get_video_name_only(camera_cfg_path: str = None) -> str:
-    stream_name, _, _ = get_video_from_config(camera_cfg_path)
+def get_video_name_only(camera_cfg_path: str = None, lane_id: str = None) -> str:
+    stream_name, _, _ = get_video_from_config(camera_cfg_path, lane_id)
     return stream_name
 
 
-def get_video_name_with_extension(camera_cfg_path: str = None) -> str:
+def get_video_name_with_extension(camera_cfg_path: str = None, lane_id: str = None) -> str:
     """Return the bench-style video name plus the original file extension.
 
     Uses extract_video_name(fileSrc, width, fps) to build the base name
     (e.g. "lp-vlm-1080-15-bench") and appends the extension taken from
     the original fileSrc value in the camera config (e.g. ".mp4").
     """
-    # Resolve config path similarly to other helpers
-    if not camera_cfg_path:
-        camera_cfg_path = os.getenv("CAMERA_STREAM") or CONFIG_PATH_DEFAULT
-
-    cfg = load_config(camera_cfg_path)
-    lane = cfg.get("lane_config", {})
-    cameras = lane.get("cameras", [])
-
-    if not cameras:
-        raise ValueError("[ERROR] No cameras found in configuration")
-
-    # Select the single lp_vlm camera
-    vlm_cameras = [cam for cam in cameras if camera_has_vlm(cam)]
-    if len(vlm_cameras) == 0:
-        raise ValueError(
-            f"[ERROR] No lp_vlm workload found in any camera. "
-            f"Available workloads: {[c.get('workloads', []) for c in cameras]}"
-        )
-    if len(vlm_cameras) > 1:
-        camera_ids = [c.get("camera_id", "unknown") for c in vlm_cameras]
-        raise ValueError(
-            f"[ERROR] More than one LP_VLM workload defined. "
-            f"Found {len(vlm_cameras)} cameras with LP_VLM: {camera_ids}. "
-            f"Only one camera should have LP_VLM workload."
-        )
-
-    cam = vlm_cameras[0]
+    # Select the lp_vlm camera of this lane
+    cam = select_vlm_camera(camera_cfg_path, lane_id)
 
     # Original fileSrc, first segment before '|'
     raw_src = str(cam.get("fileSrc", ""))
@@ -302,13 +323,14 @@ def get_video_name_with_extension(camera_cfg_path: str = None) -> str:
 
     return f"{base_name}{ext}"
 
-def get_video_from_config(camera_cfg_path: str = None):
+def get_video_from_config(camera_cfg_path: str = None, lane_id: str = None):
     """
     Validate VLM configuration and extract stream metadata.
     Sets stream name, URI, and ROI values.
     
     Args:
         camera_cfg_path: Optional path to camera config file
+        lane_id: Optional camera_id of the lane (defaults to LANE_ID)
         
     Returns:
         tuple: (stream_name, stream_uri, roi_coordinates)
@@ -319,7 +341,7 @@ def get_video_from_config(camera_cfg_path: str = None):
     logger = logging.getLogger(__name__)
     
     try:
-        vlm_config = validate_and_extract_vlm_config(camera_cfg_path)
+        vlm_config = validate_and_extract_vlm_config(camera_cfg_path, lane_id)
 
         stream_name = vlm_config.get("stream_name")
         stream_uri = vlm_config.get("stream_uri")
@@ -341,6 +363,16 @@ if __name__ == "__main__":
         help="Camera workload mapping JSON path",
         default=None
     )
+    parser.add_argument(
+        "--lane-id",
+        help="camera_id of the lane when several cameras run lp_vlm (defaults to LANE_ID)",
+        default=None
+    )
+    parser.add_argument(
+        "--list-lanes",
+        action="store_true",
+        help="Return all lp_vlm lanes as JSON"
+    )
     parser.add_argument(
         "--has-lp-vlm",
         action="store_true",
@@ -375,8 +407,12 @@ if __name__ == "__main__":
             print("1" if exists else "0")
             exit(0)
 
+        if args.list_lanes:
+            print(json.dumps(list_vlm_lanes(args.camera_config)))
+            exit(0)
+
         if args.get_video:
-            stream_name, stream_uri, roi_coordinates = get_video_from_config(args.camera_config)
+            stream_name, stream_uri, roi_coordinates = get_video_from_config(args.camera_config, args.lane_id)
             print(json.dumps({
                 "stream_name": stream_name,
                 "stream_uri": stream_uri,
@@ -384,15 +420,15 @@ if __name__ == "__main__":
             }))
             exit(0)
         if args.extract_video_name:
-            video_name = get_video_name_with_extension(args.camera_config)
+            video_name = get_video_name_with_extension(args.camera_config, args.lane_id)
             print(video_name)
             exit(0)
         if args.get_stream_uri:
-            _, stream_uri, _ = get_video_from_config(args.camera_config)
+            _, stream_uri, _ = get_video_from_config(args.camera_config, args.lane_id)
             print(stream_uri)
             exit(0)
         if args.get_video_name:
-            video_name = get_video_name_only(args.camera_config)
+            video_name = get_video_name_only(args.camera_config, args.lane_id)
             print(video_name)
             exit(0)    
         parser.print_help()
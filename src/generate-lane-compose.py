@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Generate a docker compose override that runs one vlm-pipeline-runner per LP_VLM lane.
+
+docker-compose.yml defines a single vlm-pipeline-runner with an empty LANE_ID,
+which only works with one LP_VLM camera. For a camera config with several
+LP_VLM cameras, this script writes an override that pins the base runner to the
+first lane and adds a runner per further lane (extending the base service),
+each with LANE_ID set to the camera_id it serves.
+
+Usage:
+    python src/generate-lane-compose.py --camera-config configs/camera_to_workload_vlm.json
+    docker compose -f src/docker-compose.yml -f src/docker-compose.lanes.yml up -d
+"""
+
+import argparse
+import os
+import re
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "lp-vlm", "src"))
+
+from workload_utils import list_vlm_lanes  # noqa: E402
+
+BASE_SERVICE = "vlm-pipeline-runner"
+
+
+def service_name(lane_id):
+    """Compose service/container name for a lane (camera_ids may hold characters compose rejects)."""
+    return f"{BASE_SERVICE}-{re.sub(r'[^a-zA-Z0-9_.-]', '-', lane_id).lower()}"
+
+
+def render_override(lane_ids, base_compose="docker-compose.yml"):
+    """
+    Return the override YAML for the given lane ids (the first one runs in the base service).
+
+    base_compose is the path of docker-compose.yml relative to the override file.
+    """
+    lines = [
+        f"# Generated by generate-lane-compose.py: one {BASE_SERVICE} per LP_VLM lane",
+        "services:",
+        f"  {BASE_SERVICE}:",
+        "    environment:",
+        f"      - LANE_ID={lane_ids[0]}",
+    ]
+    for lane_id in lane_ids[1:]:
+        name = service_name(lane_id)
+        lines += [
+            f"  {name}:",
+            "    extends:",
+            f"      file: {base_compose}",
+            f"      service: {BASE_SERVICE}",
+            f"    container_name: {name}",
+            "    environment:",
+            f"      - LANE_ID={lane_id}",
+        ]
+    return "\n".join(lines) + "\n"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--camera-config", required=True, help="camera_to_workload JSON with the LP_VLM cameras")
+    parser.add_argument("--output", default=os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                                         "docker-compose.lanes.yml"))
+    args = parser.parse_args()
+
+    try:
+        lane_ids = [lane["lane_id"] for lane in list_vlm_lanes(args.camera_config)]
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        sys.exit(1)
+    base_compose = os.path.relpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "docker-compose.yml"),
+                                   os.path.dirname(os.path.abspath(args.output)))
+    with open(args.output, "w") as f:
+        f.write(render_override(lane_ids, base_compose))
+    print(f"Wrote {args.output} with {len(lane_ids)} lane(s): {', '.join(lane_ids)}")
+
+
+if __name__ == "__main__":
+    main()